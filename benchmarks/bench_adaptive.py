@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Compare fixed and adaptive HackMD fetch concurrency against a throttling API.
+
+The fake API answers up to --capacity requests at a time in --api-latency
+seconds; requests beyond that are answered with a 429 after a short delay,
+like a rate limited HackMD. Each variant fetches the corpus through the
+pipeline: "fixed-<n>" with n fetch threads and no retries, "adaptive" with
+--adaptive-fetch (starting at 4, at most --max-workers).
+
+Usage:
+    python -m benchmarks.bench_adaptive --notes 1000 --capacity 12 --api-latency 0.05
+"""
+
+import argparse
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeHackMDClient
+from benchmarks.harness import StageTimer, environment_info, write_results
+from clients.hackmd_client import HackMDAPIError
+from concurrency import AIMDLimiter
+from models import Note
+from pipeline import stream_notes
+from utils import estimate_tokens
+
+
+class ThrottlingHackMDClient(FakeHackMDClient):
+    """
+    Fake HackMD API that rejects requests above a concurrency capacity.
+
+    Args:
+        corpus: Notes returned by the fake API
+        latency (float): Seconds per accepted request
+        capacity (int): Requests served at the same time
+    """
+
+    def __init__(self, corpus, latency: float, capacity: int):
+        super().__init__(corpus, latency=latency)
+        self.capacity = capacity
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def get_note_content(self, note_id: str) -> Dict[str, Any]:
+        with self._lock:
+            accepted = self._in_flight < self.capacity
+            if accepted:
+                self._in_flight += 1
+            else:
+                self.throttled += 1
+        if not accepted:
+            time.sleep(self.latency / 10)
+            raise HackMDAPIError(
+                f"Failed to get note content - [Note ID: {note_id}, Error: 429]",
+                status_code=429,
+                retry_after=self.latency,
+            )
+        try:
+            return super().get_note_content(note_id)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+
+def main() -> None:
+    """
+    Time fetching the corpus with fixed and adaptive concurrency.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark adaptive fetch concurrency")
+    parser.add_argument("--notes", type=int, default=1000, help="Number of notes")
+    parser.add_argument("--api-latency", type=float, default=0.05)
+    parser.add_argument("--capacity", type=int, default=12, help="Concurrent requests the API serves")
+    parser.add_argument("--max-workers", type=int, default=32)
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join("benchmarks", "results", "adaptive.json"),
+        help="Where to write the JSON results",
+    )
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.notes, folder_ratio=1.0)
+    listing = [Note.from_api(note) for note in corpus]
+    timer = StageTimer()
+    variants: Dict[str, Dict[str, Any]] = {}
+
+    for name in ("fixed-4", f"fixed-{args.max_workers}", "adaptive"):
+        hackmd = ThrottlingHackMDClient(corpus, latency=args.api_latency, capacity=args.capacity)
+        limiter = None
+        get_content = hackmd.get_note_content
+        workers = 4 if name == "fixed-4" else args.max_workers
+        if name == "adaptive":
+            limiter = AIMDLimiter(initial=4, max_limit=args.max_workers)
+            get_content = limiter.wrap(get_content)
+
+        with timer.stage(name):
+            results = list(
+                stream_notes(
+                    notes=listing,
+                    fetch=lambda note_id: Note.from_api(get_content(note_id)),
+                    count=estimate_tokens,
+                    workers=4,
+                    queue_size=max(16, workers),
+                    fetch_workers=workers,
+                )
+            )
+        wall = timer.stages[name]["wall_s"]
+        fetched = sum(result.error is None for result in results)
+        variants[name] = {
+            "fetched": fetched,
+            "failed": len(results) - fetched,
+            "throttled": hackmd.throttled,
+            "notes_per_s": fetched / wall,
+        }
+        if limiter is not None:
+            variants[name]["trajectory"] = limiter.trajectory
+            variants[name]["backoffs"] = limiter.backoffs
+        print(
+            f"{name:<10} wall {wall:.3f}s  {fetched / wall:7.1f} notes/s  "
+            f"{len(results) - fetched} failed  {hackmd.throttled} throttled"
+        )
+        if limiter is not None:
+            print(f"{'':<10} concurrency {limiter.summary()}")
+
+    results = {
+        "benchmark": "adaptive",
+        "environment": environment_info(),
+        "parameters": vars(args),
+        "stages": timer.stages,
+        "variants": variants,
+    }
+    write_results(args.output, results)
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
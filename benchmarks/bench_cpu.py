@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Compare serial local token counting with the process pool at several chunk sizes.
+
+Every variant must produce exactly the serial counts. The fastest chunk size
+is the one to use as the ``--cpu-chunksize`` default. With ``--slim`` the
+whole note pipeline is also timed with slimming and snapshot digests on
+threads and in the process pool (``--slim --local-tokens --cpu-workers N``).
+
+Usage:
+    python -m benchmarks.bench_cpu --notes 10000 --workers 4 --chunksizes 1 16 64 256 --slim
+"""
+
+import argparse
+import os
+from typing import Dict, Any
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.harness import StageTimer, environment_info, write_results
+from models import Note
+from pipeline import create_cpu_executor, ordered_chunk_map, stream_notes
+from slim import MarkdownSlimmer
+from snapshot import text_digest
+from utils import estimate_tokens
+
+
+def main() -> None:
+    """
+    Time serial and process pool token counting over a synthetic corpus.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark process pool token counting")
+    parser.add_argument("--notes", type=int, default=10000, help="Number of notes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksizes", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--slim", action="store_true", help="Also time slimming in the pipeline")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join("benchmarks", "results", "cpu.json"),
+        help="Where to write the JSON results",
+    )
+    args = parser.parse_args()
+
+    contents = [note["content"] for note in generate_corpus(args.notes, folder_ratio=1.0)]
+    timer = StageTimer()
+
+    with timer.stage("serial"):
+        expected = [estimate_tokens(content) for content in contents]
+
+    with create_cpu_executor(args.workers) as executor:
+        # Start the worker processes outside the timed stages
+        list(executor.map(estimate_tokens, [""] * args.workers))
+
+        for chunksize in args.chunksizes:
+            with timer.stage(f"pool_chunk_{chunksize}"):
+                counts = [
+                    tokens
+                    for _, tokens, _ in ordered_chunk_map(
+                        estimate_tokens,
+                        contents,
+                        executor,
+                        chunksize,
+                        window=2 * args.workers,
+                    )
+                ]
+            if counts != expected:
+                raise AssertionError(f"Chunk size {chunksize} produced different counts")
+
+    if args.slim:
+        notes = [Note(id=str(i)) for i in range(len(contents))]
+        slimmer = MarkdownSlimmer()
+        slimmed = {}
+        for name, cpu_workers in (("slim_threads", 0), ("slim_pool", args.workers)):
+            with timer.stage(name):
+                slimmed[name] = [
+                    (result.note.content, result.tokens, result.digest)
+                    for result in stream_notes(
+                        notes,
+                        fetch=lambda note_id: Note(id=note_id, content=contents[int(note_id)]),
+                        count=estimate_tokens,
+                        rewrite=slimmer.slim,
+                        digest=text_digest,
+                        cpu_workers=cpu_workers,
+                    )
+                ]
+        if slimmed["slim_pool"] != slimmed["slim_threads"]:
+            raise AssertionError("Slimming in the process pool produced different notes")
+
+    results: Dict[str, Any] = {
+        "benchmark": "cpu",
+        "environment": environment_info(),
+        "parameters": vars(args),
+        "stages": timer.stages,
+    }
+    for name, values in timer.stages.items():
+        print(f"{name:<16} wall {values['wall_s']:.3f}s  cpu {values['cpu_s']:.3f}s")
+
+    write_results(args.output, results)
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
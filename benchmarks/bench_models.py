@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Measure the memory held by note metadata with raw API dicts and with ``Note``.
+
+Both variants decode the same JSON responses. The "dicts" variant keeps what
+``main.py`` used to keep: the whole listing plus a full-note dict per filtered
+note. The "notes" variant keeps only compact ``Note`` records of the filtered
+notes. Note content is left out of both, since its size is the same either way
+and it is released after prompt assembly.
+
+Usage:
+    python -m benchmarks.bench_models --notes 100000
+"""
+
+import argparse
+import gc
+import json
+import os
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeHackMDClient
+from benchmarks.harness import environment_info, write_results
+from models import Note
+
+FOLDER_NAME = "Benchmark Weekly Report"
+START_DATE = "2015-01-01"
+END_DATE = "2035-12-31"
+
+
+def measure(build: Callable[[], Any]) -> Tuple[Any, Dict[str, int]]:
+    """
+    Run ``build`` under tracemalloc and report the memory it retains.
+
+    Args:
+        build (Callable[[], Any]): Builds the structures to measure
+
+    Returns:
+        Tuple[Any, Dict[str, int]]: The built object and its retained and peak bytes
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {"retained_bytes": current, "peak_bytes": peak}
+
+
+def main() -> None:
+    """
+    Compare metadata memory of raw dicts and Note records.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark note record memory")
+    parser.add_argument("--notes", type=int, default=100000, help="Number of notes")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join("benchmarks", "results", "models.json"),
+        help="Where to write the JSON results",
+    )
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.notes)
+    for note in corpus:
+        note["content"] = ""
+    listing_json = json.dumps(
+        [{k: v for k, v in note.items() if k != "content"} for note in corpus]
+    )
+    full_json = {note["id"]: json.dumps(note) for note in corpus}
+    del corpus
+    hackmd = FakeHackMDClient([])
+
+    def build_dicts():
+        all_notes = json.loads(listing_json)
+        filtered = [
+            note
+            for note in all_notes
+            if hackmd._note_in_folder(note, FOLDER_NAME)
+        ]
+        full = [json.loads(full_json[note["id"]]) for note in filtered]
+        return all_notes, filtered, full
+
+    def build_notes():
+        all_notes = json.loads(listing_json)
+        filtered = hackmd.filter_notes_by_folder_and_date(
+            all_notes, FOLDER_NAME, START_DATE, END_DATE
+        )
+        del all_notes
+        full = [Note.from_api(json.loads(full_json[note.id])) for note in filtered]
+        return filtered, full
+
+    dicts, dicts_memory = measure(build_dicts)
+    filtered_count = len(dicts[1])
+    del dicts
+    _, notes_memory = measure(build_notes)
+
+    results: Dict[str, Any] = {
+        "benchmark": "models",
+        "environment": environment_info(),
+        "parameters": vars(args),
+        "filtered_notes": filtered_count,
+        "variants": {"dicts": dicts_memory, "notes": notes_memory},
+    }
+    for name, values in results["variants"].items():
+        print(
+            f"{name:<6} retained {values['retained_bytes'] / 2**20:8.1f} MiB  "
+            f"peak {values['peak_bytes'] / 2**20:8.1f} MiB"
+        )
+
+    write_results(args.output, results)
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the report pipeline on synthetic HackMD corpora.
+
+Each stage of main.py is timed separately against in-memory fakes of the
+HackMD and LLM clients, so the numbers reflect local processing cost plus
+whatever API latency is simulated.
+
+Usage:
+    python -m benchmarks.bench_pipeline --sizes 100 1000 10000 100000
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+from typing import Dict, Any, List
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeHackMDClient, FakeLLMClient
+from benchmarks.harness import (
+    StageTimer,
+    environment_info,
+    write_results,
+    compare_results,
+)
+from models import Note
+from utils import build_prompt, save_local_report
+
+FOLDER_NAME = "Benchmark Weekly Report"
+START_DATE = "2000-01-01"
+END_DATE = "2099-12-31"
+
+
+def run_pipeline(
+    corpus: List[Dict[str, Any]],
+    api_latency: float = 0.0,
+    llm_latency: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Run every pipeline stage once and time it.
+
+    Args:
+        corpus (List[Dict[str, Any]]): Synthetic notes
+        api_latency (float): Simulated seconds per HackMD call
+        llm_latency (float): Simulated seconds per token count call
+
+    Returns:
+        Dict[str, Any]: Per-stage measurements and corpus statistics
+    """
+    hackmd = FakeHackMDClient(corpus, latency=api_latency)
+    llm = FakeLLMClient(latency=llm_latency)
+    timer = StageTimer()
+
+    with timer.stage("listing"):
+        all_notes = hackmd.get_notes()
+
+    with timer.stage("filter_notes_by_folder_and_date"):
+        filtered_notes = hackmd.filter_notes_by_folder_and_date(
+            notes=all_notes,
+            folder_name=FOLDER_NAME,
+            start_date=START_DATE,
+            end_date=END_DATE,
+        )
+
+    with timer.stage("content_fetch"):
+        notes_with_content = [
+            Note.from_api(hackmd.get_note_content(note.id)) for note in filtered_notes
+        ]
+
+    with timer.stage("count_tokens"):
+        total_tokens = sum(
+            llm.count_tokens(note.content) for note in notes_with_content
+        )
+
+    with timer.stage("build_prompt"):
+        prompt = build_prompt(notes_with_content)
+
+    with timer.stage("generation"):
+        report_content = llm.generate(prompt)
+
+    with timer.stage("save_local_report"):
+        local_filename = save_local_report(
+            content=report_content,
+            start_date=f"benchmark-{len(corpus)}",
+            end_date="run",
+        )
+    os.remove(local_filename)
+
+    with timer.stage("upload"):
+        hackmd.upload_note(
+            title="benchmark", content=report_content, tags=["benchmark"]
+        )
+
+    return {
+        "num_notes": len(corpus),
+        "filtered_notes": len(filtered_notes),
+        "content_bytes": sum(
+            len(note.content.encode("utf-8")) for note in notes_with_content
+        ),
+        "total_tokens": total_tokens,
+        "prompt_chars": len(prompt),
+        "stages": timer.stages,
+    }
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments for the benchmark.
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the report pipeline")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100, 1000, 10000, 100000],
+        help="Corpus sizes (number of notes) to benchmark",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=42, help="Seed for corpus generation"
+    )
+    parser.add_argument(
+        "--api-latency",
+        type=float,
+        default=0.0,
+        help="Simulated seconds per HackMD API call",
+    )
+    parser.add_argument(
+        "--llm-latency",
+        type=float,
+        default=0.0,
+        help="Simulated seconds per token counting call",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join("benchmarks", "results", "pipeline.json"),
+        help="Where to write the JSON results",
+    )
+    parser.add_argument(
+        "--compare",
+        type=str,
+        help="Baseline JSON results to check for regressions",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown that counts as a regression (0.2 = 20%%)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """
+    Run the benchmark for every requested corpus size.
+    """
+    args = parse_arguments()
+    results: Dict[str, Any] = {
+        "benchmark": "pipeline",
+        "environment": environment_info(),
+        "parameters": {
+            "seed": args.seed,
+            "api_latency": args.api_latency,
+            "llm_latency": args.llm_latency,
+        },
+        "runs": [],
+    }
+
+    for size in args.sizes:
+        print(f"Generating corpus with {size} notes...")
+        corpus = generate_corpus(size, folder_name=FOLDER_NAME, seed=args.seed)
+        gc.collect()
+
+        run = run_pipeline(corpus, args.api_latency, args.llm_latency)
+        results["runs"].append(run)
+
+        for stage, values in run["stages"].items():
+            print(
+                f"  {stage:<32} wall {values['wall_s']:>9.4f}s  "
+                f"cpu {values['cpu_s']:>9.4f}s  "
+                f"peak {values['peak_rss_kb'] / 1024:>8.1f} MiB"
+            )
+
+        del corpus
+        gc.collect()
+
+    write_results(args.output, results)
+    print(f"Results written to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        regressions = compare_results(baseline, results, threshold=args.threshold)
+        for regression in regressions:
+            print(
+                f"Regression: {regression['stage']} at {regression['num_notes']} notes "
+                f"{regression['baseline']:.4f}s -> {regression['current']:.4f}s "
+                f"(x{regression['ratio']})"
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
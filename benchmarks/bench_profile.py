@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Measure the overhead of --profile on prompt building.
+
+``build_report_prompt`` runs over the same corpus with tracing off, with
+tracing on (which --profile needs), with the stack sampler attached
+(--profile) and with allocation tracking as well (--profile-allocations), in
+alternating order, and the median wall time of each mode is reported.
+Token counting is local (--local-tokens) and the fake API has no latency
+by default, so the run is CPU-bound: the worst case for the profiler.
+
+Usage:
+    python -m benchmarks.bench_profile --notes 5000 --repeat 5
+"""
+
+import argparse
+import contextlib
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeHackMDClient
+from benchmarks.harness import environment_info, write_results
+from checkpoint import Checkpoint
+from config import parse_arguments
+from main import build_report_prompt
+from profiler import Profiler
+from tracing import configure_tracing
+
+FOLDER_NAME = "Benchmark Weekly Report"
+MODES = ("off", "traced", "profiled", "allocations")
+
+
+def run_once(mode: str, hackmd: FakeHackMDClient, argv: List[str], workdir: str) -> float:
+    """
+    Build the prompt once and time it.
+
+    Args:
+        mode (str): "off", "traced", "profiled" or "allocations"
+        hackmd (FakeHackMDClient): Fake API serving the corpus
+        argv (List[str]): Report arguments
+        workdir (str): Directory for checkpoints and the profile
+
+    Returns:
+        float: Wall time in seconds
+    """
+    tracer = configure_tracing(enabled=mode != "off")
+    profiler = None
+    if mode in ("profiled", "allocations"):
+        profiler = Profiler(os.path.join(workdir, "profile"), allocations=mode == "allocations")
+        tracer.observers.append(profiler)
+        profiler.start()
+    checkpoint = Checkpoint(os.path.join(workdir, "checkpoints"), mode)
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        build_report_prompt(parse_arguments(argv), hackmd, None, checkpoint)
+    if profiler is not None:
+        profiler.stop()
+    elapsed = time.perf_counter() - start
+
+    checkpoint.clear()
+    configure_tracing(enabled=False)
+    return elapsed
+
+
+def main() -> None:
+    """
+    Compare prompt building with and without the profiler.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark --profile overhead")
+    parser.add_argument("--notes", type=int, default=5000, help="Number of notes")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per mode")
+    parser.add_argument("--api-latency", type=float, default=0.0)
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join("benchmarks", "results", "profile.json"),
+        help="Where to write the JSON results",
+    )
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.notes, folder_name=FOLDER_NAME, folder_ratio=1.0)
+    hackmd = FakeHackMDClient(corpus, latency=args.api_latency)
+    argv = [
+        "--start-date", "2000-01-01", "--end-date", "2100-12-31",
+        "--folder-name", FOLDER_NAME, "--llm-provider", "openai", "--year-tag", "bench",
+        "--max-tokens", "100000000", "--local-tokens",
+    ]
+
+    times: Dict[str, List[float]] = {mode: [] for mode in MODES}
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(args.repeat):
+            for mode in MODES:
+                times[mode].append(run_once(mode, hackmd, argv, workdir))
+
+    results: Dict[str, Any] = {
+        "benchmark": "profile",
+        "environment": environment_info(),
+        "parameters": vars(args),
+        "modes": {},
+    }
+    baseline = statistics.median(times["off"])
+    for mode in MODES:
+        median = statistics.median(times[mode])
+        results["modes"][mode] = {"median_s": median, "runs_s": times[mode]}
+        print(f"{mode:<11} median {median:.3f}s  ({median / baseline - 1:+.1%} vs off)")
+
+    write_results(args.output, results)
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
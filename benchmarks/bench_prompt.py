@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Compare the segment-based prompt builder with the original ``+=`` builder.
+
+Usage:
+    python -m benchmarks.bench_prompt --notes 10000
+"""
+
+import argparse
+import os
+from datetime import datetime
+from typing import List, Dict, Any
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.harness import StageTimer, environment_info, write_results
+from models import Note
+from utils import PROMPT_HEADER, build_prompt
+
+
+def legacy_build_prompt(filtered_notes: List[Dict[str, Any]]) -> str:
+    """
+    Original prompt builder kept as the benchmark reference.
+
+    Args:
+        filtered_notes (List[Dict[str, Any]]): List of filtered notes
+
+    Returns:
+        str: Formatted prompt for LLM
+    """
+    prompt = PROMPT_HEADER
+
+    for i, note in enumerate(filtered_notes, 1):
+        created_at = note.get("createdAt", 0)
+        date_str = datetime.fromtimestamp(created_at / 1000).strftime("%Y-%m-%d")
+        title = note.get("title", "Untitled")
+
+        prompt += f"""
+## 週報 {i} (創建日期: {date_str})
+{title}
+
+## 內容
+{note.get("content")}
+"""
+
+    return prompt
+
+
+def main() -> None:
+    """
+    Time both builders on the same corpus and check that they agree.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the prompt builder")
+    parser.add_argument("--notes", type=int, default=10000, help="Number of notes")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join("benchmarks", "results", "prompt.json"),
+        help="Where to write the JSON results",
+    )
+    args = parser.parse_args()
+
+    notes = generate_corpus(args.notes)
+    records = [Note.from_api(note) for note in notes]
+    timer = StageTimer()
+    builders = {
+        "legacy_build_prompt": lambda: legacy_build_prompt(notes),
+        "build_prompt": lambda: build_prompt(records),
+    }
+    results: Dict[str, Any] = {
+        "benchmark": "prompt",
+        "environment": environment_info(),
+        "parameters": {"notes": args.notes, "repeat": args.repeat},
+        "runs": [],
+    }
+
+    if legacy_build_prompt(notes) != build_prompt(records):
+        raise AssertionError("Prompt builders produce different output")
+
+    for name, builder in builders.items():
+        best = None
+        for attempt in range(args.repeat):
+            key = f"{name}#{attempt}"
+            with timer.stage(key):
+                builder()
+            if best is None or timer.stages[key]["wall_s"] < best["wall_s"]:
+                best = timer.stages[key]
+
+        results["runs"].append({"builder": name, **best})
+        print(
+            f"{name:<22} best wall {best['wall_s']:.4f}s  "
+            f"cpu {best['cpu_s']:.4f}s  peak {best['peak_rss_kb'] / 1024:.1f} MiB"
+        )
+
+    write_results(args.output, results)
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
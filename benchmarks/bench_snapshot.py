@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Compare collecting notes from HackMD with reading them from a snapshot.
+
+The "fetch" variant lists, fetches and counts the notes through fakes with
+simulated HackMD and token counting latency, writing a snapshot as it goes
+(--export-snapshot). The "snapshot" variant reads the same notes and counts
+back from that file (--from-snapshot). Both yield the same notes and counts.
+
+Usage:
+    python -m benchmarks.bench_snapshot --notes 2000 --api-latency 0.02 --llm-latency 0.01
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeHackMDClient, FakeLLMClient
+from benchmarks.harness import StageTimer, environment_info, write_results
+from models import Note
+from pipeline import stream_notes
+from snapshot import Snapshot, SnapshotWriter, text_digest
+
+
+def main() -> None:
+    """
+    Time note collection from the fake API and from a snapshot.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark note snapshots")
+    parser.add_argument("--notes", type=int, default=2000, help="Number of notes")
+    parser.add_argument("--api-latency", type=float, default=0.02)
+    parser.add_argument("--llm-latency", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join("benchmarks", "results", "snapshot.json"),
+        help="Where to write the JSON results",
+    )
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.notes, folder_ratio=1.0)
+    json_bytes = sum(len(json.dumps(note, ensure_ascii=False).encode("utf-8")) for note in corpus)
+    hackmd = FakeHackMDClient(corpus, latency=args.api_latency)
+    llm = FakeLLMClient(latency=args.llm_latency)
+    timer = StageTimer()
+
+    def collect(listing: List[Note], fetch, count) -> List[Tuple[str, int]]:
+        return [
+            (result.note.content, result.tokens)
+            for result in stream_notes(notes=listing, fetch=fetch, count=count, workers=args.workers)
+        ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "notes.snap")
+
+        with timer.stage("fetch"):
+            listing = [Note.from_api(note) for note in hackmd.get_notes()]
+            with SnapshotWriter(path, manifest={}, token_model="fake") as writer:
+
+                def fetch(note_id: str) -> Note:
+                    note = Note.from_api(hackmd.get_note_content(note_id))
+                    writer.add_note(note)
+                    return note
+
+                fetched = collect(listing, fetch, llm.count_tokens)
+                for text, tokens in fetched:
+                    writer.add_count(text_digest(text), tokens)
+
+        with timer.stage("snapshot"):
+            with Snapshot(path) as snapshot:
+                loaded = collect(
+                    snapshot.notes(), snapshot.get_note, snapshot.cached_count(llm.count_tokens)
+                )
+        snapshot_bytes = os.path.getsize(path)
+
+    # Notes are stored as their fetches finish; the report filter sorts them again
+    if sorted(loaded) != sorted(fetched):
+        raise AssertionError("Snapshot returned different notes or counts")
+
+    results: Dict[str, Any] = {
+        "benchmark": "snapshot",
+        "environment": environment_info(),
+        "parameters": vars(args),
+        "json_bytes": json_bytes,
+        "snapshot_bytes": snapshot_bytes,
+        "stages": timer.stages,
+    }
+    for name, values in timer.stages.items():
+        print(f"{name:<10} wall {values['wall_s']:.3f}s  cpu {values['cpu_s']:.3f}s")
+    print(
+        f"snapshot   {snapshot_bytes / 2**20:.1f} MiB "
+        f"({snapshot_bytes / json_bytes:.0%} of {json_bytes / 2**20:.1f} MiB API JSON)"
+    )
+
+    write_results(args.output, results)
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Measure the peak RSS of prompt building with note bodies in memory and spilled.
+
+Each run is a fresh process that calls ``build_report_prompt`` with
+``--fit-budget`` and a fixed ``--max-tokens``, so the prompt has the same
+size for every corpus and any growth of the peak comes from holding the
+corpus. The corpus is served from a JSON lines file on disk, so the stand-in
+for HackMD does not keep the note bodies resident itself.
+
+Usage:
+    python -m benchmarks.bench_spill --sizes 2000 8000 32000 --max-tokens 100000
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, List
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.harness import _peak_rss_kb, _reset_peak_rss, environment_info, write_results
+from clients.hackmd_client import HackMDClient
+
+FOLDER_NAME = "Benchmark Weekly Report"
+MODES = ("memory", "spill")
+# Listing fields main.py reads; the rest would only add to the baseline
+LISTING_FIELDS = ("id", "title", "createdAt", "lastChangedAt", "folderPaths", "tags")
+
+
+class FileHackMDClient(HackMDClient):
+    """
+    Stand-in for HackMDClient serving a corpus from a JSON lines file.
+
+    Only the listing is kept in memory; note bodies are read from the file
+    on every fetch.
+
+    Args:
+        path (str): Corpus file with one note per line
+    """
+
+    def __init__(self, path: str):
+        super().__init__(api_token="benchmark-token")
+        self._file = open(path, "rb")
+        self._lock = threading.Lock()
+        self._offsets: Dict[str, int] = {}
+        self._listing: List[Dict[str, Any]] = []
+        offset = 0
+        for line in self._file:
+            note = json.loads(line)
+            self._offsets[note["id"]] = offset
+            self._listing.append({key: note[key] for key in LISTING_FIELDS})
+            offset += len(line)
+
+    def get_notes(self) -> List[Dict[str, Any]]:
+        return [dict(note) for note in self._listing]
+
+    def get_note_content(self, note_id: str) -> Dict[str, Any]:
+        with self._lock:
+            self._file.seek(self._offsets[note_id])
+            line = self._file.readline()
+        return json.loads(line)
+
+
+def run_child(mode: str, corpus_path: str, max_tokens: int, workdir: str) -> None:
+    """
+    Build the prompt in this process and print its peak RSS as JSON.
+
+    Args:
+        mode (str): "memory" or "spill"
+        corpus_path (str): Corpus file
+        max_tokens (int): --max-tokens of the run
+        workdir (str): Directory for the checkpoint and the spill file
+    """
+    from checkpoint import Checkpoint
+    from config import parse_arguments
+    from main import build_report_prompt
+
+    argv = [
+        "--start-date", "2000-01-01", "--end-date", "2100-12-31",
+        "--folder-name", FOLDER_NAME, "--llm-provider", "openai", "--year-tag", "bench",
+        "--max-tokens", str(max_tokens), "--local-tokens", "--fit-budget",
+    ]
+    if mode == "spill":
+        argv += ["--spill", "--spill-dir", workdir]
+    args = parse_arguments(argv)
+    hackmd = FileHackMDClient(corpus_path)
+    checkpoint = Checkpoint(os.path.join(workdir, "checkpoints"), mode)
+
+    _reset_peak_rss()
+    baseline_kb = _peak_rss_kb()
+    # Progress output is discarded; a print mock would keep every line
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        prompt = build_report_prompt(args, hackmd, None, checkpoint)
+    peak_kb = _peak_rss_kb()
+    print(json.dumps({
+        "baseline_rss_kb": baseline_kb,
+        "peak_rss_kb": peak_kb,
+        "growth_kb": peak_kb - baseline_kb,
+        "prompt_chars": len(prompt),
+    }))
+
+
+def run_once(mode: str, corpus_path: str, max_tokens: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as workdir:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_spill", "--child", mode,
+             "--corpus", corpus_path, "--max-tokens", str(max_tokens), "--workdir", workdir],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    """
+    Compare peak RSS with and without --spill over growing corpora.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark peak RSS of note spilling")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 8000, 32000], help="Corpus sizes")
+    parser.add_argument("--max-tokens", type=int, default=100000, help="Token budget of the prompt")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join("benchmarks", "results", "spill.json"),
+        help="Where to write the JSON results",
+    )
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.corpus, args.max_tokens, args.workdir)
+        return
+
+    runs = []
+    print(f"{'notes':>8} {'corpus MiB':>11}" + "".join(f"{mode + ' peak MiB':>18}" for mode in MODES))
+    for size in args.sizes:
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", encoding="utf-8", delete=False) as f:
+            corpus_bytes = 0
+            for note in generate_corpus(size, folder_name=FOLDER_NAME, folder_ratio=1.0):
+                corpus_bytes += len(note["content"].encode("utf-8"))
+                f.write(json.dumps(note, ensure_ascii=False) + "\n")
+        try:
+            run = {"num_notes": size, "corpus_bytes": corpus_bytes}
+            for mode in MODES:
+                run[mode] = run_once(mode, f.name, args.max_tokens)
+        finally:
+            os.unlink(f.name)
+        runs.append(run)
+        print(
+            f"{size:>8} {corpus_bytes / 2**20:>11.1f}"
+            + "".join(f"{run[mode]['growth_kb'] / 1024:>18.1f}" for mode in MODES)
+        )
+
+    write_results(
+        args.output,
+        {
+            "benchmark": "spill",
+            "environment": environment_info(),
+            "parameters": {k: v for k, v in vars(args).items() if k not in ("child", "corpus", "workdir")},
+            "runs": runs,
+        },
+    )
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
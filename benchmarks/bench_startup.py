@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Measure startup with the LLM client created serially or in the background.
+
+Each run is a fresh interpreter, so SDK import costs are included. A local
+server plays both HackMD and the Anthropic API, with per-request latency and
+a connection setup delay standing in for DNS and TLS. The real HackMD and
+Claude clients are used; only their base URLs point at the local server.
+
+``serial`` is the previous startup order: the SDK is imported and its client
+built before the first HackMD request, and the LLM connection is opened by
+the first token count. ``overlapped`` uses ``DeferredLLMClient``, which
+imports, builds and pre-warms the client while the notes are listed and
+fetched.
+
+Usage:
+    python -m benchmarks.bench_startup --notes 20 --api-latency 0.15 --connect-latency 0.1
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.harness import environment_info, write_results
+
+FOLDER_NAME = "Benchmark Weekly Report"
+MODES = ("serial", "overlapped")
+EVENTS = ("imports", "first_request", "first_byte", "llm_ready", "done")
+
+
+def make_server(notes: List[Dict[str, Any]], api_latency: float, llm_latency: float, connect_latency: float):
+    """
+    Create a local server answering HackMD and Anthropic token counting requests.
+
+    Args:
+        notes (List[Dict[str, Any]]): Corpus served under ``/hackmd``
+        api_latency (float): Seconds added to every HackMD response
+        llm_latency (float): Seconds added to every LLM response
+        connect_latency (float): Seconds added once per new connection
+
+    Returns:
+        ThreadingHTTPServer: Server, not yet started
+    """
+    listing = json.dumps([{k: v for k, v in note.items() if k != "content"} for note in notes]).encode("utf-8")
+    bodies = {note["id"]: json.dumps(note).encode("utf-8") for note in notes}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            time.sleep(connect_latency)
+            super().setup()
+
+        def _send(self, status: int, body: bytes = b"") -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def do_GET(self):
+            time.sleep(api_latency)
+            if self.path == "/hackmd/notes":
+                self._send(200, listing)
+            elif self.path.startswith("/hackmd/notes/") and self.path[14:] in bodies:
+                self._send(200, bodies[self.path[14:]])
+            else:
+                self._send(404)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(llm_latency)
+            if self.path == "/v1/messages/count_tokens":
+                self._send(200, json.dumps({"input_tokens": len(body) // 4}).encode("utf-8"))
+            else:
+                self._send(404)
+
+        def do_HEAD(self):
+            self._send(404)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+
+
+def run_child(mode: str, url: str, workers: int) -> None:
+    """
+    Run the startup steps in this process and print the event times as JSON.
+
+    Times are seconds since ``BENCH_T0``, the wall clock time the parent
+    started this process.
+
+    Args:
+        mode (str): "serial" or "overlapped"
+        url (str): Base URL of the local server
+        workers (int): Concurrent fetches
+    """
+    t0 = float(os.environ["BENCH_T0"])
+    events: Dict[str, float] = {}
+
+    def mark(event: str) -> None:
+        events[event] = time.time() - t0
+
+    os.environ["ANTHROPIC_BASE_URL"] = url
+    from clients.hackmd_client import HackMDClient
+    from clients.llm import DeferredLLMClient, create_llm_client
+    from models import Note
+    from pipeline import stream_notes
+
+    mark("imports")
+
+    def factory():
+        return create_llm_client(provider="claude", api_key="bench", model="claude-bench")
+
+    if mode == "serial":
+        llm = factory()
+    else:
+        llm = DeferredLLMClient(factory, provider="claude", model="claude-bench")
+    hackmd = HackMDClient(api_token="bench", api_url=f"{url}/hackmd")
+
+    mark("first_request")
+    listing = hackmd.get_notes()
+    mark("first_byte")
+    notes = hackmd.filter_notes_by_folder_and_date(listing, FOLDER_NAME, "2000-01-01", "2100-01-01")
+
+    def count(text: str) -> int:
+        tokens = llm.count_tokens(text)
+        if "llm_ready" not in events:
+            mark("llm_ready")
+        return tokens
+
+    for result in stream_notes(
+        notes=notes,
+        fetch=lambda note_id: Note.from_api(hackmd.get_note_content(note_id)),
+        count=count,
+        workers=workers,
+    ):
+        if result.error is not None:
+            raise result.error
+    mark("done")
+    print(json.dumps(events))
+
+
+def run_once(mode: str, url: str, workers: int) -> Dict[str, float]:
+    env = dict(os.environ, BENCH_T0=repr(time.time()))
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode, "--url", url,
+         "--workers", str(workers)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    """
+    Compare the serial and overlapped startup orders.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark startup of a report run")
+    parser.add_argument("--notes", type=int, default=20, help="Number of notes")
+    parser.add_argument("--api-latency", type=float, default=0.15)
+    parser.add_argument("--llm-latency", type=float, default=0.1)
+    parser.add_argument("--connect-latency", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join("benchmarks", "results", "startup.json"),
+        help="Where to write the JSON results",
+    )
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.url, args.workers)
+        return
+
+    corpus = generate_corpus(args.notes, folder_name=FOLDER_NAME, folder_ratio=1.0)
+    server = make_server(corpus, args.api_latency, args.llm_latency, args.connect_latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    runs: Dict[str, List[Dict[str, float]]] = {mode: [] for mode in MODES}
+    try:
+        for _ in range(args.repeats):
+            # Alternate the modes so both see the same system noise
+            for mode in MODES:
+                runs[mode].append(run_once(mode, url, args.workers))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    medians = {
+        mode: {event: statistics.median(run[event] for run in runs[mode]) for event in EVENTS}
+        for mode in MODES
+    }
+    print(f"{'median seconds':<12}" + "".join(f"{event:>14}" for event in EVENTS))
+    for mode in MODES:
+        print(f"{mode:<12}" + "".join(f"{medians[mode][event]:>14.3f}" for event in EVENTS))
+
+    write_results(
+        args.output,
+        {
+            "benchmark": "startup",
+            "environment": environment_info(),
+            "parameters": {k: v for k, v in vars(args).items() if k not in ("child", "url")},
+            "medians": medians,
+            "runs": runs,
+        },
+    )
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
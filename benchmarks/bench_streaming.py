@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compare the phased fetch-then-count loop with the streaming pipeline.
+
+Both variants run against fakes with simulated HackMD and token counting
+latency, and produce the same prompt.
+
+Usage:
+    python -m benchmarks.bench_streaming --notes 200 --api-latency 0.02 --llm-latency 0.01
+"""
+
+import argparse
+import os
+from typing import Dict, Any
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeHackMDClient, FakeLLMClient
+from benchmarks.harness import StageTimer, environment_info, write_results
+from models import Note
+from pipeline import stream_notes
+from utils import build_prompt, iter_prompt_segments
+
+
+def main() -> None:
+    """
+    Time the phased and the streaming variants of step 8 to 10.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the streaming pipeline")
+    parser.add_argument("--notes", type=int, default=200, help="Number of notes")
+    parser.add_argument("--api-latency", type=float, default=0.02)
+    parser.add_argument("--llm-latency", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join("benchmarks", "results", "streaming.json"),
+        help="Where to write the JSON results",
+    )
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.notes, folder_ratio=1.0)
+    hackmd = FakeHackMDClient(corpus, latency=args.api_latency)
+    llm = FakeLLMClient(latency=args.llm_latency)
+    listing = [Note.from_api(note) for note in hackmd.get_notes()]
+
+    def fetch(note_id: str) -> Note:
+        return Note.from_api(hackmd.get_note_content(note_id))
+
+    timer = StageTimer()
+
+    with timer.stage("phased"):
+        notes = [fetch(note.id) for note in listing]
+        phased_tokens = sum(llm.count_tokens(note.content) for note in notes)
+        phased_prompt = build_prompt(notes)
+
+    with timer.stage("streaming"):
+        results = stream_notes(
+            notes=listing,
+            fetch=fetch,
+            count=llm.count_tokens,
+            workers=args.workers,
+            queue_size=args.queue_size,
+        )
+        counts = []
+
+        def ready_notes():
+            for result in results:
+                counts.append(result.tokens)
+                yield result.note
+
+        streaming_prompt = "".join(iter_prompt_segments(ready_notes()))
+
+    if streaming_prompt != phased_prompt or sum(counts) != phased_tokens:
+        raise AssertionError("Streaming pipeline produced a different result")
+
+    results_json: Dict[str, Any] = {
+        "benchmark": "streaming",
+        "environment": environment_info(),
+        "parameters": vars(args),
+        "stages": timer.stages,
+    }
+    for name, values in timer.stages.items():
+        print(f"{name:<10} wall {values['wall_s']:.3f}s  cpu {values['cpu_s']:.3f}s")
+
+    write_results(args.output, results_json)
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
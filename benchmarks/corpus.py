@@ -0,0 +1,157 @@
+import random
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+
+# Building blocks for synthetic weekly notes. The mix of Chinese and English
+# lines mirrors the real "DRC Weekly Report" notes the tool is used on.
+TEMPLATE_HEADINGS = [
+    "# 本週工作摘要",
+    "## 完成事項",
+    "## 進行中",
+    "## 下週計畫",
+    "## 問題與風險",
+]
+
+CJK_PHRASES = [
+    "完成資料前處理流程的重構",
+    "與客戶確認需求並更新規格文件",
+    "修正模型推論服務的記憶體洩漏問題",
+    "整理實驗結果並撰寫技術報告",
+    "協助 BU 部署新版本的監控系統",
+    "研究新的向量檢索方法並進行效能評估",
+    "參與院長會議並報告專案進度",
+    "優化 CI/CD 流程，縮短建置時間",
+]
+
+EN_PHRASES = [
+    "Refactored the ingestion service to batch writes",
+    "Reviewed PR #{n} for the scheduler module",
+    "Fixed issue #{n}: timeout when exporting reports",
+    "Benchmarked the new tokenizer against the baseline",
+    "Migrated the dashboard to the new API gateway",
+    "Wrote design doc for the caching layer",
+    "Paired with the data team on the ETL pipeline",
+    "Investigated flaky integration tests in staging",
+]
+
+CODE_SNIPPET = """```python
+def handler(event):
+    items = load_items(event["bucket"])
+    return [transform(item) for item in items]
+```"""
+
+
+def _random_line(rng: random.Random) -> str:
+    """
+    Build a single bullet line mixing CJK and English phrases.
+
+    Args:
+        rng (random.Random): Random generator to draw from
+
+    Returns:
+        str: Markdown bullet line
+    """
+    phrase = rng.choice(CJK_PHRASES) if rng.random() < 0.6 else rng.choice(EN_PHRASES)
+    phrase = phrase.format(n=rng.randint(100, 9999))
+    checkbox = rng.choice(["- [x] ", "- [ ] ", "- "])
+    return f"{checkbox}{phrase}"
+
+
+def generate_note_content(rng: random.Random, target_bytes: int) -> str:
+    """
+    Generate markdown content for one synthetic weekly note.
+
+    Args:
+        rng (random.Random): Random generator to draw from
+        target_bytes (int): Approximate UTF-8 size of the generated content
+
+    Returns:
+        str: Markdown content
+    """
+    lines: List[str] = []
+    size = 0
+    section = 0
+
+    while size < target_bytes:
+        if section < len(TEMPLATE_HEADINGS) and (not lines or rng.random() < 0.25):
+            line = TEMPLATE_HEADINGS[section]
+            section += 1
+        elif rng.random() < 0.03:
+            line = CODE_SNIPPET
+        else:
+            line = _random_line(rng)
+
+        lines.append(line)
+        size += len(line.encode("utf-8")) + 1
+
+    return "\n".join(lines)
+
+
+def generate_corpus(
+    num_notes: int,
+    folder_name: str = "Benchmark Weekly Report",
+    start_date: str = "2024-01-01",
+    seed: int = 42,
+    folder_ratio: float = 0.8,
+) -> List[Dict[str, Any]]:
+    """
+    Generate a synthetic HackMD corpus shaped like the API responses.
+
+    Notes are spread over consecutive weeks starting at ``start_date``. A
+    fraction of them lives in ``folder_name``; the rest sit in other folders
+    so that filtering has real work to do.
+
+    Args:
+        num_notes (int): Number of notes to generate
+        folder_name (str): Folder that most notes belong to
+        start_date (str): Creation date of the first note (YYYY-MM-DD)
+        seed (int): Seed for reproducible corpora
+        folder_ratio (float): Fraction of notes placed in ``folder_name``
+
+    Returns:
+        List[Dict[str, Any]]: Notes with metadata and ``content`` fields
+    """
+    rng = random.Random(seed)
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    notes = []
+
+    for i in range(num_notes):
+        created = start + timedelta(days=(i * 7) // max(1, num_notes // 520 + 1))
+        created_ms = int(created.timestamp() * 1000)
+        in_folder = rng.random() < folder_ratio
+        # Weekly notes are typically between 1 KB and 8 KB
+        target_bytes = int(rng.lognormvariate(7.8, 0.5))
+
+        notes.append(
+            {
+                "id": f"note{i:06d}",
+                "title": f"Weekly Report {created.strftime('%Y-%m-%d')} #{i}",
+                "createdAt": created_ms,
+                "lastChangedAt": created_ms,
+                "tags": ["weekly"],
+                "folderPaths": [
+                    {
+                        "id": f"folder{0 if in_folder else i % 7 + 1}",
+                        "name": folder_name if in_folder else f"Other Folder {i % 7}",
+                    }
+                ],
+                # Fields the HackMD API returns but the report never reads
+                "shortId": f"s{i:06d}",
+                "publishType": "view",
+                "publishedAt": None,
+                "permalink": None,
+                "publishLink": f"https://hackmd.io/@benchmark/note{i:06d}",
+                "readPermission": "owner",
+                "writePermission": "owner",
+                "userPath": "benchmark",
+                "teamPath": None,
+                "lastChangeUser": {
+                    "name": "Benchmark User",
+                    "userPath": "benchmark",
+                    "photo": "https://hackmd.io/images/avatar.png",
+                },
+                "content": generate_note_content(rng, target_bytes),
+            }
+        )
+
+    return notes
@@ -0,0 +1,127 @@
+import re
+import time
+from typing import List, Dict, Any, Optional
+
+from clients.hackmd_client import HackMDClient
+from clients.llm.base import LLMClient
+
+_CJK_PATTERN = re.compile(r"[\u3000-\u9fff\uff00-\uffef]")
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9_]+")
+
+
+class FakeHackMDClient(HackMDClient):
+    """
+    In-memory stand-in for HackMDClient used by the benchmarks.
+
+    Only the network calls are replaced; filtering runs the real implementation.
+
+    Args:
+        corpus (List[Dict[str, Any]]): Notes returned by the fake API
+        latency (float, optional): Simulated seconds per API call. Defaults to 0.
+    """
+
+    def __init__(self, corpus: List[Dict[str, Any]], latency: float = 0.0):
+        super().__init__(api_token="benchmark-token")
+        self.latency = latency
+        self._notes = {note["id"]: note for note in corpus}
+        self._metadata = [
+            {key: value for key, value in note.items() if key != "content"}
+            for note in corpus
+        ]
+
+    def get_notes(self) -> List[Dict[str, Any]]:
+        """
+        Return the metadata listing of the corpus.
+
+        Returns:
+            List[Dict[str, Any]]: List of note metadata
+        """
+        self._sleep()
+        return [dict(note) for note in self._metadata]
+
+    def get_note_content(self, note_id: str) -> Dict[str, Any]:
+        """
+        Return a copy of a note including its content.
+
+        Args:
+            note_id (str): The ID of the note to retrieve
+
+        Returns:
+            Dict[str, Any]: Full note content
+        """
+        self._sleep()
+        return dict(self._notes[note_id])
+
+    def upload_note(
+        self, title: str, content: str, tags: Optional[List[str]] = None
+    ) -> str:
+        """
+        Pretend to upload a note.
+
+        Args:
+            title (str): Title of the note
+            content (str): Content of the note
+            tags (Optional[List[str]]): List of tags for the note
+
+        Returns:
+            str: Fake URL of the uploaded note
+        """
+        self._sleep()
+        return "https://hackmd.io/benchmark"
+
+    def _sleep(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class FakeLLMClient(LLMClient):
+    """
+    Offline LLM client used by the benchmarks.
+
+    Token counts are estimated locally (one token per CJK character and about
+    1.3 tokens per English word) so that counting cost scales with content.
+
+    Args:
+        latency (float, optional): Simulated seconds per count call. Defaults to 0.
+        generate_latency (float, optional): Simulated seconds for generation. Defaults to 0.
+    """
+
+    def __init__(self, latency: float = 0.0, generate_latency: float = 0.0):
+        self.latency = latency
+        self.generate_latency = generate_latency
+
+    def generate(self, prompt: str) -> str:
+        """
+        Return a canned report sized like a real one.
+
+        Args:
+            prompt (str): The input prompt for text generation
+
+        Returns:
+            str: Generated text
+        """
+        if self.generate_latency:
+            time.sleep(self.generate_latency)
+        return "# 一、年度重點成就摘要\n\n" + "- 完成多項專案\n" * 200
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Estimate tokens locally.
+
+        Args:
+            text (str): Text to count tokens for
+
+        Returns:
+            int: Estimated number of tokens
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        cjk = len(_CJK_PATTERN.findall(text))
+        words = len(_WORD_PATTERN.findall(text))
+        return cjk + int(words * 1.3)
+
+    def get_model_name(self) -> str:
+        return "fake-model"
+
+    def get_provider_name(self) -> str:
+        return "fake"
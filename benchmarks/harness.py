@@ -0,0 +1,161 @@
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional
+
+_CLEAR_REFS = "/proc/self/clear_refs"
+_STATUS = "/proc/self/status"
+
+
+def _reset_peak_rss() -> bool:
+    """
+    Reset the kernel's peak RSS counter (VmHWM) for this process.
+
+    Only supported on Linux. Elsewhere the peak is process-lifetime.
+
+    Returns:
+        bool: True if the counter was reset
+    """
+    try:
+        with open(_CLEAR_REFS, "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kb() -> int:
+    """
+    Read the peak resident set size of this process in KiB.
+
+    Returns:
+        int: Peak RSS in KiB
+    """
+    try:
+        with open(_STATUS) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KiB on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class StageTimer:
+    """
+    Record wall time, CPU time and peak RSS for named pipeline stages.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Measure the enclosed block as one stage.
+
+        Args:
+            name (str): Stage name used as key in the results
+        """
+        per_stage_peak = _reset_peak_rss()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.stages[name] = {
+                "wall_s": round(time.perf_counter() - wall_start, 6),
+                "cpu_s": round(time.process_time() - cpu_start, 6),
+                "peak_rss_kb": _peak_rss_kb(),
+                "peak_rss_scope": "stage" if per_stage_peak else "process",
+            }
+
+
+def environment_info() -> Dict[str, Any]:
+    """
+    Describe the machine and interpreter the benchmark ran on.
+
+    Returns:
+        Dict[str, Any]: Environment metadata
+    """
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: str, results: Dict[str, Any]) -> None:
+    """
+    Write benchmark results as JSON.
+
+    Args:
+        path (str): Output file path
+        results (Dict[str, Any]): Results to write
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    metric: str = "wall_s",
+    threshold: float = 0.2,
+    min_value: float = 0.005,
+) -> List[Dict[str, Any]]:
+    """
+    Find stages that got slower than the baseline by more than ``threshold``.
+
+    Stages faster than ``min_value`` in the baseline are ignored since their
+    timings are dominated by noise.
+
+    Args:
+        baseline (Dict[str, Any]): Previously stored results
+        current (Dict[str, Any]): Results of this run
+        metric (str): Stage metric to compare
+        threshold (float): Allowed relative slowdown (0.2 = 20%)
+        min_value (float): Baseline values below this are not compared
+
+    Returns:
+        List[Dict[str, Any]]: Regressions as dicts with size, stage, baseline and current values
+    """
+    baseline_runs = {run["num_notes"]: run for run in baseline.get("runs", [])}
+    regressions = []
+
+    for run in current.get("runs", []):
+        base_run = baseline_runs.get(run["num_notes"])
+        if base_run is None:
+            continue
+
+        for stage, values in run["stages"].items():
+            base_values: Optional[Dict[str, Any]] = base_run["stages"].get(stage)
+            if not base_values or base_values[metric] < min_value:
+                continue
+
+            ratio = values[metric] / base_values[metric]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    {
+                        "num_notes": run["num_notes"],
+                        "stage": stage,
+                        "baseline": base_values[metric],
+                        "current": values[metric],
+                        "ratio": round(ratio, 3),
+                    }
+                )
+
+    return regressions
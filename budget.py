@@ -0,0 +1,299 @@
+import heapq
+import math
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from dedup import drop_empty_sections
+from models import Note
+from spill import SpilledText
+from utils import estimate_tokens
+
+# Lines that carry reportable facts: finished checklist items, issue/PR
+# references, measurable results and achievement keywords.
+_DONE_ITEM = re.compile(r"^\s*[-*+]\s+\[[xX]\]", re.MULTILINE)
+_REFERENCE = re.compile(r"(?:#\d+|\b(?:PR|MR|issue)\b)", re.IGNORECASE)
+_MEASUREMENT = re.compile(r"\d+(?:\.\d+)?\s*(?:%|倍|ms|秒|x\b|GB|MB|QPS)", re.IGNORECASE)
+_KEYWORD = re.compile(
+    r"完成|上線|部署|發表|專利|論文|客戶|優化|提升|解決|導入|"
+    r"\b(?:release[ds]?|deploy(?:ed)?|launch(?:ed)?|fix(?:ed)?|improv\w*|patent|paper)\b",
+    re.IGNORECASE,
+)
+_SIGNAL_LINE = re.compile(
+    r"^\s*#{1,6}\s|^\s*[-*+]\s+\[[xX]\]|#\d+|\d+(?:\.\d+)?\s*(?:%|倍)|"
+    r"完成|上線|部署|發表|專利|論文|解決|release|deploy|launch|fix|patent|paper",
+    re.IGNORECASE,
+)
+
+# Exact DP is used while notes * budget units stays below this bound
+_DP_CELL_LIMIT = 1_000_000
+_DP_UNITS = 4000
+
+
+@dataclass
+class NoteAllocation:
+    """
+    Budget decision for a single note.
+
+    Attributes:
+        index (int): Position of the note in the input list
+        mode (str): "full", "abstract", "truncated" or "dropped"
+        tokens (int): Tokens the note will use in the prompt
+        full_tokens (int): Tokens of the complete note
+        score (float): Relevance score used for the allocation
+    """
+
+    index: int
+    mode: str
+    tokens: int
+    full_tokens: int
+    score: float
+
+
+def relevance_score(content: str, position: int, total: int, recency_weight: float = 1.0) -> float:
+    """
+    Cheap local relevance score of a note.
+
+    Counts reportable signals (finished items, issue/PR references,
+    measurements, achievement keywords) and boosts more recent notes.
+
+    Args:
+        content (str): Note content
+        position (int): Index of the note in chronological order
+        total (int): Number of notes
+        recency_weight (float, optional): Extra weight of the newest note. Defaults to 1.0.
+
+    Returns:
+        float: Relevance score (higher is more important)
+    """
+    signals = (
+        2.0 * len(_DONE_ITEM.findall(content))
+        + 1.5 * len(_REFERENCE.findall(content))
+        + 1.5 * len(_MEASUREMENT.findall(content))
+        + 1.0 * len(_KEYWORD.findall(content))
+    )
+    recency = 1.0 + recency_weight * (position + 1) / max(total, 1)
+    return (1.0 + signals) * recency
+
+
+def abstract_note(content: str) -> str:
+    """
+    Reduce a note to its headings and high-signal lines.
+
+    Args:
+        content (str): Note content
+
+    Returns:
+        str: Abstracted content
+    """
+    lines = [line for line in content.split("\n") if _SIGNAL_LINE.search(line)]
+    return drop_empty_sections("\n".join(lines)).strip()
+
+
+def truncate_note(content: str, ratio: float) -> str:
+    """
+    Keep roughly the first ``ratio`` of a note's lines.
+
+    Args:
+        content (str): Note content
+        ratio (float): Fraction of lines to keep
+
+    Returns:
+        str: Truncated content with an omission marker
+    """
+    lines = content.split("\n")
+    keep = max(1, int(len(lines) * ratio))
+    if keep >= len(lines):
+        return content
+    return "\n".join(lines[:keep]) + "\n…（以下省略）"
+
+
+def _scaled_tokens(counted: int, base: int, variant: str) -> int:
+    """
+    Scale a counted token total to a shortened variant of the same text.
+
+    Args:
+        counted (int): Tokens counted by the provider for the original text
+        base (int): Local estimate for the original text
+        variant (str): Shortened text
+
+    Returns:
+        int: Estimated provider tokens of ``variant``, rounded up
+    """
+    if not variant:
+        return 0
+    if base == 0:
+        return counted
+    return min(counted, math.ceil(counted * estimate_tokens(variant) / base))
+
+
+def _solve_dp(options: List[List[Tuple[int, float]]], budget: int) -> List[int]:
+    """
+    Solve the multiple-choice knapsack exactly on a discretized budget.
+
+    Costs are rounded up to budget units, so the solution never exceeds the
+    real budget.
+
+    Args:
+        options (List[List[Tuple[int, float]]]): Per note (cost, value) options;
+            option 0 must be (0, 0)
+        budget (int): Token budget
+
+    Returns:
+        List[int]: Chosen option index per note
+    """
+    unit = max(1, math.ceil(budget / _DP_UNITS))
+    capacity = budget // unit
+    best = [0.0] * (capacity + 1)
+    choices = []
+
+    for note_options in options:
+        units = [math.ceil(cost / unit) for cost, _ in note_options]
+        new_best = best[:]
+        choice = bytearray(capacity + 1)
+        for option, ((_, value), cost) in enumerate(zip(note_options, units)):
+            if option == 0 or cost > capacity:
+                continue
+            for b in range(cost, capacity + 1):
+                candidate = best[b - cost] + value
+                if candidate > new_best[b]:
+                    new_best[b] = candidate
+                    choice[b] = option
+        best = new_best
+        choices.append(choice)
+
+    selected = [0] * len(options)
+    b = max(range(capacity + 1), key=best.__getitem__)
+    for i in range(len(options) - 1, -1, -1):
+        option = choices[i][b]
+        selected[i] = option
+        b -= math.ceil(options[i][option][0] / unit)
+    return selected
+
+
+def _solve_greedy(options: List[List[Tuple[int, float]]], budget: int) -> List[int]:
+    """
+    Approximate the multiple-choice knapsack by greedy incremental upgrades.
+
+    Every note starts dropped; upgrades to richer options are applied in
+    order of marginal value per token while they fit.
+
+    Args:
+        options (List[List[Tuple[int, float]]]): Per note (cost, value) options
+            sorted by cost; option 0 must be (0, 0)
+        budget (int): Token budget
+
+    Returns:
+        List[int]: Chosen option index per note
+    """
+    selected = [0] * len(options)
+    remaining = budget
+    heap = []
+
+    def push(i: int, limit: Optional[int] = None) -> None:
+        current_cost, current_value = options[i][selected[i]]
+        best: Optional[Tuple[float, int]] = None
+        for option in range(selected[i] + 1, len(options[i])):
+            cost, value = options[i][option]
+            if value <= current_value or (limit is not None and cost - current_cost > limit):
+                continue
+            density = (value - current_value) / max(cost - current_cost, 1)
+            if best is None or density > best[0]:
+                best = (density, option)
+        if best is not None:
+            heapq.heappush(heap, (-best[0], i, best[1]))
+
+    for i in range(len(options)):
+        push(i)
+
+    while heap:
+        _, i, option = heapq.heappop(heap)
+        delta = options[i][option][0] - options[i][selected[i]][0]
+        if delta > remaining:
+            # Fall back to a smaller upgrade of the same note that still fits
+            push(i, remaining)
+            continue
+        remaining -= delta
+        selected[i] = option
+        push(i)
+
+    return selected
+
+
+def select_notes_within_budget(
+    notes: List[Note],
+    token_counts: List[int],
+    max_tokens: int,
+    recency_weight: float = 1.0,
+) -> Tuple[List[Note], List[NoteAllocation]]:
+    """
+    Fit notes into a token budget by keeping, shortening or dropping them.
+
+    Empty template sections are removed first. Each note can then be kept
+    whole, truncated, reduced to an abstract of its high-signal lines, or
+    dropped; values come from ``relevance_score`` and the best combination
+    within ``max_tokens`` is chosen as a multiple-choice knapsack. Recent and
+    high-signal notes therefore tend to stay whole.
+
+    Notes spilled to a ``ContentStore`` (--spill) are read back one at a
+    time and their variants are spilled as well, so the selection holds a
+    single note's text in memory at once.
+
+    Args:
+        notes (List[Note]): Notes with content, in chronological order
+        token_counts (List[int]): Provider token count of each note
+        max_tokens (int): Token budget for all notes together
+        recency_weight (float, optional): Extra weight of the newest note. Defaults to 1.0.
+
+    Returns:
+        Tuple[List[Note], List[NoteAllocation]]: Selected notes (new records,
+        chronological, dropped notes removed) and one allocation per input note
+    """
+    options: List[List[Tuple[int, float]]] = []
+    variants: List[List[Tuple[str, str]]] = []
+
+    for position, (note, counted) in enumerate(zip(notes, token_counts)):
+        original = str(note.content or "")
+        spill = note.content.store if isinstance(note.content, SpilledText) else None
+        cleaned = drop_empty_sections(original)
+        base = estimate_tokens(original)
+        full_tokens = _scaled_tokens(counted, base, cleaned)
+        score = relevance_score(cleaned, position, len(notes), recency_weight)
+
+        candidates = [
+            ("dropped", "", 0, 0.0),
+            ("abstract", abstract_note(cleaned), None, 0.6),
+            ("truncated", truncate_note(cleaned, 0.5), None, 0.75),
+            ("full", cleaned, full_tokens, 1.0),
+        ]
+        note_options = []
+        note_variants = []
+        for mode, text, tokens, weight in candidates:
+            if tokens is None:
+                tokens = _scaled_tokens(counted, base, text)
+            if mode not in ("dropped", "full") and (not text or tokens >= full_tokens):
+                continue
+            note_options.append((tokens, score * weight))
+            note_variants.append((mode, spill.put(text) if spill is not None and text else text))
+
+        order = sorted(range(len(note_options)), key=lambda k: note_options[k][0])
+        options.append([note_options[k] for k in order])
+        variants.append([note_variants[k] for k in order])
+
+    if len(notes) * min(max_tokens, _DP_UNITS) <= _DP_CELL_LIMIT:
+        selected = _solve_dp(options, max_tokens)
+    else:
+        selected = _solve_greedy(options, max_tokens)
+
+    kept = []
+    allocations = []
+    for i, (note, option) in enumerate(zip(notes, selected)):
+        tokens, value = options[i][option]
+        mode, text = variants[i][option]
+        full_tokens = options[i][-1][0]
+        score = options[i][-1][1]
+        allocations.append(NoteAllocation(i, mode, tokens, full_tokens, score))
+        if mode != "dropped":
+            kept.append(note.with_content(text))
+
+    return kept, allocations
@@ -0,0 +1,246 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, Optional
+
+# Arguments that change what a run produces; everything else (tracing,
+# concurrency, resume itself) may differ between a run and its resume.
+# Arguments that select where notes come from belong here too: a resume
+# must not reuse notes read from another source.
+RUN_ID_ARGUMENTS = (
+    "start_date",
+    "end_date",
+    "folder_name",
+    "store",
+    "from_snapshot",
+    "max_tokens",
+    "llm_provider",
+    "year_tag",
+    "dedupe",
+    "dedupe_window",
+    "dedupe_threshold",
+    "fit_budget",
+    "local_tokens",
+    "keyword",
+    "tag",
+    "local_metrics",
+    "slim",
+    "slim_code_lines",
+    "slim_log_lines",
+)
+
+
+def atomic_write(path: str, data: bytes, durable: bool = True) -> None:
+    """
+    Write a file so that readers see either the old or the new content.
+
+    The data goes to a temporary file in the same directory, is flushed to
+    disk and then renamed over ``path``.
+
+    Args:
+        path (str): Destination path
+        data (bytes): File content
+        durable (bool, optional): Fsync the file and the directory, so the
+            write survives a power loss. Defaults to True.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if not durable:
+        return
+
+    # Persist the rename itself
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def run_id_for(args: argparse.Namespace, model: Optional[str] = None) -> str:
+    """
+    Derive a stable run ID from the arguments that define a report.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        model (Optional[str]): Model name, since token counts depend on it
+
+    Returns:
+        str: Short hexadecimal run ID
+    """
+    key = {name: getattr(args, name, None) for name in RUN_ID_ARGUMENTS}
+    key["model"] = model
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class Checkpoint:
+    """
+    On-disk state of a report run, used to resume after interruptions.
+
+    Layout of the run directory:
+        manifest.json        run arguments
+        filtered_notes.json  note metadata after filtering
+        notes/<id>.json      fetched note bodies
+        tokens/<sha>.json    token counts keyed by content hash
+        prompt.md            the built prompt
+        report.md            generated output
+
+    Every file is written atomically, so a crash never leaves a corrupt
+    checkpoint; at worst the last step is repeated. Note bodies and token
+    counts are a cache written once per note, so they are not fsynced; one
+    lost to a power failure is fetched or counted again.
+
+    Args:
+        root (str): Directory that holds the run directories
+        run_id (str): ID of this run
+    """
+
+    def __init__(self, root: str, run_id: str):
+        self.run_id = run_id
+        self.path = os.path.join(root, run_id)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def reset(self, manifest: Dict[str, Any]) -> None:
+        """
+        Discard any previous state of this run and start a new one.
+
+        Args:
+            manifest (Dict[str, Any]): Run description stored for reference
+        """
+        self.clear()
+        self.save_json("manifest.json", manifest)
+
+    def clear(self) -> None:
+        """
+        Delete the run directory.
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def save_json(self, name: str, data: Any, durable: bool = True) -> None:
+        atomic_write(
+            self._file(name), json.dumps(data, ensure_ascii=False).encode("utf-8"), durable
+        )
+
+    def load_json(self, name: str) -> Optional[Any]:
+        """
+        Load a JSON file of the checkpoint.
+
+        Args:
+            name (str): File name relative to the run directory
+
+        Returns:
+            Optional[Any]: Parsed content, or None if the file does not exist
+        """
+        try:
+            with open(self._file(name), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _load_cached(self, name: str) -> Optional[Any]:
+        # Cache files are not fsynced and may be empty after a power failure
+        try:
+            return self.load_json(name)
+        except ValueError:
+            return None
+
+    def save_text(self, name: str, text: str) -> None:
+        atomic_write(self._file(name), text.encode("utf-8"))
+
+    def load_text(self, name: str) -> Optional[str]:
+        """
+        Load a text file of the checkpoint.
+
+        Args:
+            name (str): File name relative to the run directory
+
+        Returns:
+            Optional[str]: File content, or None if the file does not exist
+        """
+        try:
+            with open(self._file(name), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def cached_fetch(
+        self, fetch: Callable[[str], Dict[str, Any]]
+    ) -> Callable[[str], Dict[str, Any]]:
+        """
+        Wrap a note fetch function with the checkpoint's note cache.
+
+        Args:
+            fetch (Callable[[str], Dict[str, Any]]): Fetches a full note by ID
+
+        Returns:
+            Callable[[str], Dict[str, Any]]: Fetch function that reuses saved notes
+        """
+
+        def fetch_note(note_id: str) -> Dict[str, Any]:
+            name = os.path.join("notes", f"{_safe_name(note_id)}.json")
+            note = self._load_cached(name)
+            if note is None:
+                note = fetch(note_id)
+                self.save_json(name, note, durable=False)
+            return note
+
+        return fetch_note
+
+    def cached_count(self, count: Callable[[str], int]) -> Callable[[str], int]:
+        """
+        Wrap a token counting function with the checkpoint's count cache.
+
+        Args:
+            count (Callable[[str], int]): Counts tokens of a text
+
+        Returns:
+            Callable[[str], int]: Count function that reuses saved counts
+        """
+
+        def count_tokens(text: str) -> int:
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            name = os.path.join("tokens", f"{digest}.json")
+            tokens = self._load_cached(name)
+            if tokens is None:
+                tokens = count(text)
+                self.save_json(name, tokens, durable=False)
+            return tokens
+
+        return count_tokens
+
+
+def _safe_name(note_id: str) -> str:
+    """
+    Make a note ID safe to use as a file name.
+
+    Args:
+        note_id (str): HackMD note ID
+
+    Returns:
+        str: File name stem
+    """
+    if note_id.replace("-", "").replace("_", "").isalnum():
+        return note_id
+    return hashlib.sha256(note_id.encode("utf-8")).hexdigest()
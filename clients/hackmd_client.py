@@ -1,9 +1,68 @@
 import requests
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Union
 from datetime import datetime
 import time
 
+from deadline import get_deadline
+from models import Note
+from tracing import get_tracer
+
+
+class HackMDAPIError(Exception):
+    """
+    Raised when a HackMD API request fails.
+
+    Args:
+        message (str): Error message
+        status_code (Optional[int], optional): HTTP status, None if no response arrived
+        retry_after (Optional[float], optional): Seconds the server asked to wait
+        timeout (bool, optional): Whether the request timed out
+    """
+
+    # Statuses of a throttling or overloaded server
+    OVERLOAD_STATUS = (429, 502, 503, 504)
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        timeout: bool = False,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.timeout = timeout
+
+    @property
+    def overloaded(self) -> bool:
+        """
+        Whether the request failed because HackMD is throttling or overloaded.
+
+        Returns:
+            bool: True for timeouts and throttling statuses
+        """
+        return self.timeout or self.status_code in self.OVERLOAD_STATUS
+
+
+def _retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    """
+    Read the Retry-After header of a response, in seconds.
+
+    Args:
+        response (Optional[requests.Response]): Response, if any
+
+    Returns:
+        Optional[float]: Seconds to wait, None if absent or given as a date
+    """
+    if response is None:
+        return None
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
 
 class HackMDClient:
     """
@@ -12,20 +71,83 @@ class HackMDClient:
     Args:
         api_token (str): HackMD API token
         api_url (str, optional): HackMD API base URL. Defaults to "https://api.hackmd.io/v1".
+        listing_ttl (float, optional): Seconds to reuse the note listing. Defaults to 0 (no caching).
+        pool_size (int, optional): Maximum pooled keep-alive connections. Defaults to 16.
+        timeout (float, optional): Seconds to wait for a response. Defaults to 30.
     """
 
-    def __init__(self, api_token: str, api_url: str = "https://api.hackmd.io/v1"):
+    def __init__(
+        self,
+        api_token: str,
+        api_url: str = "https://api.hackmd.io/v1",
+        listing_ttl: float = 0,
+        pool_size: int = 16,
+        timeout: float = 30,
+    ):
         self.api_token = api_token
         self.api_url = api_url.rstrip("/")
         self.headers = {
             "Authorization": f"Bearer {self.api_token}",
             "Content-Type": "application/json",
         }
+        self.listing_ttl = listing_ttl
+        self.timeout = timeout
+        self._listing: Optional[List[Dict[str, Any]]] = None
+        self._listing_time = 0.0
+
+        # A session keeps connections alive across requests
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Send an HTTP request to the HackMD API and record it in the tracer.
+
+        The request times out after ``timeout`` seconds, or earlier when the
+        current stage of a --deadline run has less time left.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            **kwargs: Extra arguments passed to ``requests.request``
+
+        Returns:
+            requests.Response: The raw response
+
+        Raises:
+            DeadlineExceeded: If the stage budget is used up
+        """
+        kwargs.setdefault("timeout", get_deadline().timeout(self.timeout))
+        tracer = get_tracer()
+        with tracer.span("hackmd.request", method=method, url=url) as span:
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=self.headers, **kwargs)
+            except requests.exceptions.Timeout:
+                # A timeout at the end of the stage budget is the deadline
+                get_deadline().check()
+                raise
+            latency_ms = (time.perf_counter() - start) * 1000
+
+            span.set_attributes(
+                status_code=response.status_code, bytes=len(response.content)
+            )
+            tracer.add("hackmd.requests")
+            tracer.add("hackmd.bytes", len(response.content))
+            tracer.record("hackmd.latency_ms", latency_ms)
+            return response
 
     def get_notes(self) -> List[Dict[str, Any]]:
         """
         Get all notes from HackMD.
 
+        The listing is served from memory while it is younger than
+        ``listing_ttl`` seconds.
+
         Returns:
             List[Dict[str, Any]]: List of note metadata
 
@@ -34,10 +156,21 @@ class HackMDClient:
         """
         url = f"{self.api_url}/notes"
 
+        if (
+            self._listing is not None
+            and time.monotonic() - self._listing_time < self.listing_ttl
+        ):
+            return [dict(note) for note in self._listing]
+
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self._request("GET", url)
             response.raise_for_status()
-            return response.json()
+            notes = response.json()
+            if self.listing_ttl:
+                self._listing = notes
+                self._listing_time = time.monotonic()
+                return [dict(note) for note in notes]
+            return notes
         except requests.exceptions.RequestException as e:
             raise Exception(f"Failed to get notes from HackMD: {str(e)}")
 
@@ -52,12 +185,13 @@ class HackMDClient:
             Dict[str, Any]: Full note content
 
         Raises:
-            Exception: If API call fails or content is empty
+            HackMDAPIError: If API call fails
+            Exception: If content is empty
         """
         url = f"{self.api_url}/notes/{note_id}"
 
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self._request("GET", url)
             response.raise_for_status()
             note_data = response.json()
 
@@ -69,8 +203,12 @@ class HackMDClient:
 
             return note_data
         except requests.exceptions.RequestException as e:
-            raise Exception(
-                f"Failed to get note content - [Note ID: {note_id}, Error: {str(e)}]"
+            response = e.response
+            raise HackMDAPIError(
+                f"Failed to get note content - [Note ID: {note_id}, Error: {str(e)}]",
+                status_code=response.status_code if response is not None else None,
+                retry_after=_retry_after(response),
+                timeout=isinstance(e, requests.exceptions.Timeout),
             )
 
     def upload_note(
@@ -98,7 +236,7 @@ class HackMDClient:
             "writePermission": "owner"
         }
         try:
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = self._request("POST", url, json=payload)
             response.raise_for_status()
             note_data = response.json()
             print(note_data)
@@ -106,24 +244,52 @@ class HackMDClient:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Failed to upload note to HackMD: {str(e)}")
 
+    def update_note(self, note_id: str, content: str) -> str:
+        """
+        Replace the content of an existing note on HackMD.
+
+        Args:
+            note_id (str): The ID of the note to update
+            content (str): New content of the note
+
+        Returns:
+            str: URL of the updated note
+
+        Raises:
+            Exception: If API call fails
+        """
+        url = f"{self.api_url}/notes/{note_id}"
+        try:
+            response = self._request("PATCH", url, json={"content": content})
+            response.raise_for_status()
+            return f"https://hackmd.io/{note_id}"
+        except requests.exceptions.RequestException as e:
+            raise Exception(
+                f"Failed to update note on HackMD - [Note ID: {note_id}, Error: {str(e)}]"
+            )
+
     def filter_notes_by_folder_and_date(
         self,
-        notes: List[Dict[str, Any]],
+        notes: Iterable[Union[Dict[str, Any], Note]],
         folder_name: str,
         start_date: str,
         end_date: str,
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Note]:
         """
         Filter notes by folder name and date range.
 
+        Matching notes are converted to compact ``Note`` records, so the raw
+        API listing can be released afterwards.
+
         Args:
-            notes (List[Dict[str, Any]]): List of notes to filter
+            notes (Iterable[Union[Dict[str, Any], Note]]): Notes to filter, as
+                API dicts or Note records
             folder_name (str): Target folder name
             start_date (str): Start date in YYYY-MM-DD format
             end_date (str): End date in YYYY-MM-DD format
 
         Returns:
-            List[Dict[str, Any]]: Filtered list of notes
+            List[Note]: Filtered notes sorted by creation time
 
         Raises:
             ValueError: If no notes found in the specified date range
@@ -135,6 +301,13 @@ class HackMDClient:
         filtered_notes = []
 
         for note in notes:
+            if isinstance(note, Note):
+                if note.in_folder(folder_name) and (
+                    start_timestamp <= note.created_at <= end_timestamp
+                ):
+                    filtered_notes.append(note)
+                continue
+
             # Check if note belongs to target folder
             if not self._note_in_folder(note, folder_name):
                 continue
@@ -142,7 +315,7 @@ class HackMDClient:
             # Check if note createdAt is within date range
             created_at = note.get("createdAt", 0)
             if start_timestamp <= created_at <= end_timestamp:
-                filtered_notes.append(note)
+                filtered_notes.append(Note.from_api(note))
 
         if not filtered_notes:
             raise ValueError(
@@ -151,7 +324,7 @@ class HackMDClient:
             )
 
         # Sort by createdAt in ascending order
-        filtered_notes.sort(key=lambda x: x.get("createdAt", 0))
+        filtered_notes.sort(key=lambda x: x.created_at)
 
         return filtered_notes
 
@@ -182,10 +355,26 @@ class HackMDClient:
         Raises:
             ValueError: If date format is invalid
         """
-        try:
-            dt = datetime.strptime(date_str, "%Y-%m-%d")
-            return int(dt.timestamp() * 1000)
-        except ValueError as e:
-            raise ValueError(
-                f"Invalid date format: {date_str}. Expected YYYY-MM-DD"
-            ) from e
+        return date_to_timestamp(date_str)
+
+
+def date_to_timestamp(date_str: str) -> int:
+    """
+    Convert date string to Unix timestamp in milliseconds.
+
+    Args:
+        date_str (str): Date string in YYYY-MM-DD format
+
+    Returns:
+        int: Unix timestamp in milliseconds
+
+    Raises:
+        ValueError: If date format is invalid
+    """
+    try:
+        dt = datetime.strptime(date_str, "%Y-%m-%d")
+        return int(dt.timestamp() * 1000)
+    except ValueError as e:
+        raise ValueError(
+            f"Invalid date format: {date_str}. Expected YYYY-MM-DD"
+        ) from e
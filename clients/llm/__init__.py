@@ -1,8 +1,24 @@
 # LLM clients package initialization
+#
+# Provider modules import their SDK, which takes up to seconds, so they are
+# only imported once a client of that provider is created (or the class is
+# accessed as an attribute of this package).
+import importlib
+
 from .base import LLMClient
-from .openai_client import OpenAIClient
-from .gemini_client import GeminiClient
-from .claude_client import ClaudeClient
+from .deferred import DeferredLLMClient
+
+_PROVIDER_MODULES = {
+    "OpenAIClient": ".openai_client",
+    "GeminiClient": ".gemini_client",
+    "ClaudeClient": ".claude_client",
+}
+
+
+def __getattr__(name: str):
+    if name in _PROVIDER_MODULES:
+        return getattr(importlib.import_module(_PROVIDER_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def create_llm_client(provider: str, api_key: str, model: str) -> LLMClient:
@@ -21,10 +37,16 @@ def create_llm_client(provider: str, api_key: str, model: str) -> LLMClient:
         ValueError: If provider is not supported
     """
     if provider == "openai":
+        from .openai_client import OpenAIClient
+
         return OpenAIClient(api_key, model)
     elif provider == "gemini":
+        from .gemini_client import GeminiClient
+
         return GeminiClient(api_key, model)
     elif provider == "claude":
+        from .claude_client import ClaudeClient
+
         return ClaudeClient(api_key, model)
     else:
         raise ValueError(f"Unsupported LLM provider: {provider}")
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Iterator, Optional
 
 
 class LLMClient(ABC):
@@ -25,6 +25,60 @@ class LLMClient(ABC):
         """
         pass
 
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Generate text for a prompt, yielding it in pieces as it arrives.
+
+        Clients that support streaming override this; by default the whole
+        text of ``generate`` is yielded at once.
+
+        Args:
+            prompt (str): The input prompt for text generation
+
+        Yields:
+            str: Consecutive pieces of the generated text
+
+        Raises:
+            Exception: If generation fails
+        """
+        yield self.generate(prompt)
+
+    def generate_with_context(self, context: str, instruction: str) -> str:
+        """
+        Generate text for an instruction over a context shared by several calls.
+
+        The context is sent first, so providers that cache prompt prefixes
+        can reuse it between calls. Clients with explicit cache control
+        override this.
+
+        Args:
+            context (str): Shared leading part of the prompt
+            instruction (str): Call-specific trailing part of the prompt
+
+        Returns:
+            str: Generated text
+
+        Raises:
+            Exception: If generation fails
+        """
+        return self.generate(context + instruction)
+
+    def prime_context_cache(self, context: str) -> None:
+        """
+        Write a shared context into the provider's prompt cache ahead of
+        concurrent ``generate_with_context`` calls. Does nothing by default.
+
+        Args:
+            context (str): Shared leading part of the prompt
+        """
+
+    def prewarm(self) -> None:
+        """
+        Open a connection to the provider ahead of the first API call, so DNS
+        lookup and TCP and TLS setup are not paid by that call. Does nothing
+        by default.
+        """
+
     @abstractmethod
     def count_tokens(self, text: str) -> int:
         """
@@ -1,6 +1,11 @@
 import os
-from typing import Optional
+from typing import Iterator, Optional
 import anthropic
+from telemetry import record_call
+from deadline import get_deadline
+from tracing import get_tracer
+from transport import get_http_client, get_transport_config, prewarm
+from utils import estimate_tokens
 from .base import LLMClient
 
 
@@ -16,7 +21,21 @@ class ClaudeClient(LLMClient):
     def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
-        self.client = anthropic.Anthropic(api_key=api_key)
+        transport = get_transport_config()
+        self.client = anthropic.Anthropic(
+            api_key=api_key,
+            http_client=get_http_client(),
+            max_retries=transport.max_retries,
+            timeout=transport.timeout,
+        )
+
+    def _api(self) -> anthropic.Anthropic:
+        # Under --deadline a request gets the rest of the stage budget and is
+        # not retried, since a retry could not finish in time
+        timeout = get_deadline().timeout()
+        if timeout is None:
+            return self.client
+        return self.client.with_options(timeout=timeout, max_retries=0)
 
     def generate(self, prompt: str) -> str:
         """
@@ -31,16 +50,126 @@ class ClaudeClient(LLMClient):
         Raises:
             Exception: If generation fails
         """
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1024*16,
-            )
+        return "".join(self.stream(prompt)).strip()
 
-            return response.content[0].text.strip()
-        except anthropic.AnthropicError as e:
-            raise Exception(f"Claude API call failed: {str(e)}")
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Stream text from the Anthropic Claude API as it is generated.
+
+        Args:
+            prompt (str): The input prompt for text generation
+
+        Yields:
+            str: Consecutive pieces of the generated text
+
+        Raises:
+            Exception: If generation fails
+        """
+        with get_tracer().span(
+            "llm.generate", provider="claude", model=self.model, prompt_chars=len(prompt)
+        ) as span, record_call("claude", self.model, "generate") as call:
+            try:
+                with self._api().messages.stream(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=1024*16,
+                ) as stream:
+                    for text in stream.text_stream:
+                        get_deadline().check()
+                        call.first_token()
+                        yield text
+                    usage = stream.get_final_message().usage
+
+                call.set_usage(usage.input_tokens, usage.output_tokens)
+                span.set_attributes(
+                    input_tokens=usage.input_tokens,
+                    output_tokens=usage.output_tokens,
+                )
+                if call.ttft_ms is not None:
+                    span.set_attribute("ttft_ms", call.ttft_ms)
+            except anthropic.AnthropicError as e:
+                get_deadline().check()
+                raise Exception(f"Claude API call failed: {str(e)}")
+
+    def generate_with_context(self, context: str, instruction: str) -> str:
+        """
+        Generate text with the shared context marked for prompt caching.
+
+        Args:
+            context (str): Shared leading part of the prompt
+            instruction (str): Call-specific trailing part of the prompt
+
+        Returns:
+            str: Generated text
+
+        Raises:
+            Exception: If generation fails
+        """
+        with get_tracer().span(
+            "llm.generate",
+            provider="claude",
+            model=self.model,
+            prompt_chars=len(context) + len(instruction),
+        ) as span, record_call("claude", self.model, "generate") as call:
+            try:
+                response = self._api().messages.create(
+                    model=self.model,
+                    messages=[self._context_message(context, instruction)],
+                    max_tokens=1024*16,
+                )
+
+                call.set_usage(response.usage.input_tokens, response.usage.output_tokens)
+                span.set_attributes(
+                    input_tokens=response.usage.input_tokens,
+                    output_tokens=response.usage.output_tokens,
+                    cache_read_tokens=response.usage.cache_read_input_tokens or 0,
+                    cache_write_tokens=response.usage.cache_creation_input_tokens or 0,
+                )
+                return response.content[0].text.strip()
+            except anthropic.AnthropicError as e:
+                get_deadline().check()
+                raise Exception(f"Claude API call failed: {str(e)}")
+
+    def prime_context_cache(self, context: str) -> None:
+        """
+        Write the shared context into the prompt cache with a one-token request.
+
+        A cache entry only becomes readable once a request that wrote it has
+        started responding, so concurrent calls sent before that would all
+        pay for the full context.
+
+        Args:
+            context (str): Shared leading part of the prompt
+        """
+        with get_tracer().span(
+            "llm.prime_cache", provider="claude", model=self.model, prompt_chars=len(context)
+        ) as span:
+            try:
+                response = self._api().messages.create(
+                    model=self.model,
+                    messages=[self._context_message(context, "")],
+                    max_tokens=1,
+                )
+                span.set_attribute(
+                    "cache_write_tokens", response.usage.cache_creation_input_tokens or 0
+                )
+            except anthropic.AnthropicError as e:
+                # Priming is an optimization; the sections still work without it
+                print(f"Warning: Claude prompt cache priming failed: {str(e)}")
+
+    def _context_message(self, context: str, instruction: str) -> dict:
+        content = [
+            {"type": "text", "text": context, "cache_control": {"type": "ephemeral"}}
+        ]
+        if instruction:
+            content.append({"type": "text", "text": instruction})
+        return {"role": "user", "content": content}
+
+    def prewarm(self) -> None:
+        """
+        Open a pooled connection to the Anthropic API.
+        """
+        prewarm(str(self.client.base_url))
 
     def count_tokens(self, text: str) -> int:
         """
@@ -52,20 +181,28 @@ class ClaudeClient(LLMClient):
         Returns:
             int: Number of tokens
         """
-        try:
-            # Use Claude's token counting
-            response = self.client.messages.count_tokens(
-                model=self.model,
-                messages=[{
-                    "role": "user",
-                    "content": text
-                }],
-            )
-            return response.input_tokens
-        except anthropic.AnthropicError as e:
-            # Fallback to simple estimation if API call fails
-            print(f"Warning: Claude token counting failed, using fallback: {str(e)}")
-            return len(text.split())  # Simple word count as fallback
+        with get_tracer().span(
+            "llm.count_tokens", provider="claude", model=self.model, chars=len(text)
+        ) as span, record_call("claude", self.model, "count_tokens") as call:
+            try:
+                # Use Claude's token counting
+                response = self._api().messages.count_tokens(
+                    model=self.model,
+                    messages=[{
+                        "role": "user",
+                        "content": text
+                    }],
+                )
+                span.set_attribute("tokens", response.input_tokens)
+                call.set_usage(response.input_tokens, None)
+                return response.input_tokens
+            except anthropic.AnthropicError as e:
+                # A timeout at the end of the stage budget is the deadline
+                get_deadline().check()
+                # Fallback to a local estimate if API call fails
+                print(f"Warning: Claude token counting failed, using fallback: {str(e)}")
+                span.set_attribute("fallback", True)
+                return estimate_tokens(text)
 
     def get_model_name(self) -> str:
         """
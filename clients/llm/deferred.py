@@ -0,0 +1,94 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Iterator
+
+from tracing import get_tracer
+from .base import LLMClient
+
+
+class DeferredLLMClient(LLMClient):
+    """
+    LLM client that is created and pre-warmed on a background thread.
+
+    Importing a provider SDK and building its client takes up to seconds,
+    and the first API call also pays for DNS lookup and TCP and TLS setup.
+    Both happen in the background while the caller talks to HackMD; the
+    first call that needs the client waits for it, and an error while
+    creating it is raised there.
+
+    Args:
+        factory (Callable[[], LLMClient]): Creates the client
+        provider (str): Provider name, known without waiting for the client
+        model (str): Model name, known without waiting for the client
+        prewarm (bool, optional): Open a connection to the provider once the
+            client exists. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], LLMClient],
+        provider: str,
+        model: str,
+        prewarm: bool = True,
+    ):
+        self.provider = provider
+        self.model = model
+        self._future: "Future[LLMClient]" = Future()
+        # A daemon thread, so a run that fails early does not wait for the import
+        threading.Thread(
+            target=self._create, args=(factory, prewarm), name="llm-init", daemon=True
+        ).start()
+
+    def _create(self, factory: Callable[[], LLMClient], prewarm: bool) -> None:
+        try:
+            with get_tracer().span("llm.init", provider=self.provider, model=self.model):
+                client = factory()
+                if prewarm:
+                    client.prewarm()
+        except BaseException as e:
+            self._future.set_exception(e)
+        else:
+            self._future.set_result(client)
+
+    def client(self) -> LLMClient:
+        """
+        Wait for the client to be created.
+
+        Returns:
+            LLMClient: The created client
+
+        Raises:
+            Exception: If creating the client failed
+        """
+        if not self._future.done():
+            start = time.perf_counter()
+            try:
+                return self._future.result()
+            finally:
+                get_tracer().record("llm.init_wait_ms", (time.perf_counter() - start) * 1000)
+        return self._future.result()
+
+    def generate(self, prompt: str) -> str:
+        return self.client().generate(prompt)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        return self.client().stream(prompt)
+
+    def generate_with_context(self, context: str, instruction: str) -> str:
+        return self.client().generate_with_context(context, instruction)
+
+    def prime_context_cache(self, context: str) -> None:
+        self.client().prime_context_cache(context)
+
+    def prewarm(self) -> None:
+        self.client()
+
+    def count_tokens(self, text: str) -> int:
+        return self.client().count_tokens(text)
+
+    def get_model_name(self) -> str:
+        return self.model
+
+    def get_provider_name(self) -> str:
+        return self.provider
@@ -1,9 +1,16 @@
 import os
-from typing import Optional
+from typing import Iterator, Optional
 from google import genai
 from google.genai import types
+from deadline import DeadlineExceeded, get_deadline
+from telemetry import record_call
+from tracing import get_tracer
+from transport import get_http_client, get_transport_config, prewarm
+from utils import estimate_tokens
 from .base import LLMClient
 
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/"
+
 
 class GeminiClient(LLMClient):
     """
@@ -17,7 +24,26 @@ class GeminiClient(LLMClient):
     def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
-        self.client = genai.Client(api_key=api_key)
+        transport = get_transport_config()
+        self.client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                httpx_client=get_http_client(),
+                timeout=int(transport.read_timeout * 1000),
+                retry_options=types.HttpRetryOptions(attempts=transport.max_retries + 1),
+            ),
+        )
+
+    def _http_options(self) -> Optional[types.HttpOptions]:
+        # Under --deadline a request gets the rest of the stage budget and is
+        # not retried, since a retry could not finish in time
+        timeout = get_deadline().timeout()
+        if timeout is None:
+            return None
+        return types.HttpOptions(
+            timeout=max(1, int(timeout * 1000)),
+            retry_options=types.HttpRetryOptions(attempts=1),
+        )
 
     def generate(self, prompt: str) -> str:
         """
@@ -32,22 +58,63 @@ class GeminiClient(LLMClient):
         Raises:
             Exception: If generation fails
         """
-        try:
-            generate_content_config = types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(
-                    thinking_level="HIGH",
-                ),
-            )
-
-            response = self.client.models.generate_content(
-                model=self.model,
-                config=generate_content_config,
-                contents=prompt
-            )
-
-            return response.text if response.text else ""
-        except Exception as e:
-            raise Exception(f"Gemini API call failed: {str(e)}")
+        return "".join(self.stream(prompt))
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Stream text from the Google Gemini API as it is generated.
+
+        Args:
+            prompt (str): The input prompt for text generation
+
+        Yields:
+            str: Consecutive pieces of the generated text
+
+        Raises:
+            Exception: If generation fails
+        """
+        with get_tracer().span(
+            "llm.generate", provider="gemini", model=self.model, prompt_chars=len(prompt)
+        ) as span, record_call("gemini", self.model, "generate") as call:
+            try:
+                generate_content_config = types.GenerateContentConfig(
+                    thinking_config=types.ThinkingConfig(
+                        thinking_level="HIGH",
+                    ),
+                    http_options=self._http_options(),
+                )
+
+                usage = None
+                for chunk in self.client.models.generate_content_stream(
+                    model=self.model,
+                    config=generate_content_config,
+                    contents=prompt
+                ):
+                    get_deadline().check()
+                    usage = chunk.usage_metadata or usage
+                    if chunk.text:
+                        call.first_token()
+                        yield chunk.text
+
+                if usage is not None:
+                    call.set_usage(usage.prompt_token_count or 0, usage.candidates_token_count or 0)
+                    span.set_attributes(
+                        input_tokens=usage.prompt_token_count or 0,
+                        output_tokens=usage.candidates_token_count or 0,
+                    )
+                if call.ttft_ms is not None:
+                    span.set_attribute("ttft_ms", call.ttft_ms)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                get_deadline().check()
+                raise Exception(f"Gemini API call failed: {str(e)}")
+
+    def prewarm(self) -> None:
+        """
+        Open a pooled connection to the Gemini API.
+        """
+        prewarm(GEMINI_API_URL)
 
     def count_tokens(self, text: str) -> int:
         """
@@ -59,17 +126,29 @@ class GeminiClient(LLMClient):
         Returns:
             int: Number of tokens
         """
-        try:
-            # Use Gemini's token counting
-            token_count = self.client.models.count_tokens(
-                model=self.model,
-                contents=text
-            )
-            return token_count.total_tokens if token_count.total_tokens else 0
-        except Exception as e:
-            # Fallback to simple estimation if API call fails
-            print(f"Warning: Gemini token counting failed, using fallback: {str(e)}")
-            return len(text.split())  # Simple word count as fallback
+        with get_tracer().span(
+            "llm.count_tokens", provider="gemini", model=self.model, chars=len(text)
+        ) as span, record_call("gemini", self.model, "count_tokens") as call:
+            try:
+                # Use Gemini's token counting
+                token_count = self.client.models.count_tokens(
+                    model=self.model,
+                    contents=text,
+                    config=types.CountTokensConfig(http_options=self._http_options()),
+                )
+                tokens = token_count.total_tokens if token_count.total_tokens else 0
+                span.set_attribute("tokens", tokens)
+                call.set_usage(tokens, None)
+                return tokens
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                # A timeout at the end of the stage budget is the deadline
+                get_deadline().check()
+                # Fallback to a local estimate if API call fails
+                print(f"Warning: Gemini token counting failed, using fallback: {str(e)}")
+                span.set_attribute("fallback", True)
+                return estimate_tokens(text)
 
     def get_model_name(self) -> str:
         """
@@ -1,6 +1,12 @@
+import hashlib
 import os
-from typing import Optional
+from typing import Iterator, Optional
 import openai
+from telemetry import record_call
+from deadline import get_deadline
+from tracing import get_tracer
+from transport import get_http_client, get_transport_config, prewarm
+from utils import estimate_tokens
 from .base import LLMClient
 
 
@@ -16,7 +22,21 @@ class OpenAIClient(LLMClient):
     def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
-        self.client = openai.OpenAI(api_key=api_key)
+        transport = get_transport_config()
+        self.client = openai.OpenAI(
+            api_key=api_key,
+            http_client=get_http_client(),
+            max_retries=transport.max_retries,
+            timeout=transport.timeout,
+        )
+
+    def _api(self) -> openai.OpenAI:
+        # Under --deadline a request gets the rest of the stage budget and is
+        # not retried, since a retry could not finish in time
+        timeout = get_deadline().timeout()
+        if timeout is None:
+            return self.client
+        return self.client.with_options(timeout=timeout, max_retries=0)
 
     def generate(self, prompt: str) -> str:
         """
@@ -31,15 +51,102 @@ class OpenAIClient(LLMClient):
         Raises:
             Exception: If generation fails
         """
-        try:
-            response = self.client.responses.create(
-                model=self.model,
-                input=prompt,
-            )
+        return "".join(self.stream(prompt)).strip()
 
-            return response.output[0].content[0].text.strip()
-        except openai.OpenAIError as e:
-            raise Exception(f"OpenAI API call failed: {str(e)}")
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Stream text from the OpenAI Responses API as it is generated.
+
+        Args:
+            prompt (str): The input prompt for text generation
+
+        Yields:
+            str: Consecutive pieces of the generated text
+
+        Raises:
+            Exception: If generation fails
+        """
+        with get_tracer().span(
+            "llm.generate", provider="openai", model=self.model, prompt_chars=len(prompt)
+        ) as span, record_call("openai", self.model, "generate") as call:
+            try:
+                events = self._api().responses.create(
+                    model=self.model,
+                    input=prompt,
+                    stream=True,
+                )
+
+                for event in events:
+                    get_deadline().check()
+                    if event.type == "response.output_text.delta":
+                        call.first_token()
+                        yield event.delta
+                    elif event.type == "response.completed":
+                        usage = getattr(event.response, "usage", None)
+                        if usage is not None:
+                            call.set_usage(usage.input_tokens, usage.output_tokens)
+                            span.set_attributes(
+                                input_tokens=usage.input_tokens,
+                                output_tokens=usage.output_tokens,
+                            )
+                    elif event.type in ("response.failed", "error"):
+                        error = getattr(getattr(event, "response", None), "error", None)
+                        raise Exception(
+                            f"OpenAI API call failed: {error or getattr(event, 'message', event.type)}"
+                        )
+                if call.ttft_ms is not None:
+                    span.set_attribute("ttft_ms", call.ttft_ms)
+            except openai.OpenAIError as e:
+                get_deadline().check()
+                raise Exception(f"OpenAI API call failed: {str(e)}")
+
+    def generate_with_context(self, context: str, instruction: str) -> str:
+        """
+        Generate text, routing calls with the same context to the same prompt cache.
+
+        OpenAI caches prompt prefixes automatically; a ``prompt_cache_key``
+        derived from the context makes concurrent calls land on the same cache.
+
+        Args:
+            context (str): Shared leading part of the prompt
+            instruction (str): Call-specific trailing part of the prompt
+
+        Returns:
+            str: Generated text
+
+        Raises:
+            Exception: If generation fails
+        """
+        prompt = context + instruction
+        with get_tracer().span(
+            "llm.generate", provider="openai", model=self.model, prompt_chars=len(prompt)
+        ) as span, record_call("openai", self.model, "generate") as call:
+            try:
+                response = self._api().responses.create(
+                    model=self.model,
+                    input=prompt,
+                    prompt_cache_key=hashlib.sha256(context.encode("utf-8")).hexdigest()[:32],
+                )
+
+                usage = getattr(response, "usage", None)
+                if usage is not None:
+                    details = getattr(usage, "input_tokens_details", None)
+                    call.set_usage(usage.input_tokens, usage.output_tokens)
+                    span.set_attributes(
+                        input_tokens=usage.input_tokens,
+                        output_tokens=usage.output_tokens,
+                        cache_read_tokens=getattr(details, "cached_tokens", 0) or 0,
+                    )
+                return response.output[0].content[0].text.strip()
+            except openai.OpenAIError as e:
+                get_deadline().check()
+                raise Exception(f"OpenAI API call failed: {str(e)}")
+
+    def prewarm(self) -> None:
+        """
+        Open a pooled connection to the OpenAI API.
+        """
+        prewarm(str(self.client.base_url))
 
     def count_tokens(self, text: str) -> int:
         """
@@ -51,17 +158,25 @@ class OpenAIClient(LLMClient):
         Returns:
             int: Number of tokens
         """
-        try:
-            # Use OpenAI's token counting
-            response = self.client.responses.input_tokens.count(
-                model=self.model,
-                input=text,
-            )
-            return response.input_tokens
-        except openai.OpenAIError as e:
-            # Fallback to simple estimation if API call fails
-            print(f"Warning: OpenAI token counting failed, using fallback: {str(e)}")
-            return len(text.split())  # Simple word count as fallback
+        with get_tracer().span(
+            "llm.count_tokens", provider="openai", model=self.model, chars=len(text)
+        ) as span, record_call("openai", self.model, "count_tokens") as call:
+            try:
+                # Use OpenAI's token counting
+                response = self._api().responses.input_tokens.count(
+                    model=self.model,
+                    input=text,
+                )
+                span.set_attribute("tokens", response.input_tokens)
+                call.set_usage(response.input_tokens, None)
+                return response.input_tokens
+            except openai.OpenAIError as e:
+                # A timeout at the end of the stage budget is the deadline
+                get_deadline().check()
+                # Fallback to a local estimate if API call fails
+                print(f"Warning: OpenAI token counting failed, using fallback: {str(e)}")
+                span.set_attribute("fallback", True)
+                return estimate_tokens(text)
 
     def get_model_name(self) -> str:
         """
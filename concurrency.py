@@ -0,0 +1,206 @@
+import functools
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from tracing import get_tracer
+
+# Healthy latencies needed before latency spikes count as overload
+_LATENCY_SAMPLES = 5
+# Weight of the newest latency in the smoothed latency
+_LATENCY_ALPHA = 0.2
+
+
+def _overload_reason(error: Exception) -> str:
+    status_code = getattr(error, "status_code", None)
+    return f"HTTP {status_code}" if status_code is not None else "timeout"
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit that follows what a server can take (additive increase,
+    multiplicative decrease).
+
+    Calls take a slot before they start and report how they went. After
+    ``limit`` healthy calls in a row while every slot was in use, the limit
+    grows by ``increase``. An overload signal multiplies it by ``decrease``:
+    an error with a true ``overloaded`` attribute (such as a throttled or
+    timed out HackMD request) or a latency above ``latency_factor`` times the
+    smoothed latency. Signals from calls started before the last decrease are
+    ignored, so one burst of throttled calls lowers the limit only once.
+    Other errors do not change the limit but restart the count of healthy
+    calls.
+
+    Every change is kept in ``trajectory`` and recorded in the tracer as
+    ``<name>.concurrency_limit``.
+
+    Args:
+        initial (int): Starting limit
+        min_limit (int, optional): Lowest limit. Defaults to 1.
+        max_limit (int, optional): Highest limit. Defaults to 32.
+        increase (int, optional): Additive step. Defaults to 1.
+        decrease (float, optional): Multiplicative factor on overload. Defaults to 0.5.
+        latency_factor (float, optional): Multiple of the smoothed latency
+            that counts as a spike. Defaults to 3.0.
+        retries (int, optional): Retries of overloaded calls in ``wrap``. Defaults to 3.
+        backoff (float, optional): First retry delay in seconds when the
+            error carries no ``retry_after``; doubles per retry. Defaults to 0.5.
+        name (str, optional): Prefix of the tracer metrics. Defaults to "hackmd".
+        clock (Callable[[], float], optional): Monotonic clock. Defaults to time.monotonic.
+        sleep (Callable[[float], None], optional): Sleep function. Defaults to time.sleep.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase: int = 1,
+        decrease: float = 0.5,
+        latency_factor: float = 3.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        name: str = "hackmd",
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.retries = retries
+        self.backoff = backoff
+        self.name = name
+        self.clock = clock
+        self.sleep = sleep
+        self.backoffs = 0
+        self._start = clock()
+        self.trajectory: List[Tuple[float, int, str]] = [(0.0, self.limit, "start")]
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._epoch = 0
+        self._successes = 0
+        self._saturated = False
+        self._latency: Optional[float] = None
+        self._samples = 0
+
+    def acquire(self) -> int:
+        """
+        Wait for a free slot and take it.
+
+        Returns:
+            int: Token to pass to ``release``
+        """
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+            if self._in_flight >= self.limit:
+                self._saturated = True
+            return self._epoch
+
+    def release(self, token: int, latency: Optional[float] = None, error: Optional[Exception] = None) -> None:
+        """
+        Return a slot and adjust the limit to how the call went.
+
+        Args:
+            token (int): Token returned by ``acquire``
+            latency (Optional[float]): Seconds the call took, if it succeeded
+            error (Optional[Exception]): Error the call raised, if any
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if error is not None:
+                if getattr(error, "overloaded", False):
+                    self._back_off(token, _overload_reason(error))
+                else:
+                    self._successes = 0
+            elif (
+                latency is not None
+                and self._samples >= _LATENCY_SAMPLES
+                and latency > self.latency_factor * self._latency
+            ):
+                self._back_off(token, f"latency {latency * 1000:.0f} ms")
+            else:
+                if latency is not None:
+                    self._samples += 1
+                    self._latency = (
+                        latency
+                        if self._latency is None
+                        else self._latency + _LATENCY_ALPHA * (latency - self._latency)
+                    )
+                self._successes += 1
+                if self._successes >= self.limit and self._saturated and self.limit < self.max_limit:
+                    self._change(min(self.limit + self.increase, self.max_limit), "increase")
+            self._cond.notify_all()
+
+    def _back_off(self, token: int, reason: str) -> None:
+        # Calls started before the last decrease saw the old limit
+        if token != self._epoch:
+            return
+        self.backoffs += 1
+        get_tracer().add(f"{self.name}.concurrency_backoffs")
+        self._change(max(self.min_limit, int(self.limit * self.decrease)), reason)
+        self._epoch += 1
+
+    def _change(self, limit: int, reason: str) -> None:
+        self.limit = limit
+        self._successes = 0
+        self._saturated = False
+        self.trajectory.append((round(self.clock() - self._start, 3), limit, reason))
+        get_tracer().record(f"{self.name}.concurrency_limit", limit)
+
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Run calls of ``func`` within the limit, retrying overloaded ones.
+
+        Overloaded calls are retried up to ``retries`` times after the
+        error's ``retry_after`` seconds, or an exponential backoff.
+
+        Args:
+            func (Callable[..., Any]): Function making one request
+
+        Returns:
+            Callable[..., Any]: Limited function
+        """
+
+        @functools.wraps(func)
+        def call(*args: Any, **kwargs: Any) -> Any:
+            for attempt in range(self.retries + 1):
+                token = self.acquire()
+                start = self.clock()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    self.release(token, error=e)
+                    if not getattr(e, "overloaded", False) or attempt == self.retries:
+                        raise
+                    self.sleep(getattr(e, "retry_after", None) or self.backoff * 2 ** attempt)
+                else:
+                    self.release(token, latency=self.clock() - start)
+                    return result
+
+        return call
+
+    def summary(self) -> str:
+        """
+        Describe how the limit moved, e.g. for the run log.
+
+        Runs of increases are shown by the limit they reached.
+
+        Returns:
+            str: Limits in order, with the reason of every decrease
+        """
+        steps = [str(self.trajectory[0][1])]
+        changes = self.trajectory[1:]
+        for i, (_, limit, reason) in enumerate(changes):
+            if reason != "increase":
+                steps.append(f"{limit} ({reason})")
+            elif i + 1 == len(changes) or changes[i + 1][2] != "increase":
+                steps.append(str(limit))
+        return (
+            f"{' → '.join(steps)}; peak {max(limit for _, limit, _ in self.trajectory)}, "
+            f"{self.backoffs} backoffs"
+        )
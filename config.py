@@ -1,14 +1,38 @@
 import argparse
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
+# Project root directory (where config.py is located)
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 
-def parse_arguments() -> argparse.Namespace:
+# Environment variable that moves the default data directories elsewhere
+HOME_ENV = "REPORT_GENERATOR_HOME"
+
+LLM_PROVIDERS = ("openai", "gemini", "claude")
+
+
+def data_path(name: str) -> str:
     """
-    Parse command line arguments for the report generator.
+    Default location of run data (checkpoints, outbox, profiles, telemetry).
+
+    Run data lives in the project root unless ``REPORT_GENERATOR_HOME`` points
+    elsewhere.
+
+    Args:
+        name (str): File or directory name
 
     Returns:
-        argparse.Namespace: Parsed arguments
+        str: Path of ``name`` in the data directory
+    """
+    return os.path.join(os.getenv(HOME_ENV) or PROJECT_ROOT, name)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser for the report generator.
+
+    Returns:
+        argparse.ArgumentParser: Parser with all report arguments
     """
     parser = argparse.ArgumentParser(
         description="Generate annual performance report from HackMD weekly notes"
@@ -34,14 +58,305 @@ def parse_arguments() -> argparse.Namespace:
         "--llm-provider",
         type=str,
         required=True,
-        choices=["openai", "gemini", "claude"],
-        help="LLM service provider (openai, gemini, claude)",
+        choices=["openai", "gemini", "claude", "auto"],
+        help="LLM service provider (openai, gemini, claude, or auto to pick "
+        "the fastest configured one from recent telemetry)",
     )
     parser.add_argument(
         "--year-tag", type=str, required=True, help="Year tag for HackMD tags"
     )
 
-    return parser.parse_args()
+    # Optional arguments
+    parser.add_argument(
+        "--trace-file",
+        type=str,
+        help="Write spans and metrics of the run to this file",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Sample CPU stacks per stage, writing a flamegraph input and stage "
+        "timings to --profile-dir",
+    )
+    parser.add_argument(
+        "--profile-allocations",
+        action="store_true",
+        help="Also trace allocations per stage with tracemalloc and keep the top "
+        "allocation sites (implies --profile; slows CPU-bound runs severalfold)",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        type=str,
+        default=data_path("profiles"),
+        help="Directory of --profile output, one subdirectory per run (default: ./profiles)",
+    )
+    parser.add_argument(
+        "--trace-format",
+        type=str,
+        default="json",
+        choices=["json", "otlp"],
+        help="Trace file format: JSON run record or OTLP/JSON export (default: json)",
+    )
+    parser.add_argument(
+        "--telemetry-db",
+        type=str,
+        default=data_path("telemetry.db"),
+        help="SQLite file of recorded LLM call telemetry; empty to disable "
+        "(default: ./telemetry.db)",
+    )
+    parser.add_argument(
+        "--max-cost",
+        type=float,
+        help="Highest estimated USD per generation for --llm-provider auto "
+        "(uses {PROVIDER}_INPUT_PRICE and {PROVIDER}_OUTPUT_PRICE)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run with the same arguments from its checkpoint",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        type=str,
+        default=data_path("checkpoints"),
+        help="Directory for run checkpoints (default: ./checkpoints)",
+    )
+    parser.add_argument(
+        "--parallel-sections",
+        action="store_true",
+        help="Generate each report section concurrently over the same notes and stitch them",
+    )
+    parser.add_argument(
+        "--outbox-dir",
+        type=str,
+        default=data_path("outbox"),
+        help="Directory of queued HackMD uploads (default: ./outbox)",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="Seconds the whole run may take; stages get shares of it, and what is "
+        "finished in time is saved (exit status 2 if the report is partial)",
+    )
+    parser.add_argument(
+        "--upload-wait",
+        type=float,
+        default=30,
+        help="Seconds to wait for the upload after the local save; "
+        "unfinished uploads stay queued (default: 30)",
+    )
+    parser.add_argument(
+        "--live-draft",
+        action="store_true",
+        help="Create the report note before generating and update it as the report streams in",
+    )
+    parser.add_argument(
+        "--draft-interval",
+        type=float,
+        default=2.0,
+        help="Minimum seconds between live draft updates (default: 2)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep polling HackMD and update the report note when the notes change",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=60,
+        help="Shortest seconds between polls in watch mode (default: 60)",
+    )
+    parser.add_argument(
+        "--watch-max-interval",
+        type=float,
+        default=900,
+        help="Longest seconds between polls while nothing changes (default: 900)",
+    )
+    parser.add_argument(
+        "--watch-debounce",
+        type=float,
+        default=120,
+        help="Seconds notes must stay unchanged before they are fetched (default: 120)",
+    )
+    parser.add_argument(
+        "--watch-min-delta",
+        type=int,
+        default=200,
+        help="Changed tokens that trigger a regeneration in watch mode (default: 200)",
+    )
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=4,
+        help="Concurrent HackMD fetches and token counting calls (default: 4)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=16,
+        help="Notes buffered between pipeline stages (default: 16)",
+    )
+    parser.add_argument(
+        "--adaptive-fetch",
+        action="store_true",
+        help="Adjust concurrent HackMD fetches to how fast HackMD answers, starting at "
+        "--fetch-workers and backing off when it throttles",
+    )
+    parser.add_argument(
+        "--max-fetch-workers",
+        type=int,
+        default=32,
+        help="Most concurrent HackMD fetches with --adaptive-fetch (default: 32)",
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        help="Select notes from this local SQLite note store instead of the HackMD listing",
+    )
+    parser.add_argument(
+        "--sync-store",
+        action="store_true",
+        help="Refresh the note store from HackMD before selecting notes",
+    )
+    parser.add_argument(
+        "--export-snapshot",
+        type=str,
+        help="Also write the fetched notes and their token counts to this snapshot file",
+    )
+    parser.add_argument(
+        "--from-snapshot",
+        type=str,
+        help="Read the notes from this snapshot file instead of HackMD",
+    )
+    parser.add_argument(
+        "--keyword",
+        type=str,
+        help="Only include notes containing this text (requires --store)",
+    )
+    parser.add_argument(
+        "--tag",
+        type=str,
+        action="append",
+        help="Only include notes with this tag; may be repeated (requires --store)",
+    )
+    parser.add_argument(
+        "--local-tokens",
+        action="store_true",
+        help="Count tokens locally (tiktoken or estimate) instead of calling the provider",
+    )
+    parser.add_argument(
+        "--cpu-workers",
+        type=int,
+        default=0,
+        help="Processes for local token counting, slimming and snapshot digests; "
+        "0 uses threads (default: 0)",
+    )
+    parser.add_argument(
+        "--cpu-chunksize",
+        type=int,
+        default=64,
+        help="Notes sent to a counting process at once (default: 64)",
+    )
+    parser.add_argument(
+        "--slim",
+        action="store_true",
+        help="Strip front matter, images, data URIs and HTML and shorten code and logs",
+    )
+    parser.add_argument(
+        "--slim-code-lines",
+        type=int,
+        default=20,
+        help="Lines kept per code block when slimming (default: 20)",
+    )
+    parser.add_argument(
+        "--slim-log-lines",
+        type=int,
+        default=5,
+        help="Lines kept per log dump when slimming (default: 5)",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Remove repeated template lines and carry-over items across notes",
+    )
+    parser.add_argument(
+        "--dedupe-window",
+        type=int,
+        default=4,
+        help="Number of previous notes compared during deduplication (default: 4)",
+    )
+    parser.add_argument(
+        "--dedupe-threshold",
+        type=float,
+        default=0.8,
+        help="Similarity above which a paragraph is a near-duplicate (default: 0.8)",
+    )
+    parser.add_argument(
+        "--local-metrics",
+        action="store_true",
+        help="Compute the quantitative-metrics section from the notes instead of the LLM",
+    )
+    parser.add_argument(
+        "--spill",
+        action="store_true",
+        help="Keep fetched note bodies in a memory-mapped file on disk instead of in memory",
+    )
+    parser.add_argument(
+        "--spill-dir",
+        type=str,
+        default=None,
+        help="Directory of the --spill file (default: system temporary directory)",
+    )
+    parser.add_argument(
+        "--fit-budget",
+        action="store_true",
+        help="Shorten or drop low-signal notes instead of failing when over --max-tokens",
+    )
+
+    return parser
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command line arguments for the report generator.
+
+    Args:
+        argv (Optional[List[str]]): Arguments to parse. Defaults to sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    return build_parser().parse_args(argv)
+
+
+def params_to_argv(params: Dict[str, Any]) -> List[str]:
+    """
+    Convert report parameters (e.g. from a JSON request) to CLI arguments.
+
+    Keys may use either dashes or underscores (``start_date`` or
+    ``start-date``). Boolean values become flags, and lists repeat the
+    option once per element (e.g. ``"tag": ["a", "b"]``).
+
+    Args:
+        params (Dict[str, Any]): Report parameters
+
+    Returns:
+        List[str]: Equivalent command line arguments
+    """
+    argv = []
+    for key, value in params.items():
+        option = "--" + key.replace("_", "-")
+        if isinstance(value, bool):
+            if value:
+                argv.append(option)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                argv.extend([option, str(item)])
+        elif value is not None:
+            argv.extend([option, str(value)])
+    return argv
 
 
 def validate_env(llm_provider: str) -> None:
@@ -58,6 +373,13 @@ def validate_env(llm_provider: str) -> None:
     if not os.getenv("HACKMD_API_TOKEN"):
         raise ValueError("Error: HACKMD_API_TOKEN is missing in environment variables")
 
+    if llm_provider == "auto":
+        if not configured_providers():
+            raise ValueError(
+                "Error: --llm-provider auto needs the API key and model of at least one provider"
+            )
+        return
+
     # Check LLM provider specific API key
     key_name = f"{llm_provider.upper()}_API_KEY"
     if not os.getenv(key_name):
@@ -86,3 +408,62 @@ def get_env_vars() -> Dict[str, Any]:
         "CLAUDE_API_KEY": os.getenv("CLAUDE_API_KEY"),
         "CLAUDE_MODEL": os.getenv("CLAUDE_MODEL"),
     }
+
+
+def configured_providers() -> Dict[str, str]:
+    """
+    Get the LLM providers whose API key and model are both set.
+
+    Returns:
+        Dict[str, str]: Model of each configured provider, in LLM_PROVIDERS order
+    """
+    return {
+        provider: os.getenv(f"{provider.upper()}_MODEL")
+        for provider in LLM_PROVIDERS
+        if os.getenv(f"{provider.upper()}_API_KEY") and os.getenv(f"{provider.upper()}_MODEL")
+    }
+
+
+def provider_prices() -> Dict[str, Tuple[float, float]]:
+    """
+    Get the configured token prices of the LLM providers.
+
+    Prices are read from ``{PROVIDER}_INPUT_PRICE`` and
+    ``{PROVIDER}_OUTPUT_PRICE`` in USD per million tokens; providers without
+    both are left out.
+
+    Returns:
+        Dict[str, Tuple[float, float]]: Input and output price by provider
+    """
+    prices = {}
+    for provider in LLM_PROVIDERS:
+        input_price = os.getenv(f"{provider.upper()}_INPUT_PRICE")
+        output_price = os.getenv(f"{provider.upper()}_OUTPUT_PRICE")
+        if input_price and output_price:
+            prices[provider] = (float(input_price), float(output_price))
+    return prices
+
+
+def build_stats_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser of the ``stats`` command.
+
+    Returns:
+        argparse.ArgumentParser: Parser of the telemetry statistics options
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py stats", description="Show recorded LLM call statistics"
+    )
+    parser.add_argument(
+        "--telemetry-db",
+        type=str,
+        default=data_path("telemetry.db"),
+        help="SQLite file of recorded LLM call telemetry (default: ./telemetry.db)",
+    )
+    parser.add_argument(
+        "--hours",
+        type=float,
+        default=24,
+        help="Hours of telemetry to summarize (default: 24)",
+    )
+    return parser
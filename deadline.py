@@ -0,0 +1,185 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# Share of the remaining time each stage gets when it starts. Time a stage
+# leaves unused carries over to the stages after it.
+STAGE_SHARES: Tuple[Tuple[str, float], ...] = (
+    ("fetch", 0.35),
+    ("generate", 0.55),
+    ("upload", 0.10),
+)
+
+_deadline: Optional["Deadline"] = None
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a stage of the run has used up its time budget.
+
+    Args:
+        stage (str): Stage whose budget ran out
+    """
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline reached during {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    Run-wide time budget divided across the pipeline stages (--deadline).
+
+    Entering a stage gives it its share of the time still left, relative to
+    the stages that have not run yet. Every HackMD and LLM request made
+    during the stage gets the rest of the stage budget as its timeout. A
+    deadline of None never expires and leaves request timeouts unchanged.
+    Stages that give up part of their work record why in ``partial``.
+
+    Args:
+        seconds (Optional[float]): Budget of the whole run; None for no deadline
+        shares (Tuple[Tuple[str, float], ...], optional): Stages and their
+            shares. Defaults to STAGE_SHARES.
+        clock (Callable[[], float], optional): Monotonic clock. Defaults to time.monotonic.
+    """
+
+    def __init__(
+        self,
+        seconds: Optional[float],
+        shares: Tuple[Tuple[str, float], ...] = STAGE_SHARES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.seconds = seconds
+        self.shares = shares
+        self.clock = clock
+        self.end = None if seconds is None else clock() + seconds
+        self.stage_name = "run"
+        self.stage_end = self.end
+        self.partial: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.end is not None
+
+    def remaining(self) -> Optional[float]:
+        """
+        Seconds left of the whole run.
+
+        Returns:
+            Optional[float]: Seconds left (at least 0), or None without a deadline
+        """
+        if self.end is None:
+            return None
+        return max(0.0, self.end - self.clock())
+
+    def stage_remaining(self) -> Optional[float]:
+        """
+        Seconds left of the current stage.
+
+        Returns:
+            Optional[float]: Seconds left (at least 0), or None without a deadline
+        """
+        if self.stage_end is None:
+            return None
+        return max(0.0, self.stage_end - self.clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.stage_end is not None and self.clock() >= self.stage_end
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator["Deadline"]:
+        """
+        Run a stage within its share of the remaining time.
+
+        Args:
+            name (str): Stage name from ``shares``
+
+        Yields:
+            Deadline: This deadline, with the stage budget applied
+        """
+        with self._lock:
+            previous = self.stage_name
+            self.stage_name = name
+            if self.end is not None:
+                names = [stage for stage, _ in self.shares]
+                later = self.shares[names.index(name):] if name in names else ()
+                total = sum(share for _, share in later)
+                share = dict(self.shares).get(name, 0.0)
+                budget = self.remaining() * (share / total if total else 1.0)
+                self.stage_end = self.clock() + budget
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self.stage_name = previous
+                self.stage_end = self.end
+
+    def mark_partial(self, reason: str) -> None:
+        """
+        Record that the run skipped work to stay within the deadline.
+
+        Args:
+            reason (str): What was skipped
+        """
+        with self._lock:
+            self.partial.append(reason)
+
+    def check(self) -> None:
+        """
+        Raise if the current stage has used up its budget.
+
+        Raises:
+            DeadlineExceeded: If the stage budget is used up
+        """
+        if self.expired:
+            raise DeadlineExceeded(self.stage_name)
+
+    def timeout(self, default: Optional[float] = None) -> Optional[float]:
+        """
+        Timeout for a request made now.
+
+        Args:
+            default (Optional[float]): Timeout without a deadline, and upper bound with one
+
+        Returns:
+            Optional[float]: The default or the rest of the stage budget, whichever is shorter
+
+        Raises:
+            DeadlineExceeded: If the stage budget is used up
+        """
+        remaining = self.stage_remaining()
+        if remaining is None:
+            return default
+        self.check()
+        return remaining if default is None else min(default, remaining)
+
+
+def configure_deadline(seconds: Optional[float]) -> "Deadline":
+    """
+    Start the global run deadline.
+
+    Args:
+        seconds (Optional[float]): Budget of the run; None disables the deadline
+
+    Returns:
+        Deadline: The new deadline
+    """
+    global _deadline
+    _deadline = Deadline(seconds)
+    return _deadline
+
+
+def get_deadline() -> "Deadline":
+    """
+    Get the global run deadline.
+
+    Returns:
+        Deadline: The deadline; one that never expires if none was configured
+    """
+    global _deadline
+    if _deadline is None:
+        _deadline = Deadline(None)
+    return _deadline
@@ -0,0 +1,340 @@
+import heapq
+import re
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Dict, Any, Deque, Optional, Set, Tuple
+
+from models import Note
+from utils import estimate_tokens
+
+_WHITESPACE = re.compile(r"\s+")
+_HEADING = re.compile(r"^(#{1,6})\s")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+# Fences, table separators and horizontal rules are never dropped on their own
+_STRUCTURAL = re.compile(r"^\s*(```|~~~|[|:\s-]*-{3,}[|:\s-]*$|[*_]{3,}\s*$)")
+
+OMITTED_NOTE_PLACEHOLDER = "（本週內容與先前週報重複，已省略）"
+
+
+@dataclass
+class DedupStats:
+    """
+    Summary of what the deduplication stage removed in a run.
+    """
+
+    notes: int = 0
+    lines_removed: int = 0
+    paragraphs_removed: int = 0
+    chars_before: int = 0
+    chars_after: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _normalize(text: str) -> str:
+    """
+    Normalize text for exact-match hashing.
+
+    Args:
+        text (str): Line or paragraph
+
+    Returns:
+        str: Lowercased text with collapsed whitespace
+    """
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def _line_key(line: str) -> int:
+    return zlib.crc32(_normalize(line).encode("utf-8"))
+
+
+def _shingles(text: str, size: int) -> Set[int]:
+    """
+    Hash the character shingles of a text.
+
+    Character shingles work for both CJK and English text without a tokenizer.
+
+    Args:
+        text (str): Text to shingle
+        size (int): Shingle length in characters
+
+    Returns:
+        Set[int]: CRC32 hashes of all shingles
+    """
+    text = _normalize(text)
+    if len(text) <= size:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {
+        zlib.crc32(text[i : i + size].encode("utf-8"))
+        for i in range(len(text) - size + 1)
+    }
+
+
+class MinHasher:
+    """
+    Bottom-k MinHash sketches over character shingles.
+
+    A single hash function is applied to every shingle and the ``k`` smallest
+    values form the signature, which estimates Jaccard similarity like a
+    k-permutation MinHash at a fraction of the cost. Hashes are CRC32 based,
+    so signatures are stable across processes (unlike the built-in ``hash``).
+
+    Args:
+        num_perm (int, optional): Signature size k. Defaults to 64.
+        shingle_size (int, optional): Shingle length in characters. Defaults to 5.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text (str): Text to sign
+
+        Returns:
+            Tuple[int, ...]: The k smallest shingle hashes in ascending order
+        """
+        return tuple(heapq.nsmallest(self.num_perm, _shingles(text, self.shingle_size)))
+
+    def similarity(self, left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+        """
+        Estimate the Jaccard similarity of two signatures.
+
+        Args:
+            left (Tuple[int, ...]): First signature
+            right (Tuple[int, ...]): Second signature
+
+        Returns:
+            float: Estimated similarity between 0 and 1
+        """
+        union = heapq.nsmallest(self.num_perm, set(left).union(right))
+        if not union:
+            return 0.0
+        both = set(left).intersection(right)
+        return sum(1 for h in union if h in both) / len(union)
+
+
+class BoilerplateDeduplicator:
+    """
+    Remove template boilerplate and unchanged carry-over items across notes.
+
+    Notes must be fed in chronological order. For each note, paragraphs that
+    exactly or nearly (MinHash similarity) match a paragraph in one of the
+    previous ``window`` notes are dropped, then individual lines that were
+    already seen in that window are dropped. Headings are kept unless their
+    section ends up empty, so the first occurrence of everything survives and
+    the chronology of the notes is unchanged.
+
+    Args:
+        window (int, optional): Number of previous notes to compare against. Defaults to 4.
+        threshold (float, optional): MinHash similarity above which a paragraph
+            counts as a near-duplicate. Defaults to 0.8.
+        min_paragraph_chars (int, optional): Shorter paragraphs are only
+            compared line by line. Defaults to 40.
+        num_perm (int, optional): MinHash permutations. Defaults to 64.
+        shingle_size (int, optional): Shingle length in characters. Defaults to 5.
+    """
+
+    def __init__(
+        self,
+        window: int = 4,
+        threshold: float = 0.8,
+        min_paragraph_chars: int = 40,
+        num_perm: int = 64,
+        shingle_size: int = 5,
+    ):
+        self.window = window
+        self.threshold = threshold
+        self.min_paragraph_chars = min_paragraph_chars
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.stats = DedupStats()
+        self._recent_lines: Deque[Set[int]] = deque(maxlen=window)
+        self._recent_paragraphs: Deque[Set[int]] = deque(maxlen=window)
+        self._recent_signatures: Deque[List[Tuple[int, ...]]] = deque(maxlen=window)
+
+    def _seen_line(self, key: int) -> bool:
+        return any(key in lines for lines in self._recent_lines)
+
+    def _seen_paragraph(self, key: int, signature: Optional[Tuple[int, ...]]) -> bool:
+        if any(key in paragraphs for paragraphs in self._recent_paragraphs):
+            return True
+        if signature is None:
+            return False
+        return any(
+            self.hasher.similarity(signature, other) >= self.threshold
+            for signatures in self._recent_signatures
+            for other in signatures
+        )
+
+    def dedupe(self, content: str) -> str:
+        """
+        Deduplicate the next note against the previous ones.
+
+        Args:
+            content (str): Markdown content of the note
+
+        Returns:
+            str: Content with repeated boilerplate removed
+        """
+        note_lines: Set[int] = set()
+        note_paragraphs: Set[int] = set()
+        note_signatures: List[Tuple[int, ...]] = []
+        kept_lines: List[str] = []
+
+        for block in _split_blocks(content):
+            body = "\n".join(
+                line for line, in_code in block if in_code or not _HEADING.match(line)
+            )
+
+            if len(_normalize(body)) >= self.min_paragraph_chars:
+                key = _line_key(body)
+                signature = self.hasher.signature(body)
+                duplicate = self._seen_paragraph(key, signature)
+                note_paragraphs.add(key)
+                note_signatures.append(signature)
+                if duplicate:
+                    self.stats.paragraphs_removed += 1
+                    # Keep the headings so that the section structure survives
+                    block = [
+                        (line, in_code)
+                        for line, in_code in block
+                        if not in_code and _HEADING.match(line)
+                    ]
+
+            for line, in_code in block:
+                if (
+                    in_code
+                    or not line.strip()
+                    or _HEADING.match(line)
+                    or _STRUCTURAL.match(line)
+                ):
+                    kept_lines.append(line)
+                    continue
+
+                key = _line_key(line)
+                note_lines.add(key)
+                if self._seen_line(key):
+                    self.stats.lines_removed += 1
+                    continue
+                kept_lines.append(line)
+
+            kept_lines.append("")
+
+        self._recent_lines.append(note_lines)
+        self._recent_paragraphs.append(note_paragraphs)
+        self._recent_signatures.append(note_signatures)
+
+        result = drop_empty_sections("\n".join(kept_lines)).strip()
+        if not result:
+            result = OMITTED_NOTE_PLACEHOLDER
+
+        self.stats.notes += 1
+        self.stats.chars_before += len(content)
+        self.stats.chars_after += len(result)
+        self.stats.tokens_before += estimate_tokens(content)
+        self.stats.tokens_after += estimate_tokens(result)
+        return result
+
+
+def _split_blocks(content: str) -> List[List[Tuple[str, bool]]]:
+    """
+    Split markdown into blank-line separated blocks, keeping code fences whole.
+
+    Args:
+        content (str): Markdown content
+
+    Returns:
+        List[List[Tuple[str, bool]]]: Blocks of (line, inside code fence) pairs
+    """
+    blocks: List[List[Tuple[str, bool]]] = []
+    current: List[Tuple[str, bool]] = []
+    in_fence = False
+
+    for line in content.split("\n"):
+        if _FENCE.match(line):
+            current.append((line, True))
+            in_fence = not in_fence
+        elif in_fence:
+            current.append((line, True))
+        elif not line.strip():
+            if current:
+                blocks.append(current)
+                current = []
+        else:
+            current.append((line, False))
+
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def drop_empty_sections(content: str) -> str:
+    """
+    Remove markdown headings whose section has no content.
+
+    A section is empty when only blank lines follow its heading before the
+    next heading of the same or a higher level (or the end of the text).
+
+    Args:
+        content (str): Markdown content
+
+    Returns:
+        str: Content without empty sections
+    """
+    lines = content.split("\n")
+    keep = [True] * len(lines)
+
+    # Heading level per line (0 for non-headings), ignoring code blocks
+    levels = []
+    in_fence = False
+    for line in lines:
+        match = None if in_fence else _HEADING.match(line)
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        levels.append(len(match.group(1)) if match else 0)
+
+    for i, level in enumerate(levels):
+        if not level:
+            continue
+
+        has_content = False
+        for following, following_level in zip(lines[i + 1 :], levels[i + 1 :]):
+            if following_level and following_level <= level:
+                break
+            if following.strip() and not following_level:
+                has_content = True
+                break
+        keep[i] = has_content
+
+    return re.sub(
+        r"\n{3,}", "\n\n", "\n".join(line for line, k in zip(lines, keep) if k)
+    )
+
+
+def dedupe_notes(notes: List[Note], **options: Any) -> Tuple[List[Note], DedupStats]:
+    """
+    Deduplicate the content of chronologically ordered notes.
+
+    Args:
+        notes (List[Note]): Notes with content, oldest first
+        **options: Passed to BoilerplateDeduplicator
+
+    Returns:
+        Tuple[List[Note], DedupStats]: New notes and statistics
+    """
+    deduplicator = BoilerplateDeduplicator(**options)
+    deduped = []
+
+    for note in notes:
+        deduped.append(note.with_content(deduplicator.dedupe(note.content)))
+
+    return deduped, deduplicator.stats
@@ -0,0 +1,152 @@
+import threading
+import time
+from typing import List, Optional
+
+from clients.hackmd_client import HackMDClient
+from tracing import get_tracer
+
+# Shown below the draft until the final report replaces it
+DRAFT_NOTICE = "> 報告產生中，內容會持續更新。"
+# Failed updates double the interval up to this many times
+_MAX_BACKOFF_DOUBLINGS = 3
+
+
+class LiveDraft:
+    """
+    HackMD note that shows the report while it is generated (--live-draft).
+
+    Generated text is collected with ``append`` and ``replace`` and written
+    to the note by a background thread with ``update_note``. Updates are
+    coalesced: at most one request is in flight, requests start at least
+    ``interval`` seconds apart and each sends all text generated so far, so a
+    fast stream costs no more requests than a slow one. After each failed
+    update the interval doubles, at most three times, capping it at eight
+    times the base interval; the next update carries the missed text.
+    ``close`` waits for the update in flight, so the final report written
+    afterwards is never overwritten by an older draft.
+
+    Args:
+        hackmd (HackMDClient): HackMD client
+        note_id (str): Note showing the draft
+        interval (float, optional): Minimum seconds between updates. Defaults to 2.0.
+    """
+
+    def __init__(self, hackmd: HackMDClient, note_id: str, interval: float = 2.0):
+        self.hackmd = hackmd
+        self.note_id = note_id
+        self.interval = interval
+        self.updates = 0
+        self.failures = 0
+        self._pieces: List[str] = []
+        self._version = 0
+        self._sent_version = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="live-draft", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def create(
+        cls,
+        hackmd: HackMDClient,
+        title: str,
+        tags: Optional[List[str]] = None,
+        interval: float = 2.0,
+    ) -> "LiveDraft":
+        """
+        Create the report note with a placeholder and draft into it.
+
+        Args:
+            hackmd (HackMDClient): HackMD client
+            title (str): Title of the report note
+            tags (Optional[List[str]]): Tags of the report note
+            interval (float, optional): Minimum seconds between updates. Defaults to 2.0.
+
+        Returns:
+            LiveDraft: Draft of the new note
+
+        Raises:
+            Exception: If the note cannot be created
+        """
+        url = hackmd.upload_note(title=title, content=DRAFT_NOTICE, tags=tags)
+        return cls(hackmd, url.rstrip("/").rsplit("/", 1)[-1], interval)
+
+    @property
+    def url(self) -> str:
+        """
+        URL of the draft note.
+
+        Returns:
+            str: HackMD URL
+        """
+        return f"https://hackmd.io/{self.note_id}"
+
+    def append(self, piece: str) -> None:
+        """
+        Add generated text to the end of the draft.
+
+        Args:
+            piece (str): Next piece of the report
+        """
+        with self._cond:
+            self._pieces.append(piece)
+            self._version += 1
+            self._cond.notify()
+
+    def replace(self, text: str) -> None:
+        """
+        Replace the whole draft, e.g. with the sections finished so far.
+
+        Args:
+            text (str): Report so far
+        """
+        with self._cond:
+            self._pieces = [text]
+            self._version += 1
+            self._cond.notify()
+
+    def _run(self) -> None:
+        tracer = get_tracer()
+        next_update = 0.0
+        failed_in_row = 0
+        while True:
+            with self._cond:
+                while not self._closed and (
+                    self._version == self._sent_version or time.monotonic() < next_update
+                ):
+                    if self._version == self._sent_version:
+                        self._cond.wait()
+                    else:
+                        # Text arriving until then goes into the same update
+                        self._cond.wait(max(0.0, next_update - time.monotonic()))
+                if self._closed:
+                    return
+                text = "".join(self._pieces)
+                self._pieces = [text]
+                version = self._version
+
+            start = time.monotonic()
+            try:
+                self.hackmd.update_note(self.note_id, f"{text.rstrip()}\n\n{DRAFT_NOTICE}\n")
+            except Exception as e:
+                self.failures += 1
+                failed_in_row += 1
+                tracer.add("draft.failures")
+                if self.failures == 1:
+                    print(f"Warning: Failed to update the live draft, will retry: {str(e)}")
+            else:
+                self.updates += 1
+                failed_in_row = 0
+                tracer.add("draft.updates")
+                with self._cond:
+                    self._sent_version = version
+            next_update = start + self.interval * 2 ** min(failed_in_row, _MAX_BACKOFF_DOUBLINGS)
+
+    def close(self) -> None:
+        """
+        Stop updating the draft, waiting for the update in flight.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
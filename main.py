@@ -8,131 +8,1090 @@ using LLM services.
 
 import os
 import sys
+import threading
+import time
+import argparse
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
 # Import local modules
-from config import parse_arguments, validate_env, get_env_vars
+from concurrency import AIMDLimiter
+from config import (
+    build_stats_parser,
+    configured_providers,
+    get_env_vars,
+    parse_arguments,
+    provider_prices,
+    validate_env,
+)
 from clients.hackmd_client import HackMDClient
-from clients.llm import create_llm_client
-from utils import build_prompt, save_local_report
+from clients.llm import create_llm_client, DeferredLLMClient, LLMClient
+from checkpoint import Checkpoint, run_id_for
+from budget import select_notes_within_budget
+from deadline import DeadlineExceeded, configure_deadline, get_deadline
+from draft import LiveDraft
+from dedup import BoilerplateDeduplicator
+from metrics import METRICS_HEADING, NoteScan, merge_scans, scan_note
+from models import Note
+from outbox import BASE_DELAY, Outbox
+from pipeline import ordered_map, stream_notes
+from profiler import Profiler
+from slim import MarkdownSlimmer, SlimStats
+from snapshot import Snapshot, SnapshotWriter, text_digest
+from spill import ContentStore
+from telemetry import (
+    TelemetryStore,
+    choose_provider,
+    configure_telemetry,
+    format_stats,
+    get_telemetry,
+)
+from store import NoteStore
+from tracing import configure_tracing, get_tracer
+from watch import ReportWatcher
+from utils import (
+    REPORT_SECTIONS,
+    build_section_prompts,
+    estimate_tokens,
+    iter_prompt_segments,
+    report_tags,
+    report_title,
+    save_local_report,
+)
 
 
-def main():
-    """
-    Main function to execute the report generation workflow.
+# Text standing in for a section that was not generated before the deadline
+MISSING_SECTION = "（因執行時限未產生，可用 --resume 補齊）"
+# Notice appended to a report cut short by --deadline
+PARTIAL_NOTICE = "> 注意：本報告受執行時限（--deadline）限制，內容不完整。"
+
+
+def report_sections(args: argparse.Namespace) -> List[Tuple[str, str]]:
     """
-    try:
-        # 1. Load environment variables
-        load_dotenv()
+    Sections the LLM writes; with --local-metrics the metrics section is computed instead.
 
-        # # 2. Parse command line arguments
-        args = parse_arguments()
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+
+    Returns:
+        List[Tuple[str, str]]: Sections in report order
+    """
+    if args.local_metrics:
+        return [section for section in REPORT_SECTIONS if section[0] != METRICS_HEADING]
+    return REPORT_SECTIONS
 
-        # # 3. Validate environment variables
-        validate_env(args.llm_provider)
 
-        # # 4. Get environment variables
-        env_vars = get_env_vars()
+def build_report_prompt(
+    args: argparse.Namespace,
+    hackmd: HackMDClient,
+    llm: Optional[LLMClient],
+    checkpoint: Checkpoint,
+    store: Optional[NoteStore] = None,
+    snapshot: Optional[Snapshot] = None,
+) -> str:
+    """
+    Collect the notes of the report and build the LLM prompt (steps 6 to 10).
 
-        print(f"Starting report generation...")
-        print(f"Date range: {args.start_date} to {args.end_date}")
-        print(f"Folder: {args.folder_name}")
-        print(f"LLM Provider: {args.llm_provider}")
+    Filtered notes, fetched bodies and token counts are stored in the
+    checkpoint as they are produced and reused when present. Notes not
+    fetched before the --deadline fetch budget runs out are left out. With a
+    note store or a snapshot, notes are selected and read locally instead of
+    through HackMD. With --export-snapshot, the fetched notes and their token
+    counts are also written to a snapshot file.
+    With --local-metrics, the metrics section is computed from the fetched
+    notes and stored in the checkpoint as ``metrics.md``. With --spill, note
+    bodies are moved to a memory-mapped spill file once counted and only
+    read back while the prompt is joined.
 
-        # # 5. Initialize clients
-        hackmd = HackMDClient(
-            api_token=env_vars["HACKMD_API_TOKEN"], api_url=env_vars["HACKMD_API_URL"]
-        )
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        hackmd (HackMDClient): HackMD client
+        llm (Optional[LLMClient]): LLM client used for token counting; without
+            one (--llm-provider auto) tokens are counted locally
+        checkpoint (Checkpoint): Checkpoint of this run
+        store (Optional[NoteStore]): Local note store to select notes from
+        snapshot (Optional[Snapshot]): Snapshot to select notes from
 
-        llm = create_llm_client(
-            provider=args.llm_provider,
-            api_key=env_vars[f"{args.llm_provider.upper()}_API_KEY"],
-            model=env_vars[f"{args.llm_provider.upper()}_MODEL"],
-        )
+    Returns:
+        str: Prompt for LLM
 
-        print(f"Clients initialized")
+    Raises:
+        ValueError: If the notes exceed the token limit and --fit-budget is not set
+    """
+    tracer = get_tracer()
 
+    saved_notes = checkpoint.load_json("filtered_notes.json")
+    if saved_notes is not None:
+        filtered_notes = [Note.from_api(note) for note in saved_notes]
+        print(f"Resuming with {len(filtered_notes)} filtered notes from checkpoint")
+    elif store is not None:
+        print(f"Selecting notes from store {args.store}...")
+        with tracer.span(
+            "step.select_notes", folder=args.folder_name, keyword=args.keyword
+        ) as span:
+            filtered_notes = store.select(
+                folder_name=args.folder_name,
+                start_date=args.start_date,
+                end_date=args.end_date,
+                keyword=args.keyword,
+                tags=args.tag,
+            )
+            span.set_attribute("notes", len(filtered_notes))
+        print(f"Found {len(filtered_notes)} matching notes in store")
+        checkpoint.save_json(
+            "filtered_notes.json", [note.to_dict() for note in filtered_notes]
+        )
+    elif snapshot is not None:
+        print(f"Selecting notes from snapshot {args.from_snapshot} ({len(snapshot)} notes)...")
+        with tracer.span("step.filter_notes", folder=args.folder_name, source="snapshot") as span:
+            filtered_notes = hackmd.filter_notes_by_folder_and_date(
+                notes=snapshot.notes(),
+                folder_name=args.folder_name,
+                start_date=args.start_date,
+                end_date=args.end_date,
+            )
+            span.set_attribute("notes", len(filtered_notes))
+        print(f"Found {len(filtered_notes)} matching notes in snapshot")
+        checkpoint.save_json(
+            "filtered_notes.json", [note.to_dict() for note in filtered_notes]
+        )
+    else:
         # 6. Get all notes from HackMD
         print(f"Fetching notes from HackMD...")
-        all_notes = hackmd.get_notes()
+        with tracer.span("step.get_notes") as span:
+            all_notes = hackmd.get_notes()
+            span.set_attribute("notes", len(all_notes))
         print(f"Found {len(all_notes)} notes total")
 
         # 7. Filter notes by folder and date range
         print(f"Filtering notes...")
-        filtered_notes = hackmd.filter_notes_by_folder_and_date(
-            notes=all_notes,
-            folder_name=args.folder_name,
-            start_date=args.start_date,
-            end_date=args.end_date,
-        )
+        with tracer.span("step.filter_notes", folder=args.folder_name) as span:
+            filtered_notes = [
+                Note.from_api(note)
+                for note in hackmd.filter_notes_by_folder_and_date(
+                    notes=all_notes,
+                    folder_name=args.folder_name,
+                    start_date=args.start_date,
+                    end_date=args.end_date,
+                )
+            ]
+            span.set_attribute("notes", len(filtered_notes))
+        # Only the compact records of the matching notes are kept
+        del all_notes
         print(
             f"Found {len(filtered_notes)} notes in specified folder and date range"
         )
+        checkpoint.save_json(
+            "filtered_notes.json", [note.to_dict() for note in filtered_notes]
+        )
 
-        # 8. Get full content for each filtered note and calculate tokens
-        print(f"Retrieving full content and calculating tokens...")
-        notes_with_content = []
-        total_tokens = 0
+    # 8. Get full content for each filtered note and calculate tokens
+    print(f"Retrieving full content and calculating tokens...")
+    notes_with_content = []
+    note_token_counts = []
+    total_tokens = 0
+    deduplicator = (
+        BoilerplateDeduplicator(
+            window=args.dedupe_window, threshold=args.dedupe_threshold
+        )
+        if args.dedupe
+        else None
+    )
 
-        for note in filtered_notes:
-            try:
-                # Get full note content
-                full_note = hackmd.get_note_content(note["id"])
-                notes_with_content.append(full_note)
+    # Adaptive fetching moves the number of requests in flight between
+    # --fetch-workers and --max-fetch-workers as HackMD allows
+    limiter = (
+        AIMDLimiter(initial=args.fetch_workers, max_limit=args.max_fetch_workers)
+        if args.adaptive_fetch and store is None and snapshot is None
+        else None
+    )
+    fetch_note = checkpoint.cached_fetch(
+        limiter.wrap(hackmd.get_note_content) if limiter is not None else hackmd.get_note_content
+    )
+    deadline = get_deadline()
+    skipped: List[str] = []
 
-                # Count tokens for this note
-                note_tokens = llm.count_tokens(full_note["content"])
-                total_tokens += note_tokens
-                print(f"  Note '{full_note['title']}' - {note_tokens} tokens")
+    slimmer = (
+        MarkdownSlimmer(code_lines=args.slim_code_lines, log_lines=args.slim_log_lines)
+        if args.slim
+        else None
+    )
+    slim_stats = SlimStats()
+    spill = ContentStore(args.spill_dir) if args.spill else None
 
-            except Exception as e:
-                print(f"Error processing note {note.get('id', 'unknown')}: {str(e)}")
+    # Local counts are cheaper to redo than to look up in the checkpoint
+    if args.local_tokens or llm is None:
+        count = estimate_tokens
+        token_model = "local"
+    else:
+        count = checkpoint.cached_count(llm.count_tokens)
+        token_model = llm.get_model_name()
+        if snapshot is not None and snapshot.token_model == token_model:
+            # Counts the snapshot recorded with this model need no API calls
+            count = snapshot.cached_count(count)
+
+    # Raw bodies are exported as fetched, counts of the texts as counted
+    exporter = (
+        SnapshotWriter(
+            args.export_snapshot,
+            manifest={key: value for key, value in vars(args).items() if key != "export_snapshot"},
+            token_model=token_model,
+        )
+        if args.export_snapshot
+        else None
+    )
+
+    # Metrics are scanned from the raw bodies on the fetch workers; notes are
+    # slimmed by the pipeline before deduplication and counting
+    scans: Dict[str, NoteScan] = {}
+
+    def fetch(note_id: str) -> Note:
+        if store is not None:
+            note = store.get_note(note_id)
+        elif snapshot is not None:
+            note = snapshot.get_note(note_id)
+        else:
+            note = Note.from_api(fetch_note(note_id))
+        if exporter is not None:
+            exporter.add_note(note)
+        if args.local_metrics:
+            scans[note_id] = scan_note(note.content)
+        return note
+
+    def processed_notes():
+        # Consume the fetch/count stream in order, yielding notes for the
+        # prompt builder as soon as they are ready
+        nonlocal total_tokens
+        for result in stream_notes(
+            notes=filtered_notes,
+            fetch=fetch,
+            count=count,
+            transform=deduplicator.dedupe if deduplicator is not None else None,
+            rewrite=slimmer.slim if slimmer is not None else None,
+            digest=text_digest if exporter is not None else None,
+            workers=args.fetch_workers,
+            queue_size=max(args.queue_size, limiter.max_limit) if limiter is not None else args.queue_size,
+            fetch_workers=limiter.max_limit if limiter is not None else None,
+            cpu_workers=args.cpu_workers if args.local_tokens else 0,
+            chunksize=args.cpu_chunksize,
+        ):
+            if result.error is not None:
+                if isinstance(result.error, DeadlineExceeded) or deadline.expired:
+                    skipped.append(result.meta.id)
+                    continue
+                print(f"Error processing note {result.meta.id}: {str(result.error)}")
+                tracer.add("notes.failed")
                 continue
 
-        # 9. Check token limit
-        print(f"Total tokens: {total_tokens}")
-        if total_tokens > args.max_tokens:
+            full_note = result.note
+            if exporter is not None:
+                exporter.add_count(result.digest, result.tokens)
+            notes_with_content.append(full_note)
+            note_token_counts.append(result.tokens)
+            total_tokens += result.tokens
+            note_slim = result.rewritten
+            if note_slim is not None:
+                slim_stats.add(note_slim)
+                tracer.record("slim.bytes_removed", note_slim.bytes_removed)
+                print(
+                    f"  Note '{full_note.title}' - {result.tokens} tokens "
+                    f"(slimmed {note_slim.bytes_removed} bytes, ~{note_slim.tokens_removed} tokens)"
+                )
+            else:
+                print(f"  Note '{full_note.title}' - {result.tokens} tokens")
+
+            tracer.add("notes.fetched")
+            if spill is not None:
+                # Only the offset of the body stays in memory
+                full_note.content = spill.put(full_note.content)
+                tracer.record("note.bytes", full_note.content.length)
+            else:
+                tracer.record("note.bytes", len(full_note.content.encode("utf-8")))
+            tracer.record("note.tokens", result.tokens)
+            yield full_note
+
+    sections = report_sections(args)
+    # The snapshot is only written if fetching completes
+    with (
+        exporter if exporter is not None else nullcontext(),
+        tracer.span("step.fetch_and_count", notes=len(filtered_notes)) as step_span,
+    ):
+        if spill is None:
+            # Prompt segments reference the note contents, so assembling them
+            # while fetching does not copy any text
+            prompt_segments = list(iter_prompt_segments(processed_notes(), sections))
+        else:
+            # Spilled bodies are read back only when the prompt is joined
+            for _ in processed_notes():
+                pass
+            prompt_segments = []
+        step_span.set_attribute("tokens", total_tokens)
+        if spill is not None:
+            step_span.set_attribute("spilled_bytes", spill.size)
+        if limiter is not None:
+            step_span.set_attributes(
+                fetch_concurrency=limiter.limit,
+                fetch_backoffs=limiter.backoffs,
+                fetch_trajectory=limiter.trajectory,
+            )
+    if limiter is not None:
+        print(f"HackMD fetch concurrency: {limiter.summary()}")
+    if exporter is not None:
+        print(f"Exported {exporter.count} notes to snapshot {args.export_snapshot}")
+
+    if skipped:
+        # Notes still missing when the fetch budget ran out are left out
+        tracer.add("notes.skipped", len(skipped))
+        if not notes_with_content:
+            raise DeadlineExceeded("fetch")
+        print(
+            f"Warning: Deadline reached, {len(skipped)} of {len(filtered_notes)} notes "
+            f"left out of the report"
+        )
+        deadline.mark_partial(f"{len(skipped)} notes left out")
+
+    if args.local_metrics:
+        with tracer.span("step.extract_metrics") as span:
+            metrics = merge_scans(
+                (note, scans[note.id]) for note in notes_with_content if note.id in scans
+            )
+            span.set_attribute("done_items", metrics.done_items)
+        print(
+            f"Extracted metrics locally: {metrics.done_items} done items, "
+            f"{metrics.resolved_references} resolved issues, {len(metrics.projects)} projects"
+        )
+        checkpoint.save_text("metrics.md", metrics.to_markdown())
+        scans.clear()
+
+    if slimmer is not None:
+        print(
+            f"Slimming removed {slim_stats.bytes_removed} bytes, saving ~{slim_stats.tokens_removed} "
+            f"tokens ({slim_stats.images} images, {slim_stats.data_uris} data URIs, "
+            f"{slim_stats.html_tags} HTML tags, {slim_stats.code_lines_removed} code lines, "
+            f"{slim_stats.log_lines_removed} log lines)"
+        )
+        tracer.add("slim.tokens_saved", slim_stats.tokens_removed)
+
+    if deduplicator is not None:
+        stats = deduplicator.stats
+        print(
+            f"Deduplication removed {stats.lines_removed} lines and "
+            f"{stats.paragraphs_removed} paragraphs, saving ~{stats.tokens_saved} tokens "
+            f"({stats.tokens_before} -> {stats.tokens_after} estimated)"
+        )
+        tracer.add("dedup.tokens_saved", stats.tokens_saved)
+
+    # 9. Check token limit
+    print(f"Total tokens: {total_tokens}")
+    if total_tokens > args.max_tokens:
+        if not args.fit_budget:
             raise ValueError(
                 f"Total token count ({total_tokens}) exceeds limit ({args.max_tokens})"
             )
 
-        # 10. Build prompt for LLM
-        print(f"Building prompt for LLM...")
-        prompt = build_prompt(notes_with_content)
-        # 11. Generate report using LLM
+        print(f"Fitting notes into the token budget...")
+        with tracer.span("step.fit_budget", tokens_before=total_tokens) as span:
+            notes_with_content, allocations = select_notes_within_budget(
+                notes=notes_with_content,
+                token_counts=note_token_counts,
+                max_tokens=args.max_tokens,
+            )
+            total_tokens = sum(allocation.tokens for allocation in allocations)
+            span.set_attribute("tokens_after", total_tokens)
+
+        if spill is None:
+            prompt_segments = list(iter_prompt_segments(notes_with_content, sections))
+
+        modes = [allocation.mode for allocation in allocations]
         print(
-            f"Generating report with {llm.get_provider_name()} ({llm.get_model_name()})..."
+            f"Kept {modes.count('full')} notes whole, truncated {modes.count('truncated')}, "
+            f"abstracted {modes.count('abstract')}, dropped {modes.count('dropped')} "
+            f"- {total_tokens} tokens"
         )
-        report_content = llm.generate(prompt)
 
-        # 12. Save report locally
-        print(f"Saving report locally...")
-        local_filename = save_local_report(
-            content=report_content, start_date=args.start_date, end_date=args.end_date
+    # 10. Build prompt for LLM
+    print(f"Building prompt for LLM...")
+    with tracer.span("step.build_prompt") as span:
+        if spill is not None:
+            prompt_segments = iter_prompt_segments(notes_with_content, sections)
+        prompt = "".join(prompt_segments)
+        span.set_attribute("chars", len(prompt))
+
+    # The prompt holds the only copy of the note texts from here on
+    if spill is None:
+        prompt_segments.clear()
+    else:
+        spill.close()
+    for note in notes_with_content:
+        note.release_content()
+
+    return prompt
+
+
+def generate_report_sections(
+    llm: LLMClient,
+    prompt: str,
+    checkpoint: Checkpoint,
+    sections: List[Tuple[str, str]] = REPORT_SECTIONS,
+    on_progress: Optional[Callable[[str], None]] = None,
+) -> str:
+    """
+    Generate the report section by section, concurrently, and stitch it together.
+
+    Every section gets its own focused instruction after the same note
+    context, which is primed into the provider's prompt cache first. Finished
+    sections are checkpointed, so a resumed run only generates missing ones.
+    Sections not finished before the --deadline generation budget runs out
+    are replaced by a notice.
+
+    Args:
+        llm (LLMClient): LLM client
+        prompt (str): Full report prompt
+        checkpoint (Checkpoint): Checkpoint of this run
+        sections (List[Tuple[str, str]], optional): Sections to generate.
+            Defaults to REPORT_SECTIONS.
+        on_progress (Optional[Callable[[str], None]]): Called with the sections
+            finished so far, in order, whenever a section finishes
+
+    Returns:
+        str: Report with the sections in ``sections`` order
+
+    Raises:
+        DeadlineExceeded: If no section finished within the deadline
+        Exception: If generating any section fails
+    """
+    context, instructions = build_section_prompts(prompt, sections)
+    names = [f"sections/{i}.md" for i in range(len(sections))]
+    texts = [checkpoint.load_text(name) for name in names]
+    missing = [i for i, text in enumerate(texts) if text is None]
+
+    if missing:
+        llm.prime_context_cache(context)
+
+    progress_lock = threading.Lock()
+
+    def report_progress(i: int, text: str) -> None:
+        with progress_lock:
+            texts[i] = text
+            on_progress("\n\n".join(done for done in texts if done is not None))
+
+    def generate_section(i: int) -> str:
+        heading = sections[i][0]
+        with get_tracer().span("step.generate_section", section=heading) as span:
+            text = llm.generate_with_context(context, instructions[i]).strip()
+            span.set_attribute("chars", len(text))
+        # Keep the stitched report well-formed even if a heading was left out
+        if not text.lstrip("# ").startswith(heading):
+            text = f"# {heading}\n\n{text}"
+        checkpoint.save_text(names[i], text)
+        print(f"  Section '{heading}' generated")
+        if on_progress is not None:
+            report_progress(i, text)
+        return text
+
+    late = []
+    with ThreadPoolExecutor(max(1, len(missing)), thread_name_prefix="section") as executor:
+        for i, text, error in ordered_map(generate_section, missing, executor, len(missing)):
+            if isinstance(error, DeadlineExceeded):
+                late.append(i)
+                continue
+            if error is not None:
+                raise error
+            texts[i] = text
+
+    if late:
+        # Finished sections are kept; the rest are marked as missing
+        if len(late) == len(sections):
+            raise DeadlineExceeded("generate")
+        for i in late:
+            texts[i] = f"# {sections[i][0]}\n\n{MISSING_SECTION}"
+        print(f"Warning: Deadline reached, {len(late)} sections not generated")
+        get_deadline().mark_partial(f"{len(late)} sections not generated")
+
+    return "\n\n".join(texts)
+
+
+def plan_generation(
+    args: argparse.Namespace, llm: LLMClient, prompt: str
+) -> Tuple[LLMClient, bool]:
+    """
+    Adapt generation to the time left of the --deadline generation budget.
+
+    The expected duration is the p95 latency of recent calls to the same
+    model with a prompt of similar size. If that does not fit the budget,
+    the ``{PROVIDER}_FAST_MODEL`` of the provider is used when configured;
+    otherwise the report is generated section by section, concurrently, so
+    finished sections are kept even if others run out of time.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        llm (LLMClient): LLM client chosen for the report
+        prompt (str): Full report prompt
+
+    Returns:
+        Tuple[LLMClient, bool]: Client to generate with and whether to
+        generate section by section
+    """
+    budget = get_deadline().stage_remaining()
+    store = get_telemetry()
+    if budget is None or store is None:
+        return llm, args.parallel_sections
+
+    provider, model = llm.get_provider_name(), llm.get_model_name()
+    prompt_tokens = estimate_tokens(prompt)
+    stats = store.stats(input_tokens=(prompt_tokens // 2, prompt_tokens * 2)).get(
+        (provider, model)
+    )
+    if stats is None or stats.p95_ms is None or stats.p95_ms / 1000 <= budget:
+        return llm, args.parallel_sections
+
+    expected = f"~{stats.p95_ms / 1000:.0f}s expected, {budget:.0f}s left"
+    fast_model = os.getenv(f"{provider.upper()}_FAST_MODEL")
+    if fast_model and fast_model != model:
+        print(f"Switching to {fast_model} to finish in time ({expected})")
+        get_tracer().add("deadline.fast_model")
+        return (
+            create_llm_client(
+                provider=provider,
+                api_key=get_env_vars()[f"{provider.upper()}_API_KEY"],
+                model=fast_model,
+            ),
+            args.parallel_sections,
         )
-        print(f"Report saved to: {local_filename}")
+    if not args.parallel_sections:
+        print(f"Generating sections concurrently to finish in time ({expected})")
+        get_tracer().add("deadline.parallel_sections")
+    return llm, True
 
-        # 13. Upload to HackMD
-        print(f"Uploading to HackMD...")
+
+def generate_until_deadline(
+    llm: LLMClient, prompt: str, on_piece: Optional[Callable[[str], None]] = None
+) -> str:
+    """
+    Stream the report, keeping what was generated when the deadline is reached.
+
+    Args:
+        llm (LLMClient): LLM client
+        prompt (str): Full report prompt
+        on_piece (Optional[Callable[[str], None]]): Called with every piece
+            of text as it arrives
+
+    Returns:
+        str: Generated report, possibly cut short
+
+    Raises:
+        DeadlineExceeded: If the deadline is reached before any text arrived
+    """
+    pieces: List[str] = []
+    try:
+        for piece in llm.stream(prompt):
+            pieces.append(piece)
+            if on_piece is not None:
+                on_piece(piece)
+    except DeadlineExceeded:
+        if not pieces:
+            raise
+        print(f"Warning: Deadline reached, keeping the report generated so far")
+        get_deadline().mark_partial("generation cut short")
+    return "".join(pieces).strip()
+
+
+def open_live_draft(
+    args: argparse.Namespace,
+    hackmd: HackMDClient,
+    title: str,
+    tags: List[str],
+    report_note_id: Optional[str] = None,
+) -> Optional[LiveDraft]:
+    """
+    Start drafting the report into its HackMD note (--live-draft).
+
+    The report note is created now, or the existing one is drafted into.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        hackmd (HackMDClient): HackMD client
+        title (str): Title of the report note
+        tags (List[str]): Tags of the report note
+        report_note_id (Optional[str]): Existing report note to draft into
+
+    Returns:
+        Optional[LiveDraft]: The draft, or None if the note could not be created
+    """
+    if report_note_id is not None:
+        draft = LiveDraft(hackmd, report_note_id, interval=args.draft_interval)
+    else:
         try:
-            hackmd_url = hackmd.upload_note(
-                title=f"年度績效報告_{args.start_date}_to_{args.end_date}",
-                content=report_content,
-                tags=["annual-report", args.year_tag],
-            )
-            print(f"Report uploaded to HackMD: {hackmd_url}")
+            draft = LiveDraft.create(hackmd, title, tags, interval=args.draft_interval)
         except Exception as e:
+            print(f"Warning: Could not create the live draft, uploading at the end: {str(e)}")
+            return None
+    print(f"Drafting report live at {draft.url}")
+    return draft
+
+
+def select_llm_client(args: argparse.Namespace, prompt: str) -> LLMClient:
+    """
+    Create the client of the provider with the best recent latency (--llm-provider auto).
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        prompt (str): Prompt the client will generate the report from
+
+    Returns:
+        LLMClient: Client of the chosen provider
+
+    Raises:
+        ValueError: If no configured provider is within --max-cost
+    """
+    env_vars = get_env_vars()
+    candidates = configured_providers()
+    prompt_tokens = estimate_tokens(prompt)
+
+    with get_tracer().span("step.select_provider", prompt_tokens=prompt_tokens) as span:
+        provider, reason = choose_provider(
+            candidates=candidates,
+            prompt_tokens=prompt_tokens,
+            store=get_telemetry(),
+            prices=provider_prices(),
+            max_cost=args.max_cost,
+        )
+        span.set_attribute("provider", provider)
+    print(f"Selected {provider} for a prompt of ~{prompt_tokens} tokens ({reason})")
+
+    return create_llm_client(
+        provider=provider,
+        api_key=env_vars[f"{provider.upper()}_API_KEY"],
+        model=candidates[provider],
+    )
+
+
+def open_note_store(args: argparse.Namespace, hackmd: HackMDClient) -> NoteStore:
+    """
+    Open the note store, syncing it from HackMD if asked to or if it is empty.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        hackmd (HackMDClient): HackMD client
+
+    Returns:
+        NoteStore: The opened store
+    """
+    store = NoteStore(args.store)
+    if args.sync_store or store.count() == 0:
+        print(f"Syncing note store {args.store} from HackMD...")
+        with get_tracer().span("step.sync_store") as span:
+            stats = store.sync(hackmd, workers=args.fetch_workers)
+            span.set_attributes(**stats)
+        print(
+            f"Store synced: {stats['listed']} notes listed, {stats['fetched']} fetched, "
+            f"{stats['failed']} failed, {stats['deleted']} deleted"
+        )
+    return store
+
+
+def run_report(
+    args: argparse.Namespace,
+    hackmd: Optional[HackMDClient] = None,
+    llm: Optional[LLMClient] = None,
+    report_note_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run the report generation steps for already parsed arguments.
+
+    Clients that are passed in are reused instead of being created, which
+    lets a long-running service keep them warm between reports.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        hackmd (Optional[HackMDClient]): HackMD client to reuse
+        llm (Optional[LLMClient]): LLM client to reuse
+        report_note_id (Optional[str]): HackMD note to update with the report
+            instead of creating a new one
+
+    Returns:
+        Dict[str, Any]: Local file name, HackMD URL (None if the upload
+        failed) and the report content
+
+    Raises:
+        Exception: If any step of the workflow fails
+    """
+    tracer = get_tracer()
+
+    # # 3. Validate environment variables
+    with tracer.span("step.validate_env"):
+        validate_env(args.llm_provider)
+        if (args.keyword or args.tag) and not args.store:
+            raise ValueError("--keyword and --tag require --store")
+        if args.from_snapshot and args.store:
+            raise ValueError("--from-snapshot cannot be combined with --store")
+        if args.export_snapshot and args.resume:
+            raise ValueError("--export-snapshot needs a fresh run; remove --resume")
+
+    # # 4. Get environment variables
+    env_vars = get_env_vars()
+
+    print(f"Starting report generation...")
+    print(f"Date range: {args.start_date} to {args.end_date}")
+    print(f"Folder: {args.folder_name}")
+    print(f"LLM Provider: {args.llm_provider}")
+
+    # # 5. Initialize clients
+    # With auto, the provider is chosen once the prompt size is known
+    auto = args.llm_provider == "auto"
+    model = "auto" if auto else env_vars[f"{args.llm_provider.upper()}_MODEL"]
+    with tracer.span("step.init_clients", provider=args.llm_provider):
+        if hackmd is None:
+            hackmd = HackMDClient(
+                api_token=env_vars["HACKMD_API_TOKEN"],
+                api_url=env_vars["HACKMD_API_URL"],
+                # Every adaptive fetch slot keeps its connection alive
+                pool_size=max(16, args.max_fetch_workers) if args.adaptive_fetch else 16,
+            )
+
+        if llm is None and not auto:
+            # The SDK import, client construction and connection setup run
+            # in the background while the notes are listed and fetched
+            api_key = env_vars[f"{args.llm_provider.upper()}_API_KEY"]
+            llm = DeferredLLMClient(
+                lambda: create_llm_client(
+                    provider=args.llm_provider, api_key=api_key, model=model
+                ),
+                provider=args.llm_provider,
+                model=model,
+            )
+
+    print(f"Clients initialized")
+
+    # Retry uploads queued by earlier runs while this one works
+    outbox = Outbox(args.outbox_dir)
+    queued_uploads = outbox.pending()
+    draining = None
+    if queued_uploads:
+        print(f"Retrying {len(queued_uploads)} queued HackMD uploads in the background...")
+        draining = outbox.drain_in_background(hackmd)
+
+    checkpoint = Checkpoint(args.checkpoint_dir, run_id_for(args, model))
+    if not args.resume:
+        checkpoint.reset(dict(vars(args)))
+
+    deadline = get_deadline()
+    prompt = checkpoint.load_text("prompt.md")
+    if prompt is not None:
+        print(f"Resuming with prompt from checkpoint {checkpoint.run_id}")
+    else:
+        store = open_note_store(args, hackmd) if args.store else None
+        snapshot = Snapshot(args.from_snapshot) if args.from_snapshot else None
+        try:
+            with deadline.stage("fetch"):
+                prompt = build_report_prompt(args, hackmd, llm, checkpoint, store, snapshot)
+        finally:
+            if store is not None:
+                store.close()
+            if snapshot is not None:
+                snapshot.close()
+        # A prompt missing notes is rebuilt by a resumed run
+        if not deadline.partial:
+            checkpoint.save_text("prompt.md", prompt)
+
+    if llm is None:
+        llm = select_llm_client(args, prompt)
+
+    # 11. Generate report using LLM
+    print(
+        f"Generating report with {llm.get_provider_name()} ({llm.get_model_name()})..."
+    )
+    title = report_title(args.start_date, args.end_date)
+    tags = report_tags(args.year_tag)
+    draft = None
+    report_content = checkpoint.load_text("report.md")
+    if report_content is not None:
+        print(f"Resuming with generated report from checkpoint {checkpoint.run_id}")
+    else:
+        with deadline.stage("generate"):
+            llm, parallel_sections = plan_generation(args, llm, prompt)
+            if args.live_draft:
+                draft = open_live_draft(args, hackmd, title, tags, report_note_id)
+            with tracer.span(
+                "step.generate", parallel_sections=parallel_sections
+            ) as span:
+                try:
+                    if parallel_sections:
+                        report_content = generate_report_sections(
+                            llm,
+                            prompt,
+                            checkpoint,
+                            report_sections(args),
+                            on_progress=draft.replace if draft is not None else None,
+                        )
+                    elif deadline.enabled or draft is not None:
+                        report_content = generate_until_deadline(
+                            llm, prompt, on_piece=draft.append if draft is not None else None
+                        )
+                    else:
+                        report_content = llm.generate(prompt)
+                finally:
+                    if draft is not None:
+                        # No draft update may land after the final report
+                        draft.close()
+                span.set_attribute("chars", len(report_content))
+                if draft is not None:
+                    span.set_attributes(draft_updates=draft.updates, draft_failures=draft.failures)
+
+        if args.local_metrics:
+            # The metrics section is last in the report, so it is appended
+            metrics_section = checkpoint.load_text("metrics.md")
+            if metrics_section is None:
+                raise Exception("Metrics missing from checkpoint; rerun without --resume")
+            report_content = f"{report_content.rstrip()}\n\n{metrics_section}\n"
+        if deadline.partial:
+            report_content = f"{report_content.rstrip()}\n\n{PARTIAL_NOTICE}\n"
+        else:
+            checkpoint.save_text("report.md", report_content)
+
+    # 12./13. Save report locally and upload to HackMD concurrently. The
+    # upload is queued in the outbox first, so if it fails or is still running
+    # when we exit, a later run retries it.
+    with deadline.stage("upload"):
+        print(f"Uploading to HackMD...")
+        # A live draft is finalized by updating its note with the report
+        entry_id = outbox.enqueue(
+            title=title,
+            content=report_content,
+            tags=tags,
+            delay=BASE_DELAY,
+            note_id=draft.note_id if draft is not None else report_note_id,
+        )
+        upload = outbox.send_in_background(hackmd, entry_id)
+        upload_wait = args.upload_wait
+        if deadline.enabled:
+            upload_wait = min(upload_wait, deadline.stage_remaining())
+        upload_deadline = time.monotonic() + upload_wait
+
+        print(f"Saving report locally...")
+        with tracer.span("step.save_local"):
+            local_filename = save_local_report(
+                content=report_content, start_date=args.start_date, end_date=args.end_date
+            )
+        print(f"Report saved to: {local_filename}")
+
+        hackmd_url = None
+        with tracer.span("step.upload") as span:
+            try:
+                hackmd_url = upload.result(
+                    timeout=max(0.0, upload_deadline - time.monotonic())
+                )
+                print(f"Report uploaded to HackMD: {hackmd_url}")
+            except TimeoutError:
+                span.set_attribute("error", "timeout")
+                print(
+                    f"Upload to HackMD still in progress; it stays queued in "
+                    f"{args.outbox_dir} and a later run retries it if needed"
+                )
+            except Exception as e:
+                span.set_attribute("error", str(e))
+                print(
+                    f"Warning: Failed to upload to HackMD, but local file was saved: {str(e)} "
+                    f"(queued for retry in {args.outbox_dir})"
+                )
+
+        if draining is not None:
+            wait([draining], timeout=max(0.0, upload_deadline - time.monotonic()))
+        if draining is not None and draining.done() and draining.exception() is None:
+            counts = draining.result()
             print(
-                f"Warning: Failed to upload to HackMD, but local file was saved: {str(e)}"
+                f"Queued uploads: {counts['sent']} sent, {counts['failed']} failed, "
+                f"{counts['deferred']} waiting for retry"
             )
 
-        print(f"Report generation completed successfully!")
+    # The run is complete, nothing is left to resume; a partial run keeps
+    # its checkpoint so --resume can fill in what is missing
+    if not deadline.partial:
+        checkpoint.clear()
+
+    return {
+        "local_filename": local_filename,
+        "hackmd_url": hackmd_url,
+        "report": report_content,
+        "partial": list(deadline.partial),
+    }
+
+
+def watch_reports(args: argparse.Namespace) -> None:
+    """
+    Keep the report up to date until interrupted (--watch).
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+    """
+    validate_env(args.llm_provider)
+    if args.deadline is not None:
+        raise ValueError("--deadline cannot be combined with --watch")
+    if args.from_snapshot or args.export_snapshot:
+        raise ValueError("--from-snapshot and --export-snapshot cannot be combined with --watch")
+    env_vars = get_env_vars()
+    auto = args.llm_provider == "auto"
+    model = "auto" if auto else env_vars[f"{args.llm_provider.upper()}_MODEL"]
+
+    hackmd = HackMDClient(
+        api_token=env_vars["HACKMD_API_TOKEN"],
+        api_url=env_vars["HACKMD_API_URL"],
+        pool_size=max(16, args.max_fetch_workers) if args.adaptive_fetch else 16,
+    )
+    # With auto, every regeneration picks its provider
+    llm = None
+    if not auto:
+        llm = create_llm_client(
+            provider=args.llm_provider,
+            api_key=env_vars[f"{args.llm_provider.upper()}_API_KEY"],
+            model=model,
+        )
+
+    watcher = ReportWatcher(
+        args,
+        hackmd,
+        llm,
+        generate=run_report,
+        state_path=os.path.join(
+            args.checkpoint_dir, "watch", f"{run_id_for(args, model)}.json"
+        ),
+        interval=args.watch_interval,
+        max_interval=args.watch_max_interval,
+        debounce=args.watch_debounce,
+        min_delta=args.watch_min_delta,
+    )
+    print(f"Watching folder '{args.folder_name}' for changes (Ctrl+C to stop)...")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print(f"Watch stopped")
+
+
+def show_stats(argv: List[str]) -> None:
+    """
+    Print the recorded LLM call statistics (``python main.py stats``).
+
+    Args:
+        argv (List[str]): Arguments after ``stats``
+    """
+    options = build_stats_parser().parse_args(argv)
+    if not os.path.exists(options.telemetry_db):
+        print(f"No telemetry recorded yet in {options.telemetry_db}")
+        return
+
+    store = TelemetryStore(options.telemetry_db)
+    try:
+        stats = [
+            stat
+            for operation in ("generate", "count_tokens")
+            for stat in sorted(
+                store.stats(operation=operation, window=options.hours * 3600).values(),
+                key=lambda stat: (stat.provider, stat.model),
+            )
+        ]
+    finally:
+        store.close()
+
+    if not stats:
+        print(f"No LLM calls in the last {options.hours:g} hours")
+        return
+    print(f"LLM calls in the last {options.hours:g} hours:")
+    print(format_stats(stats))
+
+
+def print_connection_stats() -> None:
+    """
+    Print how many LLM API requests reused a pooled connection.
+    """
+    # Imported here, as the HTTP library is only needed once an LLM client exists
+    from transport import connection_stats
+
+    stats = connection_stats()
+    if stats is None or not stats.requests:
+        return
+    print(
+        f"LLM HTTP: {stats.requests} requests over {stats.connections} connections "
+        f"({stats.reuse_rate:.0%} reused)"
+    )
+
+
+def main():
+    """
+    Main function to execute the report generation workflow.
+    """
+    if sys.argv[1:2] == ["stats"]:
+        show_stats(sys.argv[2:])
+        return
+
+    args = None
+    profiler = None
+    try:
+        # 1. Load environment variables
+        load_dotenv()
+
+        # # 2. Parse command line arguments
+        args = parse_arguments()
+        # The profiler finds the stages of the run through the tracer's spans
+        profile = args.profile or args.profile_allocations
+        tracer = configure_tracing(enabled=bool(args.trace_file) or profile)
+        if profile:
+            profiler = Profiler(
+                os.path.join(args.profile_dir, time.strftime("%Y%m%d-%H%M%S")),
+                allocations=args.profile_allocations,
+            )
+            tracer.observers.append(profiler)
+            profiler.start()
+        configure_telemetry(args.telemetry_db)
+        deadline = configure_deadline(args.deadline)
+
+        with tracer.span(
+            "report",
+            folder=args.folder_name,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            provider=args.llm_provider,
+        ):
+            if args.watch:
+                watch_reports(args)
+            else:
+                run_report(args)
+                print_connection_stats()
+                if deadline.partial:
+                    print(
+                        f"⏱ Report saved with partial results ({'; '.join(deadline.partial)}); "
+                        f"rerun with --resume to complete it"
+                    )
+                    sys.exit(2)
+                print(f"Report generation completed successfully!")
+
+    except DeadlineExceeded as e:
+        print(
+            f"⏱ {str(e)}; finished steps are kept in {args.checkpoint_dir}, "
+            f"rerun with --resume to continue"
+        )
+        sys.exit(2)
 
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         sys.exit(1)
 
+    finally:
+        if args is not None and args.trace_file:
+            try:
+                get_tracer().export(args.trace_file, args.trace_format)
+                print(f"Trace written to: {args.trace_file}")
+            except Exception as e:
+                print(f"Warning: Failed to write trace file: {str(e)}")
+        if profiler is not None:
+            try:
+                print(f"Profile written to: {profiler.stop()}")
+            except Exception as e:
+                print(f"Warning: Failed to write profile: {str(e)}")
+        configure_telemetry(None)
+        configure_deadline(None)
+
 
 if __name__ == "__main__":
     main()
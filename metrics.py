@@ -0,0 +1,204 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+from models import Note
+
+METRICS_HEADING = "五、量化指標"
+
+# Fenced code blocks are skipped; checklists and references in code are not work items
+_FENCED_BLOCK = re.compile(r"^[ \t]*(```|~~~).*?(?:^[ \t]*\1[^\n]*$|\Z)", re.M | re.S)
+_DONE_ITEM = re.compile(r"^[ \t]*[-*+][ \t]+\[[xX]\][ \t]*([^\n]*)", re.M)
+_OPEN_ITEM = re.compile(r"^[ \t]*[-*+][ \t]+\[ \]", re.M)
+_HEADING = re.compile(r"^#{2,4}[ \t]+([^\n]+?)[ \t#]*$", re.M)
+# "#123", ".../issues/123", ".../pull/123" and ".../merge_requests/123"
+_REFERENCE = re.compile(r"(?:/(?:issues|pull|merge_requests)/|(?<![\w&#/])#)(\d+)\b")
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_REFERENCE = re.compile(r"\s*\(?#\d+\)?\s*$")
+
+
+@dataclass
+class ReportMetrics:
+    """
+    Quantitative metrics extracted from the notes of a report.
+
+    Attributes:
+        notes (int): Number of notes
+        done_items (int): Distinct checked-off checklist items
+        open_items (int): Unchecked checklist items in the latest note
+        references (int): Distinct issue/PR references
+        resolved_references (int): Distinct issue/PR references on checked-off items
+        projects (List[str]): Project headings, in order of first appearance
+        monthly (Dict[str, Dict[str, int]]): Per month (YYYY-MM) counts of
+            notes, done items and references
+    """
+
+    notes: int = 0
+    done_items: int = 0
+    open_items: int = 0
+    references: int = 0
+    resolved_references: int = 0
+    projects: List[str] = field(default_factory=list)
+    monthly: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def to_markdown(self) -> str:
+        """
+        Render the metrics as the report's quantitative-metrics section.
+
+        Returns:
+            str: Markdown section with a summary and a per-month table
+        """
+        lines = [
+            f"# {METRICS_HEADING}",
+            "",
+            "| 指標 | 數值 |",
+            "|------|------|",
+            f"| 週報數 | {self.notes} |",
+            f"| 涉及專案數 | {len(self.projects)} |",
+            f"| 完成項目數 | {self.done_items} |",
+            f"| 解決問題數（已完成項目中的 Issue/PR） | {self.resolved_references} |",
+            f"| 引用 Issue/PR 數 | {self.references} |",
+            f"| 未完成項目數（最新週報） | {self.open_items} |",
+        ]
+        if self.projects:
+            lines += ["", "涉及專案：" + "、".join(self.projects)]
+        if self.monthly:
+            lines += [
+                "",
+                "## 每月統計",
+                "",
+                "| 月份 | 週報數 | 完成項目 | Issue/PR |",
+                "|------|--------|----------|----------|",
+            ]
+            for month, counts in sorted(self.monthly.items()):
+                lines.append(
+                    f"| {month} | {counts['notes']} | {counts['done']} | {counts['references']} |"
+                )
+        return "\n".join(lines)
+
+
+@dataclass(slots=True)
+class NoteScan:
+    """
+    Metric counts of a single note, merged into ``ReportMetrics`` later.
+
+    Attributes:
+        done (Tuple[str, ...]): Normalized texts of the checked-off items
+        resolved (FrozenSet[str]): Issue/PR numbers on checked-off items
+        references (FrozenSet[str]): Issue/PR numbers in the note
+        headings (Dict[str, str]): Normalized heading to heading text
+        open_items (int): Number of unchecked items
+    """
+
+    done: Tuple[str, ...] = ()
+    resolved: FrozenSet[str] = frozenset()
+    references: FrozenSet[str] = frozenset()
+    headings: Dict[str, str] = field(default_factory=dict)
+    open_items: int = 0
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", _TRAILING_REFERENCE.sub("", text)).strip().lower()
+
+
+def scan_note(content: str) -> NoteScan:
+    """
+    Scan a note body with the compiled metric patterns.
+
+    Scans are independent of each other, so they can run on the fetch
+    workers as soon as each body arrives.
+
+    Args:
+        content (str): Note content
+
+    Returns:
+        NoteScan: Counts of the note
+    """
+    content = _FENCED_BLOCK.sub("", content or "")
+    done_items = _DONE_ITEM.findall(content)
+    resolved = set()
+    for item in done_items:
+        resolved.update(_REFERENCE.findall(item))
+
+    return NoteScan(
+        done=tuple(key for key in map(_normalize, done_items) if key),
+        resolved=frozenset(resolved),
+        references=frozenset(_REFERENCE.findall(content)),
+        headings={_normalize(title): title.strip() for title in _HEADING.findall(content)},
+        open_items=len(_OPEN_ITEM.findall(content)),
+    )
+
+
+def merge_scans(
+    scans: Iterable[Tuple[Note, NoteScan]], template_ratio: float = 0.3
+) -> ReportMetrics:
+    """
+    Combine note scans, in chronological order, into report metrics.
+
+    Checklist items carried over from week to week are counted once, by
+    their normalized text, in the month they were first checked off.
+    Headings that occur in at least ``template_ratio`` of the notes belong
+    to the weekly template; the remaining level 2 to 4 headings are counted
+    as projects.
+
+    Args:
+        scans (Iterable[Tuple[Note, NoteScan]]): Notes with their scans, in
+            chronological order
+        template_ratio (float, optional): Share of notes above which a heading
+            is template boilerplate. Defaults to 0.3.
+
+    Returns:
+        ReportMetrics: Report metrics
+    """
+    metrics = ReportMetrics()
+    done: Set[str] = set()
+    references: Set[str] = set()
+    resolved: Set[str] = set()
+    heading_notes: Counter = Counter()
+    heading_order: Dict[str, str] = {}
+
+    for note, scan in scans:
+        metrics.notes += 1
+        month = metrics.monthly.setdefault(
+            note.date[:7], {"notes": 0, "done": 0, "references": 0}
+        )
+        month["notes"] += 1
+
+        new_done = set(scan.done) - done
+        month["done"] += len(new_done)
+        done |= new_done
+        month["references"] += len(scan.references - references)
+        references |= scan.references
+        resolved |= scan.resolved
+
+        heading_notes.update(scan.headings.keys())
+        for key, title in scan.headings.items():
+            heading_order.setdefault(key, title)
+
+        # Open items are a snapshot: only the latest note's count matters
+        metrics.open_items = scan.open_items
+
+    threshold = max(2, template_ratio * metrics.notes)
+    metrics.projects = [
+        title for key, title in heading_order.items() if heading_notes[key] < threshold
+    ]
+    metrics.done_items = len(done)
+    metrics.references = len(references)
+    metrics.resolved_references = len(resolved)
+    return metrics
+
+
+def extract_metrics(notes: Iterable[Note], template_ratio: float = 0.3) -> ReportMetrics:
+    """
+    Count report metrics in the notes with compiled patterns, without an LLM.
+
+    Args:
+        notes (Iterable[Note]): Notes with content, in chronological order
+        template_ratio (float, optional): Share of notes above which a heading
+            is template boilerplate. Defaults to 0.3.
+
+    Returns:
+        ReportMetrics: Report metrics
+    """
+    return merge_scans(((note, scan_note(note.content)) for note in notes), template_ratio)
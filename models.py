@@ -0,0 +1,135 @@
+import sys
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Optional, Tuple, Union
+
+
+def format_note_date(created_at: int) -> str:
+    """
+    Format a HackMD ``createdAt`` timestamp as a local YYYY-MM-DD date.
+
+    Args:
+        created_at (int): Unix timestamp in milliseconds
+
+    Returns:
+        str: Date string in YYYY-MM-DD format
+    """
+    return time.strftime("%Y-%m-%d", time.localtime(created_at / 1000))
+
+
+@dataclass(slots=True)
+class Note:
+    """
+    A HackMD note reduced to the fields the report uses.
+
+    API responses carry a dozen fields per note that are never read; keeping
+    only these in a slotted record cuts the per-note memory of large listings.
+    Folder names and tags repeat across thousands of notes and are interned.
+
+    Attributes:
+        id (str): HackMD note ID
+        title (str): Note title
+        created_at (int): Creation time as Unix timestamp in milliseconds
+        last_changed_at (int): Last change time as Unix timestamp in milliseconds
+        folders (Tuple[str, ...]): Names of the folders containing the note
+        tags (Tuple[str, ...]): Tags of the note
+        content (Optional[str]): Markdown content, None for listing entries
+            or once released; a ``spill.SpilledText`` once spilled (--spill)
+    """
+
+    id: str
+    title: str = "Untitled"
+    created_at: int = 0
+    last_changed_at: int = 0
+    folders: Tuple[str, ...] = ()
+    tags: Tuple[str, ...] = ()
+    content: Optional[str] = None
+    _date: Optional[str] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_api(cls, data: Union["Note", Dict[str, Any]]) -> "Note":
+        """
+        Convert a note from the HackMD API (listing or full note).
+
+        Args:
+            data (Union[Note, Dict[str, Any]]): API note dict, or a Note which
+                is returned unchanged
+
+        Returns:
+            Note: The note record
+        """
+        if isinstance(data, cls):
+            return data
+        return cls(
+            id=data["id"],
+            title=data.get("title") or "Untitled",
+            created_at=int(data.get("createdAt") or 0),
+            last_changed_at=int(data.get("lastChangedAt") or 0),
+            folders=tuple(
+                sys.intern(folder.get("name") or "")
+                for folder in data.get("folderPaths") or ()
+            ),
+            tags=tuple(sys.intern(tag) for tag in data.get("tags") or ()),
+            content=data.get("content"),
+        )
+
+    @property
+    def date(self) -> str:
+        """
+        Local creation date in YYYY-MM-DD format, computed once.
+
+        Returns:
+            str: Creation date
+        """
+        if self._date is None:
+            self._date = format_note_date(self.created_at)
+        return self._date
+
+    def in_folder(self, folder_name: str) -> bool:
+        """
+        Check if the note belongs to a folder.
+
+        Args:
+            folder_name (str): Folder name
+
+        Returns:
+            bool: True if the note is in the folder
+        """
+        return folder_name in self.folders
+
+    def with_content(self, content: Optional[str]) -> "Note":
+        """
+        Copy of the note with different content.
+
+        Args:
+            content (Optional[str]): New content
+
+        Returns:
+            Note: New note record
+        """
+        return replace(self, content=content)
+
+    def release_content(self) -> None:
+        """
+        Drop the content once it is no longer needed (e.g. after prompt assembly).
+        """
+        self.content = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert back to the HackMD API shape, e.g. for JSON checkpoints.
+
+        Returns:
+            Dict[str, Any]: Note dict readable by ``from_api``
+        """
+        data: Dict[str, Any] = {
+            "id": self.id,
+            "title": self.title,
+            "createdAt": self.created_at,
+            "lastChangedAt": self.last_changed_at,
+            "folderPaths": [{"name": name} for name in self.folders],
+            "tags": list(self.tags),
+        }
+        if self.content is not None:
+            data["content"] = self.content
+        return data
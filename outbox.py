@@ -0,0 +1,270 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from checkpoint import atomic_write
+from clients.hackmd_client import HackMDClient
+
+# Retry delays grow from BASE_DELAY to MAX_DELAY seconds
+BASE_DELAY = 30.0
+MAX_DELAY = 3600.0
+# An in-flight entry older than this is assumed to belong to a dead process
+STALE_SENDING = 600.0
+
+_ENTRY_SUFFIX = ".json"
+_SENDING_SUFFIX = ".sending"
+
+
+def backoff_delay(attempts: int, base: float = BASE_DELAY, maximum: float = MAX_DELAY) -> float:
+    """
+    Delay before the next upload attempt, with exponential growth and jitter.
+
+    Args:
+        attempts (int): Failed attempts so far
+        base (float, optional): Delay after the first failure. Defaults to BASE_DELAY.
+        maximum (float, optional): Upper bound of the delay. Defaults to MAX_DELAY.
+
+    Returns:
+        float: Delay in seconds
+    """
+    delay = min(maximum, base * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _in_background(func: Callable[[], Any]) -> Future:
+    """
+    Run ``func`` on a daemon thread, so a pending call never delays exit.
+
+    Args:
+        func (Callable[[], Any]): Function to run
+
+    Returns:
+        Future: Future of the result
+    """
+    future: Future = Future()
+
+    def run() -> None:
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="outbox", daemon=True).start()
+    return future
+
+
+class Outbox:
+    """
+    Durable queue of HackMD uploads.
+
+    Each upload is written atomically to ``<root>/<id>.json`` before it is
+    attempted and removed only after HackMD accepted it, so an upload that
+    fails or is cut short by the process exiting is retried by a later run.
+    While an upload is in flight its file is renamed to ``<id>.sending``,
+    which keeps concurrent runs from sending the same entry. Delivery is at
+    least once: a process killed after HackMD accepted the note but before
+    the entry was removed uploads it again.
+
+    Args:
+        root (str): Outbox directory
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, entry_id: str, suffix: str = _ENTRY_SUFFIX) -> str:
+        return os.path.join(self.root, entry_id + suffix)
+
+    def enqueue(
+        self,
+        title: str,
+        content: str,
+        tags: Optional[List[str]] = None,
+        delay: float = 0,
+        note_id: Optional[str] = None,
+    ) -> str:
+        """
+        Durably queue an upload.
+
+        With ``note_id`` the existing note is updated instead of a new note
+        being created, and older queued updates of that note are dropped,
+        so a stale report can never overwrite a newer one.
+
+        Args:
+            title (str): Title of the note
+            content (str): Content of the note
+            tags (Optional[List[str]]): Tags of the note
+            delay (float, optional): Seconds before ``drain`` may pick the
+                entry up, e.g. while the caller sends it itself. Defaults to 0.
+            note_id (Optional[str]): HackMD note to update instead of creating one
+
+        Returns:
+            str: Entry ID
+        """
+        if note_id is not None:
+            for entry in self.pending():
+                if entry.get("note_id") == note_id:
+                    try:
+                        os.remove(self._path(entry["id"]))
+                    except FileNotFoundError:
+                        pass
+
+        entry_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+        entry = {
+            "id": entry_id,
+            "title": title,
+            "content": content,
+            "tags": tags or [],
+            "note_id": note_id,
+            "attempts": 0,
+            "next_attempt_at": time.time() + delay,
+            "last_error": None,
+        }
+        atomic_write(self._path(entry_id), json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        return entry_id
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """
+        Queued uploads, oldest first (without entries currently being sent).
+
+        Returns:
+            List[Dict[str, Any]]: Outbox entries
+        """
+        try:
+            names = sorted(os.listdir(self.root))
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        for name in names:
+            if not name.endswith(_ENTRY_SUFFIX) or name.startswith("."):
+                continue
+            try:
+                with open(os.path.join(self.root, name), encoding="utf-8") as f:
+                    entries.append(json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+        return entries
+
+    def send(self, hackmd: HackMDClient, entry_id: str) -> str:
+        """
+        Upload a queued entry now.
+
+        On success the entry is removed; on failure it is rescheduled with
+        backoff and the error is raised.
+
+        Args:
+            hackmd (HackMDClient): HackMD client
+            entry_id (str): Entry ID
+
+        Returns:
+            str: URL of the uploaded note
+
+        Raises:
+            Exception: If the entry is already being sent or the upload fails
+        """
+        sending = self._path(entry_id, _SENDING_SUFFIX)
+        try:
+            # Claim the entry; only one sender can win the rename
+            os.rename(self._path(entry_id), sending)
+        except FileNotFoundError:
+            raise Exception(f"Upload {entry_id} is not queued or is already being sent")
+        # Mark the claim time for stale detection
+        os.utime(sending)
+
+        with open(sending, encoding="utf-8") as f:
+            entry = json.load(f)
+
+        try:
+            if entry.get("note_id"):
+                url = hackmd.update_note(note_id=entry["note_id"], content=entry["content"])
+            else:
+                url = hackmd.upload_note(
+                    title=entry["title"], content=entry["content"], tags=entry["tags"]
+                )
+        except Exception as e:
+            entry["attempts"] += 1
+            entry["last_error"] = str(e)
+            entry["next_attempt_at"] = time.time() + backoff_delay(entry["attempts"])
+            atomic_write(
+                self._path(entry_id), json.dumps(entry, ensure_ascii=False).encode("utf-8")
+            )
+            os.remove(sending)
+            raise
+
+        os.remove(sending)
+        return url
+
+    def drain(self, hackmd: HackMDClient) -> Dict[str, int]:
+        """
+        Send every entry whose retry time has come.
+
+        Entries left in flight by a dead process are requeued first.
+
+        Args:
+            hackmd (HackMDClient): HackMD client
+
+        Returns:
+            Dict[str, int]: Number of sent, failed and deferred entries
+        """
+        self._requeue_stale()
+        now = time.time()
+        counts = {"sent": 0, "failed": 0, "deferred": 0}
+
+        for entry in self.pending():
+            if entry["next_attempt_at"] > now:
+                counts["deferred"] += 1
+                continue
+            try:
+                url = self.send(hackmd, entry["id"])
+                print(f"Queued report uploaded to HackMD: {url}")
+                counts["sent"] += 1
+            except Exception as e:
+                print(f"Warning: Queued upload {entry['id']} failed, will retry: {str(e)}")
+                counts["failed"] += 1
+        return counts
+
+    def send_in_background(self, hackmd: HackMDClient, entry_id: str) -> Future:
+        """
+        Start uploading an entry on a daemon thread.
+
+        Args:
+            hackmd (HackMDClient): HackMD client
+            entry_id (str): Entry ID
+
+        Returns:
+            Future: Resolves to the note URL, or to the upload error
+        """
+        return _in_background(lambda: self.send(hackmd, entry_id))
+
+    def drain_in_background(self, hackmd: HackMDClient) -> Future:
+        """
+        Start draining due entries on a daemon thread.
+
+        Args:
+            hackmd (HackMDClient): HackMD client
+
+        Returns:
+            Future: Resolves to the counts returned by ``drain``
+        """
+        return _in_background(lambda: self.drain(hackmd))
+
+    def _requeue_stale(self) -> None:
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith(_SENDING_SUFFIX):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                if time.time() - os.path.getmtime(path) > STALE_SENDING:
+                    os.rename(path, self._path(name[: -len(_SENDING_SUFFIX)]))
+            except FileNotFoundError:
+                continue
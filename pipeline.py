@@ -0,0 +1,368 @@
+import contextvars
+import multiprocessing
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+
+from models import Note
+
+
+@dataclass
+class ProcessedNote:
+    """
+    Result of running one note through the fetch/transform/count stages.
+
+    Attributes:
+        index (int): Position of the note in the input order
+        meta (Note): Note metadata from the listing
+        note (Optional[Note]): Full note, or None if a stage failed
+        tokens (int): Token count of the (transformed) content
+        rewritten (Any): Second value returned by ``rewrite``, e.g. what was removed
+        digest (Optional[str]): Digest of the counted content, if requested
+        error (Optional[Exception]): Error raised by a stage, if any
+    """
+
+    index: int
+    meta: Note
+    note: Optional[Note] = None
+    tokens: int = 0
+    rewritten: Any = None
+    digest: Optional[str] = None
+    error: Optional[Exception] = None
+
+
+def _capture(func: Callable[[Any], Any], item: Any) -> Tuple[Any, Optional[Exception]]:
+    try:
+        return func(item), None
+    except Exception as e:
+        return None, e
+
+
+def ordered_map(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    executor: ThreadPoolExecutor,
+    window: int,
+) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+    """
+    Apply ``func`` concurrently while yielding results in input order.
+
+    At most ``window`` calls are in flight or waiting to be consumed, which
+    bounds memory and applies backpressure to the producer of ``items``.
+    Exceptions are returned instead of raised so one failing item does not
+    stop the stream.
+
+    Args:
+        func (Callable[[Any], Any]): Function to apply
+        items (Iterable[Any]): Input items (consumed lazily)
+        executor (ThreadPoolExecutor): Executor running the calls
+        window (int): Maximum number of pending results
+
+    Yields:
+        Tuple[Any, Any, Optional[Exception]]: (item, result, error) in input order
+    """
+    pending: Deque[Tuple[Any, Future]] = deque()
+    iterator = iter(items)
+    exhausted = False
+
+    while True:
+        while not exhausted and len(pending) < window:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                exhausted = True
+                break
+            # Run each call in a copy of the caller's context so tracing
+            # spans opened by ``func`` nest under the caller's span
+            context = contextvars.copy_context()
+            pending.append((item, executor.submit(context.run, _capture, func, item)))
+
+        if not pending:
+            return
+
+        item, future = pending.popleft()
+        result, error = future.result()
+        yield item, result, error
+
+
+def encode_texts(texts: List[str]) -> Tuple[bytes, Tuple[int, ...]]:
+    """
+    Pack texts into a single UTF-8 buffer for cheap transfer to a process.
+
+    Pickling one bytes object and a tuple of lengths is much cheaper than
+    pickling many strings or note dicts.
+
+    Args:
+        texts (List[str]): Texts to pack
+
+    Returns:
+        Tuple[bytes, Tuple[int, ...]]: Concatenated UTF-8 data and byte length of each text
+    """
+    encoded = [text.encode("utf-8") for text in texts]
+    return b"".join(encoded), tuple(len(data) for data in encoded)
+
+
+def decode_texts(data: bytes, lengths: Tuple[int, ...]) -> List[str]:
+    """
+    Unpack texts packed by ``encode_texts``.
+
+    Args:
+        data (bytes): Concatenated UTF-8 data
+        lengths (Tuple[int, ...]): Byte length of each text
+
+    Returns:
+        List[str]: The original texts
+    """
+    texts = []
+    offset = 0
+    view = memoryview(data)
+    for length in lengths:
+        texts.append(str(view[offset:offset + length], "utf-8"))
+        offset += length
+    return texts
+
+
+def _apply_chunk(
+    func: Callable[[str], Any], data: bytes, lengths: Tuple[int, ...]
+) -> List[Tuple[Any, Optional[Exception]]]:
+    # Runs in a worker process
+    return [_capture(func, text) for text in decode_texts(data, lengths)]
+
+
+def _process_text(
+    rewrite: Optional[Callable[[str], Tuple[str, Any]]],
+    count: Optional[Callable[[str], int]],
+    digest: Optional[Callable[[str], str]],
+    text: str,
+) -> Tuple[Optional[str], Any, Optional[int], Optional[str]]:
+    # Runs on a pipeline thread or, for a whole chunk, in a worker process
+    rewritten = None
+    if rewrite is not None:
+        text, rewritten = rewrite(text)
+    return (
+        text if rewrite is not None else None,
+        rewritten,
+        count(text) if count is not None else None,
+        digest(text) if digest is not None else None,
+    )
+
+
+def create_cpu_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Create a process pool for CPU-bound per-note work.
+
+    Workers are started with ``forkserver`` where available (``spawn``
+    otherwise), since forking a process that already runs fetch threads is
+    unsafe.
+
+    Args:
+        workers (int): Number of worker processes
+
+    Returns:
+        ProcessPoolExecutor: Process pool
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+    return ProcessPoolExecutor(max(1, workers), mp_context=context)
+
+
+def ordered_chunk_map(
+    func: Callable[[str], Any],
+    items: Iterable[Any],
+    executor: Executor,
+    chunksize: int,
+    window: int,
+    text: Callable[[Any], str] = lambda item: item,
+) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+    """
+    Apply ``func`` to the text of each item in a process pool, in order.
+
+    Items are grouped into chunks of ``chunksize`` and each chunk is sent as
+    one packed payload (see ``encode_texts``), which amortizes the per-task
+    overhead of the pool. At most ``window`` chunks are pending.
+
+    Args:
+        func (Callable[[str], Any]): Picklable (module-level) function of a text
+        items (Iterable[Any]): Input items (consumed lazily)
+        executor (Executor): Process pool running the chunks
+        chunksize (int): Items per chunk
+        window (int): Maximum number of pending chunks
+        text (Callable[[Any], str], optional): Extracts the text of an item
+
+    Yields:
+        Tuple[Any, Any, Optional[Exception]]: (item, result, error) in input order
+    """
+    pending: Deque[Tuple[List[Any], Future]] = deque()
+    iterator = iter(items)
+    exhausted = False
+
+    while True:
+        while not exhausted and len(pending) < window:
+            chunk = []
+            for item in iterator:
+                chunk.append(item)
+                if len(chunk) >= chunksize:
+                    break
+            if len(chunk) < chunksize:
+                exhausted = True
+            if chunk:
+                payload = encode_texts([text(item) for item in chunk])
+                pending.append((chunk, executor.submit(_apply_chunk, func, *payload)))
+
+        if not pending:
+            return
+
+        chunk, future = pending.popleft()
+        try:
+            results = future.result()
+        except Exception as e:
+            results = [(None, e)] * len(chunk)
+        for item, (result, error) in zip(chunk, results):
+            yield item, result, error
+
+
+def stream_notes(
+    notes: Iterable[Note],
+    fetch: Callable[[str], Note],
+    count: Callable[[str], int],
+    transform: Optional[Callable[[str], str]] = None,
+    workers: int = 4,
+    queue_size: int = 16,
+    cpu_workers: int = 0,
+    chunksize: int = 64,
+    fetch_workers: Optional[int] = None,
+    rewrite: Optional[Callable[[str], Tuple[str, Any]]] = None,
+    digest: Optional[Callable[[str], str]] = None,
+) -> Iterator[ProcessedNote]:
+    """
+    Stream notes through fetch, rewrite, transform and token counting stages.
+
+    Fetching and counting each run on their own ``workers`` threads, linked by
+    bounded windows of ``queue_size`` notes, so a note can be counted while
+    later ones are still downloading and the caller can assemble the prompt
+    as results arrive. ``rewrite`` changes one note independently of the
+    others and runs on the fetch threads. ``transform`` runs in order on the
+    consuming thread, since stages like deduplication depend on chronology.
+    ``digest`` is computed from the counted text next to its count. Results
+    are yielded in input order.
+
+    For local, CPU-bound work ``cpu_workers`` moves the rewrite, count and
+    digest stages to a pool of that many processes: notes are sent in chunks
+    of ``chunksize`` and ``count``, ``rewrite`` and ``digest`` must then be
+    picklable (module-level functions or methods of picklable objects).
+    Without a ``transform`` all three run in one chunk; with one, rewritten
+    notes come back for it before being counted. Results are the same as
+    with the threaded stages.
+
+    Args:
+        notes (Iterable[Note]): Note metadata from the listing
+        fetch (Callable[[str], Note]): Fetches a full note by ID
+        count (Callable[[str], int]): Counts tokens of note content
+        transform (Optional[Callable[[str], str]]): Optional content rewrite
+            applied in order before counting
+        workers (int, optional): Threads per concurrent stage. Defaults to 4.
+        queue_size (int, optional): Notes buffered between stages. Defaults to 16.
+        cpu_workers (int, optional): Processes for the rewrite, count and
+            digest stages; 0 runs them on threads. Defaults to 0.
+        chunksize (int, optional): Notes per process pool task. Defaults to 64.
+        fetch_workers (Optional[int], optional): Threads of the fetch stage,
+            e.g. when ``fetch`` limits its own concurrency. Defaults to ``workers``.
+        rewrite (Optional[Callable[[str], Tuple[str, Any]]]): Optional per-note
+            rewrite returning the new content and a value kept in ``rewritten``
+        digest (Optional[Callable[[str], str]]): Optional digest of the counted content
+
+    Yields:
+        ProcessedNote: One result per input note, in input order
+    """
+    workers = max(1, workers)
+    fetch_workers = max(1, fetch_workers) if fetch_workers is not None else workers
+    queue_size = max(1, queue_size)
+
+    def apply(processed: ProcessedNote, result: Tuple, error: Optional[Exception]) -> ProcessedNote:
+        if processed.error is not None:
+            return processed
+        if error is not None:
+            processed.note, processed.error = None, error
+            return processed
+        text, rewritten, tokens, text_digest = result
+        if text is not None:
+            processed.note.content, processed.rewritten = text, rewritten
+        if tokens is not None:
+            processed.tokens = tokens
+        if text_digest is not None:
+            processed.digest = text_digest
+        return processed
+
+    def transformed(results: Iterable[ProcessedNote]) -> Iterator[ProcessedNote]:
+        for processed in results:
+            if processed.error is None and transform is not None:
+                try:
+                    processed.note.content = transform(processed.note.content)
+                except Exception as e:
+                    processed.note, processed.error = None, e
+            yield processed
+
+    def content(processed: ProcessedNote) -> str:
+        return processed.note.content if processed.error is None else ""
+
+    with ThreadPoolExecutor(fetch_workers, thread_name_prefix="fetch") as fetch_pool, \
+            ThreadPoolExecutor(workers, thread_name_prefix="count") as count_pool, \
+            (create_cpu_executor(cpu_workers) if cpu_workers > 0 else nullcontext()) as cpu_pool:
+
+        # Rewriting on the fetch threads only when no process pool takes it
+        thread_rewrite = rewrite if cpu_pool is None else None
+
+        def fetch_note(meta: Note) -> Tuple[Note, Any]:
+            note = fetch(meta.id)
+            if thread_rewrite is None:
+                return note, None
+            note.content, rewritten = thread_rewrite(note.content)
+            return note, rewritten
+
+        def fetched() -> Iterator[ProcessedNote]:
+            results = ordered_map(fetch_note, notes, fetch_pool, queue_size)
+            for index, (meta, result, error) in enumerate(results):
+                processed = ProcessedNote(index=index, meta=meta, error=error)
+                if error is None:
+                    processed.note, processed.rewritten = result
+                yield processed
+
+        if cpu_pool is not None:
+            chunksize = max(1, chunksize)
+            # Keep every process busy while bounding the notes held in flight
+            window = max(2 * cpu_workers, -(-queue_size // chunksize))
+
+            def pooled(func: Callable[[str], Tuple], results: Iterable[ProcessedNote]) -> Iterator[ProcessedNote]:
+                for processed, result, error in ordered_chunk_map(
+                    func, results, cpu_pool, chunksize, window, text=content
+                ):
+                    yield apply(processed, result, error)
+
+            if transform is None:
+                # Rewrite, count and digest share one payload per chunk
+                counted = pooled(partial(_process_text, rewrite, count, digest), fetched())
+            else:
+                results = fetched()
+                if rewrite is not None:
+                    results = pooled(partial(_process_text, rewrite, None, None), results)
+                counted = pooled(partial(_process_text, None, count, digest), transformed(results))
+        else:
+
+            def count_note(processed: ProcessedNote) -> Tuple:
+                if processed.error is not None:
+                    return None
+                return _process_text(None, count, digest, processed.note.content)
+
+            counted = (
+                apply(processed, result, error)
+                for processed, result, error in ordered_map(
+                    count_note, transformed(fetched()), count_pool, queue_size
+                )
+            )
+
+        yield from counted
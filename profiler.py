@@ -0,0 +1,213 @@
+import json
+import os
+import re
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from concurrent.futures import thread as futures_thread
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+from tracing import Span
+
+# 100 samples per second keeps the sampler below 1% of a core
+SAMPLE_INTERVAL = 0.01
+# Allocation sites kept per stage
+TOP_ALLOCATIONS = 10
+# Spans that delimit the stages of a run
+STAGE_PREFIX = "step."
+
+# An executor thread in this function is waiting for work
+_IDLE_WORKER = futures_thread._worker.__code__
+# Modules whose frames are the innermost while a thread blocks on the network
+_IO_MODULES = ("socket.py", "ssl.py", "selectors.py")
+_LOCK_MODULES = ("threading.py", "queue.py")
+# Snapshots allocate in these files; they are left out of the stages
+_OWN_FILES = (tracemalloc.__file__, __file__)
+
+
+def _thread_label(name: str) -> str:
+    # Pool threads are numbered ("fetch_3"); their stacks are merged
+    return re.sub(r"_\d+$", "", name)
+
+
+class Profiler:
+    """
+    Sampling CPU profiler and allocation tracker of a run (--profile).
+
+    A background thread samples the Python stacks of every thread each
+    ``interval`` seconds, so time blocked on HackMD or the LLM shows up next
+    to computation. Samples are attributed to the innermost open ``step.*``
+    span of the tracer (the stage) and written as collapsed stacks
+    (``stage;thread;frame;...;frame count``), the input format of
+    flamegraph.pl, speedscope and similar viewers. Executor threads waiting
+    for work are not sampled.
+
+    With ``allocations`` set, ``tracemalloc`` records one frame per
+    allocation. When a stage ends, its snapshot is compared with the one from
+    its start, and the lines whose retained memory grew most are kept. This
+    hooks every allocation and snapshots the whole heap at stage boundaries,
+    so it costs far more than sampling and is off by default.
+
+    The profiler observes the tracer, which must be enabled.
+
+    Args:
+        directory (str): Directory to write the profile to
+        interval (float, optional): Seconds between samples. Defaults to SAMPLE_INTERVAL.
+        top (int, optional): Allocation sites kept per stage. Defaults to TOP_ALLOCATIONS.
+        allocations (bool, optional): Trace allocations per stage. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        interval: float = SAMPLE_INTERVAL,
+        top: int = TOP_ALLOCATIONS,
+        allocations: bool = False,
+    ):
+        self.directory = directory
+        self.interval = interval
+        self.top = top
+        self.allocations = allocations
+        self.samples: Counter = Counter()
+        self.stages: List[Dict[str, Any]] = []
+        self._labels: Dict[CodeType, str] = {}
+        self._open: List[Tuple[Span, Optional[tracemalloc.Snapshot]]] = []
+        self._stage_samples: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        """
+        Start sampling, and tracing allocations if enabled.
+        """
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+            self._started_tracemalloc = True
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (
+                f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            )
+        return label
+
+    def _stack(self, frame: Optional[FrameType]) -> Optional[Tuple[str, ...]]:
+        if frame is None or frame.f_code is _IDLE_WORKER:
+            return None
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return tuple(labels)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                stage = self._open[-1][0].name if self._open else "run"
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self._stack(frame)
+                if stack is None:
+                    continue
+                thread = _thread_label(names.get(ident, str(ident)))
+                self.samples[(stage, thread) + stack] += 1
+                leaf = os.path.basename(frame.f_code.co_filename)
+                self._stage_samples[stage, "samples"] += 1
+                if leaf in _IO_MODULES:
+                    self._stage_samples[stage, "io_wait"] += 1
+                elif leaf in _LOCK_MODULES:
+                    self._stage_samples[stage, "lock_wait"] += 1
+
+    def span_started(self, span: Span) -> None:
+        """
+        Open a stage when a ``step.*`` span starts (tracer observer).
+
+        Args:
+            span (Span): Started span
+        """
+        if not span.name.startswith(STAGE_PREFIX):
+            return
+        snapshot = (
+            tracemalloc.take_snapshot() if self.allocations and tracemalloc.is_tracing() else None
+        )
+        with self._lock:
+            self._open.append((span, snapshot))
+
+    def span_ended(self, span: Span) -> None:
+        """
+        Close a stage and keep its duration and top allocation sites (tracer observer).
+
+        Args:
+            span (Span): Ended span
+        """
+        if not span.name.startswith(STAGE_PREFIX):
+            return
+        with self._lock:
+            entry = next((entry for entry in self._open if entry[0] is span), None)
+            if entry is None:
+                return
+            self._open.remove(entry)
+        start = entry[1]
+        top: List[Dict[str, Any]] = []
+        if start is not None and tracemalloc.is_tracing():
+            # Sorted by the size of the change, growth and shrinkage alike
+            for stat in tracemalloc.take_snapshot().compare_to(start, "lineno"):
+                if len(top) == self.top:
+                    break
+                frame = stat.traceback[0]
+                if stat.size_diff <= 0 or frame.filename in _OWN_FILES:
+                    continue
+                top.append(
+                    {
+                        "file": frame.filename,
+                        "line": frame.lineno,
+                        "size_diff_kib": round(stat.size_diff / 1024, 1),
+                        "count_diff": stat.count_diff,
+                    }
+                )
+        stage: Dict[str, Any] = {"stage": span.name, "duration_ms": round(span.duration_ms, 1)}
+        if self.allocations:
+            stage["allocations"] = top
+        with self._lock:
+            self.stages.append(stage)
+
+    def stop(self) -> str:
+        """
+        Stop profiling and write ``profile.folded`` and ``allocations.json``.
+
+        Returns:
+            str: Directory the profile was written to
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "profile.folded"), "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{';'.join(stack)} {count}\n")
+
+        samples: Dict[str, Dict[str, int]] = {}
+        for (stage, kind), count in self._stage_samples.items():
+            samples.setdefault(stage, {"samples": 0, "io_wait": 0, "lock_wait": 0})[kind] = count
+        with open(os.path.join(self.directory, "allocations.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {"interval_s": self.interval, "samples": samples, "stages": self.stages},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        return self.directory
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Long-running report service.
+
+Keeps the HackMD session, LLM clients and the note listing warm between
+reports and runs report jobs from a bounded queue. Jobs are submitted over a
+small local HTTP API with the same parameters as the command line:
+
+    POST /jobs              submit a job, e.g. {"start_date": "2024-01-01", ...}
+    GET  /jobs/<id>         job status
+    GET  /jobs/<id>/result  report of a finished job
+    GET  /health            queue and worker status
+
+Usage:
+    python server.py --port 8765 --workers 2 --queue-size 8
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from checkpoint import run_id_for
+from clients.hackmd_client import HackMDClient
+from clients.llm import create_llm_client, LLMClient
+from config import (
+    build_parser,
+    data_path,
+    get_env_vars,
+    params_to_argv,
+    parse_arguments,
+    validate_env,
+)
+from main import run_report
+from telemetry import configure_telemetry
+from transport import connection_stats
+
+# Handled by main() for the whole process (tracer, profiler, telemetry store,
+# deadline) or needing a job of their own; a job cannot honour them
+PROCESS_ARGUMENTS = (
+    "trace_file",
+    "trace_format",
+    "profile",
+    "profile_allocations",
+    "profile_dir",
+    "telemetry_db",
+    "deadline",
+    "resume",
+    "watch",
+    "watch_interval",
+    "watch_max_interval",
+    "watch_debounce",
+    "watch_min_delta",
+)
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted while the job queue is full.
+    """
+
+
+@dataclass
+class Job:
+    """
+    A report job and its state.
+
+    Attributes:
+        id (str): Job ID
+        args (argparse.Namespace): Parsed report arguments
+        key (str): Run ID of the report, used to coalesce identical jobs
+        status (str): "queued", "running", "succeeded" or "failed"
+        submitted_at (float): Submission time (epoch seconds)
+        started_at (Optional[float]): Start time
+        finished_at (Optional[float]): Completion time
+        result (Optional[Dict[str, Any]]): Result of ``run_report``
+        error (Optional[str]): Error message of a failed job
+    """
+
+    id: str
+    args: argparse.Namespace
+    key: str
+    status: str = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Status of the job without its result.
+
+        Returns:
+            Dict[str, Any]: JSON-serializable job status
+        """
+        status = {
+            "id": self.id,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if self.result is not None:
+            status["local_filename"] = self.result["local_filename"]
+            status["hackmd_url"] = self.result["hackmd_url"]
+        return status
+
+
+class ReportService:
+    """
+    Runs report jobs on worker threads with shared, long-lived clients.
+
+    A single HackMD client (with a pooled session and a cached note listing)
+    serves all jobs, and LLM clients are created once per provider and model.
+    Submitting a report identical to one that is already queued or running
+    returns the existing job, which also keeps two workers from sharing a
+    checkpoint directory.
+
+    Args:
+        workers (int, optional): Number of jobs run concurrently. Defaults to 2.
+        queue_size (int, optional): Maximum number of queued jobs. Defaults to 8.
+        listing_ttl (float, optional): Seconds to reuse the HackMD note listing. Defaults to 60.
+        history (int, optional): Finished jobs kept for status queries. Defaults to 100.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        queue_size: int = 8,
+        listing_ttl: float = 60,
+        history: int = 100,
+    ):
+        self.workers = max(1, workers)
+        self.listing_ttl = listing_ttl
+        self.history = history
+        self.queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=queue_size)
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._hackmd: Optional[HackMDClient] = None
+        self._llm_clients: Dict[Tuple[str, str], LLMClient] = {}
+        self._threads = []
+
+    def start(self) -> None:
+        """
+        Start the worker threads.
+        """
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"report-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """
+        Stop the workers after the queued jobs are done.
+        """
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, params: Dict[str, Any]) -> Job:
+        """
+        Queue a report job.
+
+        Args:
+            params (Dict[str, Any]): Report parameters, named like the
+                command line arguments
+
+        Returns:
+            Job: The new job, or the queued or running job of an identical report
+
+        Raises:
+            ValueError: If the parameters are invalid or cannot be honoured per job
+            QueueFullError: If the job queue is full
+        """
+        try:
+            args = parse_arguments(params_to_argv(params))
+        except SystemExit:
+            raise ValueError(f"Invalid report parameters: {params}")
+        parser = build_parser()
+        unsupported = [
+            name for name in PROCESS_ARGUMENTS if getattr(args, name) != parser.get_default(name)
+        ]
+        if unsupported:
+            raise ValueError(
+                f"Parameters not supported by the report service: {', '.join(unsupported)}"
+            )
+        validate_env(args.llm_provider)
+
+        model = get_env_vars().get(f"{args.llm_provider.upper()}_MODEL", "auto")
+        key = run_id_for(args, model)
+
+        with self._lock:
+            active = self._active.get(key)
+            if active is not None:
+                return active
+
+            job = Job(id=uuid.uuid4().hex, args=args, key=key)
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(
+                    f"Job queue is full ({self.queue.maxsize} jobs waiting)"
+                )
+            self._active[key] = job
+            self.jobs[job.id] = job
+            self._evict_finished()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job.
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            Optional[Job]: The job, or None if it is unknown or was evicted
+        """
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Service status for monitoring.
+
+        Returns:
+            Dict[str, Any]: Worker, queue and job counts and LLM connection reuse
+        """
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+        stats = connection_stats()
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "running": statuses.count("running"),
+            "llm_clients": len(self._llm_clients),
+            "llm_http": stats.to_dict() if stats is not None else None,
+        }
+
+    def _evict_finished(self) -> None:
+        # Drop the oldest finished jobs beyond the history limit
+        finished = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.status in ("succeeded", "failed")
+        ]
+        for job_id in finished[: max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+    def _clients(self, args: argparse.Namespace) -> Tuple[HackMDClient, Optional[LLMClient]]:
+        """
+        Get the shared clients for a job, creating them on first use.
+
+        Args:
+            args (argparse.Namespace): Report arguments of the job
+
+        Returns:
+            Tuple[HackMDClient, Optional[LLMClient]]: HackMD client and LLM
+            client (None with provider auto, which picks one per job)
+        """
+        env_vars = get_env_vars()
+        provider = args.llm_provider
+
+        with self._lock:
+            if self._hackmd is None:
+                self._hackmd = HackMDClient(
+                    api_token=env_vars["HACKMD_API_TOKEN"],
+                    api_url=env_vars["HACKMD_API_URL"],
+                    listing_ttl=self.listing_ttl,
+                )
+            if provider == "auto":
+                return self._hackmd, None
+            model = env_vars[f"{provider.upper()}_MODEL"]
+            llm = self._llm_clients.get((provider, model))
+            if llm is None:
+                llm = create_llm_client(
+                    provider=provider,
+                    api_key=env_vars[f"{provider.upper()}_API_KEY"],
+                    model=model,
+                )
+                self._llm_clients[(provider, model)] = llm
+            return self._hackmd, llm
+
+    def _worker(self) -> None:
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                hackmd, llm = self._clients(job.args)
+                job.result = run_report(job.args, hackmd=hackmd, llm=llm)
+                job.status = "succeeded"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+                print(f"❌ Job {job.id} failed: {str(e)}")
+            finally:
+                job.finished_at = time.time()
+                with self._lock:
+                    self._active.pop(job.key, None)
+
+
+def make_handler(service: ReportService) -> type:
+    """
+    Build the HTTP request handler class for a service.
+
+    Args:
+        service (ReportService): Service that runs the jobs
+
+    Returns:
+        type: ``BaseHTTPRequestHandler`` subclass
+    """
+
+    class ReportRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            parts = self.path.strip("/").split("/")
+            if parts == ["health"]:
+                self._send_json(200, service.health())
+                return
+            if len(parts) in (2, 3) and parts[0] == "jobs":
+                job = service.get(parts[1])
+                if job is None:
+                    self._send_json(404, {"error": f"Unknown job: {parts[1]}"})
+                elif len(parts) == 2:
+                    self._send_json(200, job.to_dict())
+                elif parts[2] != "result":
+                    self._send_json(404, {"error": f"Unknown path: {self.path}"})
+                elif job.result is None:
+                    self._send_json(409, job.to_dict())
+                else:
+                    self._send_json(200, {**job.to_dict(), "report": job.result["report"]})
+                return
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+        def do_POST(self) -> None:
+            if self.path.rstrip("/") != "/jobs":
+                self._send_json(404, {"error": f"Unknown path: {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                params = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(params, dict):
+                    raise ValueError("Request body must be a JSON object")
+                job = service.submit(params)
+            except QueueFullError as e:
+                self._send_json(503, {"error": str(e)})
+                return
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(202, job.to_dict())
+
+        def log_message(self, format: str, *args: Any) -> None:
+            print(f"{self.address_string()} - {format % args}")
+
+    return ReportRequestHandler
+
+
+def main() -> None:
+    """
+    Start the report service and serve until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Run the report generator as a service")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    parser.add_argument(
+        "--workers", type=int, default=2, help="Reports run concurrently (default: 2)"
+    )
+    parser.add_argument(
+        "--queue-size", type=int, default=8, help="Maximum queued reports (default: 8)"
+    )
+    parser.add_argument(
+        "--listing-ttl",
+        type=float,
+        default=60,
+        help="Seconds to reuse the HackMD note listing (default: 60)",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    configure_telemetry(data_path("telemetry.db"))
+    service = ReportService(
+        workers=args.workers, queue_size=args.queue_size, listing_ttl=args.listing_ttl
+    )
+    service.start()
+
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"Report service listening on http://{args.host}:{httpd.server_address[1]}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Shutting down, waiting for running jobs...")
+    finally:
+        httpd.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
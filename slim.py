@@ -0,0 +1,219 @@
+import re
+from dataclasses import dataclass, fields
+from typing import List, Optional, Tuple
+
+from utils import estimate_tokens
+
+_FRONT_MATTER = re.compile(
+    r"\A(?:---|\+\+\+)[ \t]*\n.*?\n(?:---|\+\+\+|\.\.\.)[ \t]*(?:\n|\Z)", re.S
+)
+_FENCE = re.compile(r"^\s*(```|~~~)\s*([\w+-]*)")
+_IMAGE = re.compile(r"!\[([^\]\n]*)\](?:\([^)\n]*\)|\[[^\]\n]*\])")
+_DATA_URI = re.compile(r"data:[\w.+-]+/[\w.+-]+(?:;[\w=.+-]+)*,[A-Za-z0-9+/=%]*")
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.S)
+_HTML_DROPPED = re.compile(r"<(script|style|svg|iframe)\b[^>]*>.*?</\1\s*>", re.S | re.I)
+_HTML_IMAGE = re.compile(r"<img\b[^>]*>", re.I)
+_HTML_ALT = re.compile(r"""\balt\s*=\s*["']([^"']*)["']""", re.I)
+_HTML_TAG = re.compile(r"</?[A-Za-z][\w-]*(?:\s[^<>]*)?/?>")
+_LOG_LINE = re.compile(
+    r"^\s*(?:\[?\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}"
+    r"|\[?\d{2}:\d{2}:\d{2}"
+    r"|\[?(?:TRACE|DEBUG|INFO|WARN|WARNING|ERROR|FATAL|CRITICAL)\b"
+    r"|Traceback \(most recent call last\)"
+    r"|at [\w.$<>]+\("
+    r"|File \")"
+)
+_LOG_LANGUAGES = {"log", "logs", "console", "output", "text", "txt", "plaintext"}
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+OMITTED_LINES_TEMPLATE = "…（省略 {count} 行）"
+IMAGE_PLACEHOLDER_TEMPLATE = "[圖片: {alt}]"
+DATA_URI_PLACEHOLDER = "[data URI]"
+
+
+@dataclass
+class SlimStats:
+    """
+    Summary of what the slimming stage removed, for one note or a whole run.
+    """
+
+    notes: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    front_matter: int = 0
+    images: int = 0
+    data_uris: int = 0
+    html_tags: int = 0
+    code_lines_removed: int = 0
+    log_lines_removed: int = 0
+
+    @property
+    def bytes_removed(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    @property
+    def tokens_removed(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def add(self, other: "SlimStats") -> None:
+        """
+        Add the counts of another summary to this one.
+
+        Args:
+            other (SlimStats): Summary to add
+        """
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+class MarkdownSlimmer:
+    """
+    Strip or shorten the heavy parts of a note before it is counted and sent.
+
+    YAML front matter, HTML comments and script/style blocks are dropped.
+    Images, including base64 data URIs, become a short ``[圖片: alt]``
+    placeholder and other HTML tags are reduced to their text. Code blocks
+    keep their first ``code_lines`` lines, and log dumps (fenced or not) their
+    first ``log_lines`` lines, followed by a note of how many were left out.
+    Text inside code blocks is never rewritten otherwise.
+
+    Slimming a note does not depend on other notes, so it can run on any
+    thread.
+
+    Args:
+        code_lines (int, optional): Lines kept per code block. Defaults to 20.
+        log_lines (int, optional): Lines kept per log dump. Defaults to 5.
+    """
+
+    def __init__(self, code_lines: int = 20, log_lines: int = 5):
+        self.code_lines = max(0, code_lines)
+        self.log_lines = max(0, log_lines)
+
+    def slim(self, content: str) -> Tuple[str, SlimStats]:
+        """
+        Slim the content of a single note.
+
+        Args:
+            content (str): Markdown content of the note
+
+        Returns:
+            Tuple[str, SlimStats]: Slimmed content and what was removed from it
+        """
+        stats = SlimStats(notes=1)
+
+        text, front_matter = _FRONT_MATTER.subn("", content)
+        stats.front_matter = front_matter
+
+        parts = []
+        for lines, language in _split_fences(text.split("\n")):
+            if language is None:
+                parts.append(self._slim_text("\n".join(lines), stats))
+            else:
+                parts.append("\n".join(self._slim_code(lines, language, stats)))
+        result = _BLANK_LINES.sub("\n\n", "\n".join(parts)).strip()
+
+        stats.bytes_before = len(content.encode("utf-8"))
+        stats.bytes_after = len(result.encode("utf-8"))
+        stats.tokens_before = estimate_tokens(content)
+        stats.tokens_after = estimate_tokens(result)
+        return result, stats
+
+    def _slim_text(self, text: str, stats: SlimStats) -> str:
+        def image(match: re.Match) -> str:
+            stats.images += 1
+            stats.data_uris += "(data:" in match.group(0)
+            alt = match.group(1).strip()
+            return IMAGE_PLACEHOLDER_TEMPLATE.format(alt=alt) if alt else ""
+
+        def html_image(match: re.Match) -> str:
+            stats.images += 1
+            alt = _HTML_ALT.search(match.group(0))
+            return IMAGE_PLACEHOLDER_TEMPLATE.format(alt=alt.group(1)) if alt else ""
+
+        text = _IMAGE.sub(image, text)
+        text = _HTML_IMAGE.sub(html_image, text)
+        text, count = _DATA_URI.subn(DATA_URI_PLACEHOLDER, text)
+        stats.data_uris += count
+        text, count = _HTML_COMMENT.subn("", text)
+        stats.html_tags += count
+        text, count = _HTML_DROPPED.subn("", text)
+        stats.html_tags += count
+        text, count = _HTML_TAG.subn("", text)
+        stats.html_tags += count
+
+        # Shorten runs of consecutive log lines outside of code blocks
+        kept: List[str] = []
+        run = 0
+        for line in text.split("\n"):
+            if not _LOG_LINE.match(line):
+                if run > self.log_lines:
+                    kept.append(OMITTED_LINES_TEMPLATE.format(count=run - self.log_lines))
+                run = 0
+                kept.append(line)
+                continue
+            run += 1
+            if run <= self.log_lines:
+                kept.append(line)
+            else:
+                stats.log_lines_removed += 1
+        if run > self.log_lines:
+            kept.append(OMITTED_LINES_TEMPLATE.format(count=run - self.log_lines))
+        return "\n".join(kept)
+
+    def _slim_code(self, lines: List[str], language: str, stats: SlimStats) -> List[str]:
+        # lines holds the opening fence, the body and (if present) the closing fence
+        closed = len(lines) > 1 and _FENCE.match(lines[-1]) is not None
+        body = lines[1:-1] if closed else lines[1:]
+
+        is_log = language.lower() in _LOG_LANGUAGES or (
+            body and sum(1 for line in body if _LOG_LINE.match(line)) * 2 > len(body)
+        )
+        limit = self.log_lines if is_log else self.code_lines
+        if len(body) <= limit:
+            return lines
+
+        omitted = len(body) - limit
+        if is_log:
+            stats.log_lines_removed += omitted
+        else:
+            stats.code_lines_removed += omitted
+        kept = [lines[0], *body[:limit], OMITTED_LINES_TEMPLATE.format(count=omitted)]
+        if closed:
+            kept.append(lines[-1])
+        return kept
+
+
+def _split_fences(lines: List[str]) -> List[Tuple[List[str], Optional[str]]]:
+    """
+    Split markdown lines into text runs and fenced code blocks.
+
+    Args:
+        lines (List[str]): Lines of the markdown
+
+    Returns:
+        List[Tuple[List[str], Optional[str]]]: Runs of lines with the code
+        block language ("" if none), or None for text outside code blocks
+    """
+    parts: List[Tuple[List[str], Optional[str]]] = []
+    current: List[str] = []
+    fence: Optional[str] = None
+    language: Optional[str] = None
+
+    for line in lines:
+        match = _FENCE.match(line)
+        if fence is None and match:
+            if current:
+                parts.append((current, None))
+            fence, language, current = match.group(1), match.group(2), [line]
+        elif fence is not None and match and match.group(1) == fence and not match.group(2):
+            current.append(line)
+            parts.append((current, language))
+            fence, language, current = None, None, []
+        else:
+            current.append(line)
+
+    if current:
+        parts.append((current, language))
+    return parts
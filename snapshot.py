@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Tuple
+
+from models import Note
+
+# File layout:
+#   MAGIC
+#   one record per note: u32 length + zlib-compressed UTF-8 body
+#   u32 length + zlib-compressed JSON index (metadata, record offsets, token counts)
+#   u64 offset of the index + MAGIC
+MAGIC = b"HMDSNAP\x01"
+VERSION = 1
+_LENGTH = struct.Struct(">I")
+_FOOTER = struct.Struct(">Q8s")
+
+
+def text_digest(text: str) -> str:
+    """
+    Key of a text in the token counts of a snapshot.
+
+    Args:
+        text (str): Text whose tokens were counted
+
+    Returns:
+        str: SHA-256 hex digest of the UTF-8 text
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SnapshotWriter:
+    """
+    Write the notes of a run to a snapshot file (--export-snapshot).
+
+    Bodies are compressed and appended as they arrive, so the notes are not
+    held in memory. The index is written when the writer is closed, and the
+    file only appears under ``path`` then; a writer left by an exception in
+    its ``with`` block is discarded instead.
+
+    ``add_note`` may be called from several threads.
+
+    Args:
+        path (str): Snapshot file to create
+        manifest (Dict[str, Any]): Arguments of the run, stored for reference
+        token_model (str): Model the token counts come from ("local" for
+            local estimates)
+        level (int, optional): zlib compression level. Defaults to 6.
+    """
+
+    def __init__(self, path: str, manifest: Dict[str, Any], token_model: str, level: int = 6):
+        self.path = path
+        self.manifest = manifest
+        self.token_model = token_model
+        self.level = level
+        self._lock = threading.Lock()
+        self._entries: List[Tuple[int, Dict[str, Any]]] = []
+        self._tokens: Dict[str, int] = {}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(MAGIC)
+        self._offset = len(MAGIC)
+
+    @property
+    def count(self) -> int:
+        """
+        Number of notes written so far.
+
+        Returns:
+            int: Note count
+        """
+        return len(self._entries)
+
+    def add_note(self, note: Note) -> None:
+        """
+        Append a note with its body.
+
+        Args:
+            note (Note): Note with content, as fetched
+        """
+        record = zlib.compress((note.content or "").encode("utf-8"), self.level)
+        metadata = note.to_dict()
+        metadata.pop("content", None)
+        with self._lock:
+            self._file.write(_LENGTH.pack(len(record)))
+            self._file.write(record)
+            self._entries.append((self._offset, metadata))
+            self._offset += _LENGTH.size + len(record)
+
+    def add_count(self, digest: str, tokens: int) -> None:
+        """
+        Record the token count of a text as it was sent for counting.
+
+        Args:
+            digest (str): ``text_digest`` of the counted text
+            tokens (int): Token count
+        """
+        self._tokens[digest] = tokens
+
+    def close(self) -> None:
+        """
+        Write the index and move the file into place.
+        """
+        index = {
+            "version": VERSION,
+            "created_at": int(time.time()),
+            "manifest": self.manifest,
+            "token_model": self.token_model,
+            "notes": [[offset, metadata] for offset, metadata in self._entries],
+            "tokens": self._tokens,
+        }
+        data = zlib.compress(json.dumps(index, ensure_ascii=False).encode("utf-8"), self.level)
+        self._file.write(_LENGTH.pack(len(data)))
+        self._file.write(data)
+        self._file.write(_FOOTER.pack(self._offset, MAGIC))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self) -> None:
+        """
+        Remove the unfinished file.
+        """
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class Snapshot:
+    """
+    Read-only access to a snapshot file (--from-snapshot).
+
+    Opening reads only the index; note bodies are read and decompressed one
+    at a time by ``get_note``, in any order and from several threads.
+
+    Args:
+        path (str): Snapshot file
+
+    Raises:
+        ValueError: If the file is not a snapshot or has an unsupported version
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "rb")
+        try:
+            index = self._read_index()
+        except BaseException:
+            self._file.close()
+            raise
+        self.created_at: int = index["created_at"]
+        self.manifest: Dict[str, Any] = index["manifest"]
+        self.token_model: str = index["token_model"]
+        self.tokens: Dict[str, int] = index["tokens"]
+        self._entries: Dict[str, Tuple[int, Note]] = {}
+        for offset, metadata in index["notes"]:
+            note = Note.from_api(metadata)
+            self._entries[note.id] = (offset, note)
+
+    def _read_index(self) -> Dict[str, Any]:
+        size = self._file.seek(0, os.SEEK_END)
+        self._file.seek(0)
+        if size < len(MAGIC) + _FOOTER.size or self._file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{self.path} is not a note snapshot")
+        self._file.seek(size - _FOOTER.size)
+        index_offset, magic = _FOOTER.unpack(self._file.read(_FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is truncated")
+        index = json.loads(self._read_record(index_offset))
+        if index.get("version") != VERSION:
+            raise ValueError(
+                f"{self.path} has snapshot version {index.get('version')}, expected {VERSION}"
+            )
+        return index
+
+    def _read_record(self, offset: int) -> bytes:
+        with self._lock:
+            self._file.seek(offset)
+            (length,) = _LENGTH.unpack(self._file.read(_LENGTH.size))
+            data = self._file.read(length)
+        return zlib.decompress(data)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def notes(self) -> List[Note]:
+        """
+        Metadata of the notes in the snapshot, without content.
+
+        Returns:
+            List[Note]: Notes in the order they were exported
+        """
+        return [note for _, note in self._entries.values()]
+
+    def get_note(self, note_id: str) -> Note:
+        """
+        Read a note with its body.
+
+        Args:
+            note_id (str): Note ID
+
+        Returns:
+            Note: New record of the note with content
+
+        Raises:
+            KeyError: If the note is not in the snapshot
+        """
+        offset, note = self._entries[note_id]
+        return note.with_content(self._read_record(offset).decode("utf-8"))
+
+    def cached_count(self, count: Callable[[str], int]) -> Callable[[str], int]:
+        """
+        Wrap a token counting function with the counts stored in the snapshot.
+
+        Only use it when counting with ``token_model``.
+
+        Args:
+            count (Callable[[str], int]): Counts tokens of texts not in the snapshot
+
+        Returns:
+            Callable[[str], int]: Count function that reuses stored counts
+        """
+
+        def count_tokens(text: str) -> int:
+            tokens = self.tokens.get(text_digest(text))
+            return count(text) if tokens is None else tokens
+
+        return count_tokens
+
+    def close(self) -> None:
+        """
+        Close the file.
+        """
+        self._file.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
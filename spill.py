@@ -0,0 +1,148 @@
+import mmap
+import tempfile
+from typing import Optional
+
+# Granularity at which read pages are released, the largest folio size
+_RELEASE_WINDOW = 2 * 1024 * 1024
+
+
+class SpilledText:
+    """
+    Note content that was spilled to a ``ContentStore``.
+
+    Only the position of the UTF-8 text in the spill file is kept in memory;
+    ``str()`` reads it back. It stands in for ``Note.content`` wherever the
+    text is consumed through ``str()``, e.g. by ``iter_prompt_segments``.
+
+    Args:
+        store (ContentStore): Store holding the text
+        offset (int): Byte offset in the spill file
+        length (int): Length of the text in bytes
+    """
+
+    __slots__ = ("store", "offset", "length")
+
+    def __init__(self, store: "ContentStore", offset: int, length: int):
+        self.store = store
+        self.offset = offset
+        self.length = length
+
+    def __str__(self) -> str:
+        return self.store.read(self.offset, self.length)
+
+    def __bool__(self) -> bool:
+        return self.length > 0
+
+    def __repr__(self) -> str:
+        return f"SpilledText(offset={self.offset}, length={self.length})"
+
+    def view(self) -> memoryview:
+        """
+        Zero-copy view of the UTF-8 text, see ``ContentStore.view``.
+
+        Returns:
+            memoryview: Read-only bytes of the text
+        """
+        return self.store.view(self.offset, self.length)
+
+
+class ContentStore:
+    """
+    Append-only spill file for note bodies (--spill).
+
+    Bodies are written once as UTF-8 and read back through a read-only
+    memory map, so a run holds offsets instead of every note's text. Pages
+    are released from the process again after each read, which keeps the
+    resident size flat however large the corpus is. The file is unlinked on
+    creation and disappears with the store or the process.
+
+    The store is not thread-safe; the prompt builder uses it from one thread.
+
+    Args:
+        directory (Optional[str], optional): Directory of the spill file.
+            Defaults to the system temporary directory.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._file = tempfile.TemporaryFile(dir=directory, prefix="notes-", suffix=".spill")
+        self._map: Optional[mmap.mmap] = None
+        self.size = 0
+
+    def put(self, text: str) -> SpilledText:
+        """
+        Append a text to the spill file.
+
+        Args:
+            text (str): Text to spill
+
+        Returns:
+            SpilledText: Reference to the spilled text
+        """
+        data = text.encode("utf-8")
+        self._file.write(data)
+        ref = SpilledText(self, self.size, len(data))
+        self.size += len(data)
+        return ref
+
+    def _mapping(self, end: int) -> mmap.mmap:
+        # The map only covers the file as it was when mapped; appended text
+        # needs a new one. Views of the old map keep it alive until released.
+        if self._map is None or end > len(self._map):
+            self._file.flush()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def view(self, offset: int, length: int) -> memoryview:
+        """
+        Zero-copy view of spilled UTF-8 text.
+
+        The view must be released (e.g. with a ``with`` block) before the
+        store is closed.
+
+        Args:
+            offset (int): Byte offset in the spill file
+            length (int): Length in bytes
+
+        Returns:
+            memoryview: Read-only bytes of the text
+        """
+        if length == 0:
+            return memoryview(b"")
+        return memoryview(self._mapping(offset + length))[offset:offset + length]
+
+    def read(self, offset: int, length: int) -> str:
+        """
+        Read spilled text back, decoding it straight from the memory map.
+
+        Args:
+            offset (int): Byte offset in the spill file
+            length (int): Length in bytes
+
+        Returns:
+            str: The text
+        """
+        with self.view(offset, length) as view:
+            text = str(view, "utf-8")
+        if length and hasattr(mmap, "MADV_DONTNEED"):
+            # The pages stay in the page cache but no longer count as resident.
+            # Page cache folios are mapped whole on a fault, so the whole
+            # aligned window around the text is released, not just its pages.
+            start = offset - offset % _RELEASE_WINDOW
+            end = -(-(offset + length) // _RELEASE_WINDOW) * _RELEASE_WINDOW
+            self._map.madvise(mmap.MADV_DONTNEED, start, min(end, len(self._map)) - start)
+        return text
+
+    def close(self) -> None:
+        """
+        Unmap and delete the spill file. Spilled texts can no longer be read.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "ContentStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
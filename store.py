@@ -0,0 +1,367 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from clients.hackmd_client import HackMDClient, date_to_timestamp
+from models import Note
+from pipeline import ordered_map
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    last_changed_at INTEGER NOT NULL,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS notes_created_at ON notes (created_at);
+
+CREATE TABLE IF NOT EXISTS note_folders (
+    note_rowid INTEGER NOT NULL REFERENCES notes (rowid) ON DELETE CASCADE,
+    folder TEXT NOT NULL,
+    PRIMARY KEY (folder, note_rowid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS note_folders_note ON note_folders (note_rowid);
+
+CREATE TABLE IF NOT EXISTS note_tags (
+    note_rowid INTEGER NOT NULL REFERENCES notes (rowid) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, note_rowid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS note_tags_note ON note_tags (note_rowid);
+
+-- External-content FTS index over title and body, kept in sync by triggers.
+-- The trigram tokenizer matches substrings, which also works for Chinese text
+-- that has no word boundaries.
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5 (
+    title, content, content='notes', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts (rowid, title, content)
+    VALUES (new.rowid, new.title, coalesce(new.content, ''));
+END;
+CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, title, content)
+    VALUES ('delete', old.rowid, old.title, coalesce(old.content, ''));
+END;
+-- Only a new title or body is re-indexed; stores created before the trigger
+-- was scoped get it replaced
+DROP TRIGGER IF EXISTS notes_au;
+CREATE TRIGGER notes_au AFTER UPDATE OF title, content ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, title, content)
+    VALUES ('delete', old.rowid, old.title, coalesce(old.content, ''));
+    INSERT INTO notes_fts (rowid, title, content)
+    VALUES (new.rowid, new.title, coalesce(new.content, ''));
+END;
+"""
+
+# Trigram queries need at least three characters
+_MIN_FTS_CHARS = 3
+
+
+class NoteStore:
+    """
+    Local SQLite store of HackMD notes with a full-text index.
+
+    Holds note metadata and bodies with indexed folder, tag and date columns
+    plus an FTS5 index over titles and content, so notes can be selected by
+    keyword or tag without calling the HackMD API. ``sync`` refreshes the
+    store incrementally from HackMD.
+
+    The connection is shared between threads and serialized by a lock.
+
+    Args:
+        path (str): SQLite database file (":memory:" for a temporary store)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "NoteStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def count(self) -> int:
+        """
+        Number of notes in the store.
+
+        Returns:
+            int: Note count
+        """
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM notes").fetchone()[0]
+
+    def upsert(self, notes: Iterable[Note]) -> None:
+        """
+        Insert or update notes.
+
+        Notes without content keep the stored body unless their
+        ``last_changed_at`` changed, in which case the body is cleared so the
+        next sync fetches it again. Unchanged notes are not written, and the
+        body is only rewritten (and re-indexed) when it changes.
+
+        Args:
+            notes (Iterable[Note]): Notes to store
+        """
+        with self._lock, self._conn:
+            for note in notes:
+                row = self._conn.execute(
+                    "SELECT rowid, title, created_at, last_changed_at FROM notes WHERE id = ?",
+                    (note.id,),
+                ).fetchone()
+
+                if row is None:
+                    rowid = self._conn.execute(
+                        "INSERT INTO notes (id, title, created_at, last_changed_at, content) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (note.id, note.title, note.created_at, note.last_changed_at, note.content),
+                    ).lastrowid
+                else:
+                    rowid = row[0]
+                    changed = row[3] != note.last_changed_at
+                    if row[1:] != (note.title, note.created_at, note.last_changed_at):
+                        self._conn.execute(
+                            "UPDATE notes SET title = ?, created_at = ?, last_changed_at = ? "
+                            "WHERE rowid = ?",
+                            (note.title, note.created_at, note.last_changed_at, rowid),
+                        )
+                    if note.content is not None or changed:
+                        # Bodies are compared in SQLite, so unchanged ones are
+                        # neither read nor re-indexed
+                        self._conn.execute(
+                            "UPDATE notes SET content = ? WHERE rowid = ? AND content IS NOT ?",
+                            (note.content, rowid, note.content),
+                        )
+                    folders = {
+                        folder
+                        for (folder,) in self._conn.execute(
+                            "SELECT folder FROM note_folders WHERE note_rowid = ?", (rowid,)
+                        )
+                    }
+                    tags = {
+                        tag
+                        for (tag,) in self._conn.execute(
+                            "SELECT tag FROM note_tags WHERE note_rowid = ?", (rowid,)
+                        )
+                    }
+                    if folders == set(note.folders) and tags == set(note.tags):
+                        continue
+                    self._conn.execute("DELETE FROM note_folders WHERE note_rowid = ?", (rowid,))
+                    self._conn.execute("DELETE FROM note_tags WHERE note_rowid = ?", (rowid,))
+
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO note_folders (note_rowid, folder) VALUES (?, ?)",
+                    [(rowid, folder) for folder in note.folders],
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO note_tags (note_rowid, tag) VALUES (?, ?)",
+                    [(rowid, tag) for tag in note.tags],
+                )
+
+    def delete_missing(self, note_ids: Iterable[str]) -> int:
+        """
+        Delete notes that are not in ``note_ids`` (e.g. deleted on HackMD).
+
+        Args:
+            note_ids (Iterable[str]): IDs of the notes that still exist
+
+        Returns:
+            int: Number of deleted notes
+        """
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_ids (id TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM keep_ids")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO keep_ids (id) VALUES (?)", [(i,) for i in note_ids]
+            )
+            cursor = self._conn.execute(
+                "DELETE FROM notes WHERE id NOT IN (SELECT id FROM keep_ids)"
+            )
+            return cursor.rowcount
+
+    def sync(self, hackmd: HackMDClient, workers: int = 4) -> Dict[str, int]:
+        """
+        Refresh the store from HackMD.
+
+        The listing is always fetched; bodies are fetched only for notes that
+        are new or changed since the last sync.
+
+        Args:
+            hackmd (HackMDClient): HackMD client
+            workers (int, optional): Concurrent body fetches. Defaults to 4.
+
+        Returns:
+            Dict[str, int]: Number of listed, fetched, failed and deleted notes
+        """
+        listing = [Note.from_api(note) for note in hackmd.get_notes()]
+        self.upsert(listing)
+        deleted = self.delete_missing(note.id for note in listing)
+
+        with self._lock:
+            stale = {
+                row[0]
+                for row in self._conn.execute("SELECT id FROM notes WHERE content IS NULL")
+            }
+        to_fetch = [note for note in listing if note.id in stale]
+
+        fetched = failed = 0
+        with ThreadPoolExecutor(max(1, workers), thread_name_prefix="sync") as executor:
+            for meta, data, error in ordered_map(
+                lambda meta: hackmd.get_note_content(meta.id), to_fetch, executor, 4 * workers
+            ):
+                if error is not None:
+                    print(f"Error syncing note {meta.id}: {str(error)}")
+                    failed += 1
+                    continue
+                # The listing entry carries the folders; the body comes from the fetch
+                self.upsert([meta.with_content(data["content"])])
+                fetched += 1
+
+        return {
+            "listed": len(listing),
+            "fetched": fetched,
+            "failed": failed,
+            "deleted": deleted,
+        }
+
+    def select(
+        self,
+        folder_name: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        keyword: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+    ) -> List[Note]:
+        """
+        Select note metadata by folder, date range, keyword and tags.
+
+        Args:
+            folder_name (Optional[str]): Folder the notes must be in
+            start_date (Optional[str]): Start date in YYYY-MM-DD format
+            end_date (Optional[str]): End date in YYYY-MM-DD format
+            keyword (Optional[str]): Text that must appear in the title or body
+            tags (Optional[List[str]]): Tags the notes must all carry
+
+        Returns:
+            List[Note]: Matching notes without content, sorted by creation time
+
+        Raises:
+            ValueError: If no stored note matches
+        """
+        conditions = ["n.content IS NOT NULL"]
+        params: List[Any] = []
+
+        if folder_name is not None:
+            conditions.append(
+                "n.rowid IN (SELECT note_rowid FROM note_folders WHERE folder = ?)"
+            )
+            params.append(folder_name)
+        if start_date is not None:
+            conditions.append("n.created_at >= ?")
+            params.append(date_to_timestamp(start_date))
+        if end_date is not None:
+            conditions.append("n.created_at <= ?")
+            params.append(date_to_timestamp(end_date))
+        for tag in tags or ():
+            conditions.append("n.rowid IN (SELECT note_rowid FROM note_tags WHERE tag = ?)")
+            params.append(tag)
+        if keyword:
+            if len(keyword) >= _MIN_FTS_CHARS:
+                conditions.append(
+                    "n.rowid IN (SELECT rowid FROM notes_fts WHERE notes_fts MATCH ?)"
+                )
+                params.append('"' + keyword.replace('"', '""') + '"')
+            else:
+                conditions.append("(n.title LIKE ? OR n.content LIKE ?)")
+                params.extend([f"%{keyword}%"] * 2)
+
+        query = (
+            "SELECT n.rowid, n.id, n.title, n.created_at, n.last_changed_at FROM notes n "
+            f"WHERE {' AND '.join(conditions)} ORDER BY n.created_at, n.rowid"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            folders = self._related("note_folders", "folder", [row[0] for row in rows])
+            tags_by_row = self._related("note_tags", "tag", [row[0] for row in rows])
+
+        if not rows:
+            raise ValueError(
+                f"No stored notes match folder={folder_name!r}, keyword={keyword!r}, "
+                f"tags={tags!r} between {start_date} and {end_date}"
+            )
+
+        return [
+            Note(
+                id=note_id,
+                title=title,
+                created_at=created_at,
+                last_changed_at=last_changed_at,
+                folders=folders.get(rowid, ()),
+                tags=tags_by_row.get(rowid, ()),
+            )
+            for rowid, note_id, title, created_at, last_changed_at in rows
+        ]
+
+    def get_note(self, note_id: str) -> Note:
+        """
+        Load a stored note including its content.
+
+        Args:
+            note_id (str): HackMD note ID
+
+        Returns:
+            Note: The note
+
+        Raises:
+            Exception: If the note or its content is not stored
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT rowid, title, created_at, last_changed_at, content "
+                "FROM notes WHERE id = ?",
+                (note_id,),
+            ).fetchone()
+            if row is None or not row[4]:
+                raise Exception(f"Note content is not stored - [Note ID: {note_id}]")
+            folders = self._related("note_folders", "folder", [row[0]])
+            tags = self._related("note_tags", "tag", [row[0]])
+
+        rowid, title, created_at, last_changed_at, content = row
+        return Note(
+            id=note_id,
+            title=title,
+            created_at=created_at,
+            last_changed_at=last_changed_at,
+            folders=folders.get(rowid, ()),
+            tags=tags.get(rowid, ()),
+            content=content,
+        )
+
+    def _related(self, table: str, column: str, rowids: List[int]) -> Dict[int, tuple]:
+        # Caller holds the lock
+        related: Dict[int, list] = {}
+        for start in range(0, len(rowids), 500):
+            chunk = rowids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for rowid, value in self._conn.execute(
+                f"SELECT note_rowid, {column} FROM {table} WHERE note_rowid IN ({placeholders})",
+                chunk,
+            ):
+                related.setdefault(rowid, []).append(value)
+        return {rowid: tuple(values) for rowid, values in related.items()}
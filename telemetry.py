@@ -0,0 +1,473 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from deadline import DeadlineExceeded
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    ts REAL NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    latency_ms REAL NOT NULL,
+    ttft_ms REAL,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    error TEXT,
+    cancelled INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS llm_calls_ts ON llm_calls (operation, ts);
+"""
+
+# Calls older than this are pruned from the store
+RETENTION_SECONDS = 14 * 24 * 3600
+# Output tokens assumed for cost estimates before any call was recorded
+DEFAULT_OUTPUT_TOKENS = 4000
+
+_telemetry: Optional["TelemetryStore"] = None
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of a list of values.
+
+    Args:
+        values (List[float]): Values in any order
+        q (float): Percentile between 0 and 100
+
+    Returns:
+        Optional[float]: The percentile, or None for an empty list
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+@dataclass
+class CallStats:
+    """
+    Latency and throughput of the recent calls to one provider and model.
+    """
+
+    provider: str
+    model: str
+    operation: str
+    calls: int = 0
+    errors: int = 0
+    cancelled: int = 0
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    ttft_p50_ms: Optional[float] = None
+    ttft_p95_ms: Optional[float] = None
+    output_tokens_p50: Optional[float] = None
+    tokens_per_second: Optional[float] = None
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.calls if self.calls else 0.0
+
+
+class CallRecord:
+    """
+    Measurements of one LLM call, filled in by the client while it runs.
+    """
+
+    __slots__ = ("start", "ttft_ms", "input_tokens", "output_tokens")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.ttft_ms: Optional[float] = None
+        self.input_tokens: Optional[int] = None
+        self.output_tokens: Optional[int] = None
+
+    def first_token(self) -> None:
+        """
+        Mark the arrival of the first output; later calls are ignored.
+        """
+        if self.ttft_ms is None:
+            self.ttft_ms = (time.perf_counter() - self.start) * 1000
+
+    def set_usage(self, input_tokens: Optional[int], output_tokens: Optional[int]) -> None:
+        """
+        Set the token usage reported by the provider.
+
+        Args:
+            input_tokens (Optional[int]): Prompt tokens
+            output_tokens (Optional[int]): Generated tokens
+        """
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+class TelemetryStore:
+    """
+    Rolling local store of LLM call telemetry.
+
+    Every call is one row with its latency, time to first token, token
+    usage and error. Calls cancelled by the caller (a stream closed early,
+    the run deadline) say nothing about the provider; they are kept apart
+    and left out of the statistics. Rows older than ``retention`` seconds
+    are pruned. The database is only created when the first call is
+    recorded, and the connection is shared between threads and serialized
+    by a lock.
+
+    Args:
+        path (str): SQLite database file (":memory:" for a temporary store)
+        retention (float, optional): Seconds calls are kept. Defaults to RETENTION_SECONDS.
+    """
+
+    def __init__(self, path: str, retention: float = RETENTION_SECONDS):
+        self.path = path
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.executescript(_SCHEMA)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(llm_calls)")]
+            if "cancelled" not in columns:
+                # Stores written before cancelled calls were told apart
+                self._conn.execute(
+                    "ALTER TABLE llm_calls ADD COLUMN cancelled INTEGER NOT NULL DEFAULT 0"
+                )
+            self._prune()
+        return self._conn
+
+    def _prune(self) -> None:
+        self._conn.execute("DELETE FROM llm_calls WHERE ts < ?", (time.time() - self.retention,))
+        self._conn.commit()
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        operation: str,
+        latency_ms: float,
+        ttft_ms: Optional[float] = None,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+        error: Optional[str] = None,
+        ts: Optional[float] = None,
+        cancelled: bool = False,
+    ) -> None:
+        """
+        Record one call.
+
+        Args:
+            provider (str): Provider name
+            model (str): Model name
+            operation (str): "generate" or "count_tokens"
+            latency_ms (float): Wall time of the call
+            ttft_ms (Optional[float]): Time to the first output token, if streamed
+            input_tokens (Optional[int]): Prompt tokens
+            output_tokens (Optional[int]): Generated tokens
+            error (Optional[str]): Error message if the call failed
+            ts (Optional[float]): Unix time of the call. Defaults to now.
+            cancelled (bool, optional): The caller stopped the call, with the
+                reason in ``error``. Defaults to False.
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO llm_calls (ts, provider, model, operation, latency_ms, ttft_ms, "
+                "input_tokens, output_tokens, error, cancelled) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time() if ts is None else ts,
+                    provider,
+                    model,
+                    operation,
+                    latency_ms,
+                    ttft_ms,
+                    input_tokens,
+                    output_tokens,
+                    error,
+                    int(cancelled),
+                ),
+            )
+            conn.commit()
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._prune()
+
+    def stats(
+        self,
+        operation: str = "generate",
+        window: float = 24 * 3600,
+        input_tokens: Optional[Tuple[int, int]] = None,
+    ) -> Dict[Tuple[str, str], CallStats]:
+        """
+        Summarize the recent calls per provider and model.
+
+        Args:
+            operation (str, optional): Operation to summarize. Defaults to "generate".
+            window (float, optional): Seconds to look back. Defaults to one day.
+            input_tokens (Optional[Tuple[int, int]]): Only calls with a prompt
+                size in this inclusive range
+
+        Returns:
+            Dict[Tuple[str, str], CallStats]: Statistics by (provider, model)
+        """
+        query = (
+            "SELECT provider, model, latency_ms, ttft_ms, output_tokens, error, cancelled "
+            "FROM llm_calls WHERE operation = ? AND ts >= ?"
+        )
+        params: List[Any] = [operation, time.time() - window]
+        if input_tokens is not None:
+            query += " AND input_tokens BETWEEN ? AND ?"
+            params.extend(input_tokens)
+
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+
+        grouped: Dict[Tuple[str, str], List[Tuple]] = {}
+        for provider, model, *row in rows:
+            grouped.setdefault((provider, model), []).append(row)
+
+        result = {}
+        for (provider, model), rows in grouped.items():
+            calls = [row for row in rows if not row[4]]
+            ok = [call for call in calls if call[3] is None]
+            latencies = [call[0] for call in ok]
+            ttfts = [call[1] for call in ok if call[1] is not None]
+            outputs = [call[2] for call in ok if call[2]]
+            # Generation speed after the first token of streamed calls
+            rates = [
+                call[2] / ((call[0] - call[1]) / 1000)
+                for call in ok
+                if call[1] is not None and call[2] and call[0] > call[1]
+            ]
+            result[(provider, model)] = CallStats(
+                provider=provider,
+                model=model,
+                operation=operation,
+                calls=len(calls),
+                errors=len(calls) - len(ok),
+                cancelled=len(rows) - len(calls),
+                p50_ms=percentile(latencies, 50),
+                p95_ms=percentile(latencies, 95),
+                ttft_p50_ms=percentile(ttfts, 50),
+                ttft_p95_ms=percentile(ttfts, 95),
+                output_tokens_p50=percentile(outputs, 50),
+                tokens_per_second=percentile(rates, 50),
+            )
+        return result
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def configure_telemetry(path: Optional[str]) -> Optional[TelemetryStore]:
+    """
+    Set the global telemetry store that LLM clients record their calls to.
+
+    Args:
+        path (Optional[str]): Database file; empty or None disables recording
+
+    Returns:
+        Optional[TelemetryStore]: The new store, or None if disabled
+    """
+    global _telemetry
+    if _telemetry is not None:
+        _telemetry.close()
+    _telemetry = TelemetryStore(path) if path else None
+    return _telemetry
+
+
+def get_telemetry() -> Optional[TelemetryStore]:
+    """
+    Get the global telemetry store.
+
+    Returns:
+        Optional[TelemetryStore]: The store, or None if recording is disabled
+    """
+    return _telemetry
+
+
+@contextmanager
+def record_call(provider: str, model: str, operation: str) -> Iterator[CallRecord]:
+    """
+    Time an LLM call and record it in the global telemetry store.
+
+    Failed calls are recorded with their error and the exception is re-raised.
+    A streamed call closed before its end (``GeneratorExit``), interrupted or
+    aborted by the run deadline is recorded as cancelled, not as a success or
+    an error of the provider.
+
+    Args:
+        provider (str): Provider name
+        model (str): Model name
+        operation (str): "generate" or "count_tokens"
+
+    Yields:
+        CallRecord: Record for the client to fill in
+    """
+    call = CallRecord()
+    error = None
+    cancelled = False
+    try:
+        yield call
+    except (GeneratorExit, KeyboardInterrupt, DeadlineExceeded) as e:
+        error = str(e) or type(e).__name__
+        cancelled = True
+        raise
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        raise
+    finally:
+        store = get_telemetry()
+        if store is not None:
+            try:
+                store.record(
+                    provider=provider,
+                    model=model,
+                    operation=operation,
+                    latency_ms=(time.perf_counter() - call.start) * 1000,
+                    ttft_ms=call.ttft_ms,
+                    input_tokens=call.input_tokens,
+                    output_tokens=call.output_tokens,
+                    error=error,
+                    cancelled=cancelled,
+                )
+            except sqlite3.Error as e:
+                print(f"Warning: Failed to record LLM telemetry: {str(e)}")
+
+
+def choose_provider(
+    candidates: Dict[str, str],
+    prompt_tokens: int,
+    store: Optional[TelemetryStore] = None,
+    prices: Optional[Dict[str, Tuple[float, float]]] = None,
+    max_cost: Optional[float] = None,
+    window: float = 24 * 3600,
+    min_samples: int = 3,
+    max_error_rate: float = 0.5,
+) -> Tuple[str, str]:
+    """
+    Pick the provider with the lowest recent latency for a prompt size.
+
+    Each candidate is scored by p50 + p95 latency of its recent successful
+    generations with a prompt between half and twice ``prompt_tokens``, or of
+    all its recent generations if there are fewer than ``min_samples`` of
+    those. Candidates that mostly failed recently, or whose estimated cost
+    exceeds ``max_cost``, are skipped. Candidates without enough samples rank
+    after measured ones, in the order given.
+
+    Args:
+        candidates (Dict[str, str]): Model of each configured provider, in
+            order of preference
+        prompt_tokens (int): Size of the prompt
+        store (Optional[TelemetryStore]): Telemetry to rank by
+        prices (Optional[Dict[str, Tuple[float, float]]]): Input and output
+            USD per million tokens by provider
+        max_cost (Optional[float]): Highest estimated USD per call
+        window (float, optional): Seconds of telemetry to use. Defaults to one day.
+        min_samples (int, optional): Calls needed to rank a provider. Defaults to 3.
+        max_error_rate (float, optional): Error rate above which a provider is
+            skipped. Defaults to 0.5.
+
+    Returns:
+        Tuple[str, str]: Chosen provider and the reason for the choice
+
+    Raises:
+        ValueError: If no candidate is within the cost limit
+    """
+    similar, overall = {}, {}
+    if store is not None:
+        similar = store.stats(window=window, input_tokens=(prompt_tokens // 2, prompt_tokens * 2))
+        overall = store.stats(window=window)
+    prices = prices or {}
+
+    ranked = []
+    skipped = []
+    for order, (provider, model) in enumerate(candidates.items()):
+        # Failed calls have no token counts, so errors are judged over all sizes
+        recent = overall.get((provider, model))
+        if recent is not None and recent.calls >= min_samples and recent.error_rate > max_error_rate:
+            skipped.append(f"{provider}: {recent.error_rate:.0%} errors")
+            continue
+
+        stats = similar.get((provider, model))
+        if stats is None or stats.calls - stats.errors < min_samples:
+            stats = recent
+
+        if max_cost is not None and provider in prices:
+            input_price, output_price = prices[provider]
+            output_tokens = (stats.output_tokens_p50 if stats else None) or DEFAULT_OUTPUT_TOKENS
+            cost = (prompt_tokens * input_price + output_tokens * output_price) / 1_000_000
+            if cost > max_cost:
+                skipped.append(f"{provider}: ~${cost:.2f} over limit")
+                continue
+
+        if stats is not None and stats.calls - stats.errors >= min_samples:
+            ranked.append((0, stats.p50_ms + stats.p95_ms, order, provider, stats))
+        else:
+            ranked.append((1, 0.0, order, provider, None))
+
+    if not ranked:
+        raise ValueError(f"No LLM provider within the limits ({'; '.join(skipped)})")
+
+    _, _, _, provider, stats = min(ranked)
+    if stats is None:
+        reason = "no recent telemetry"
+    else:
+        reason = f"p50 {stats.p50_ms / 1000:.1f}s, p95 {stats.p95_ms / 1000:.1f}s over {stats.calls} calls"
+    if skipped:
+        reason += f"; skipped {', '.join(skipped)}"
+    return provider, reason
+
+
+def format_stats(stats: List[CallStats]) -> str:
+    """
+    Format call statistics as a text table.
+
+    Args:
+        stats (List[CallStats]): Statistics to show
+
+    Returns:
+        str: Table with one row per provider, model and operation
+    """
+
+    def seconds(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value / 1000:.2f}s"
+
+    header = ("provider", "model", "operation", "calls", "errors", "p50", "p95", "ttft p50", "ttft p95", "tok/s")
+    rows = [header]
+    for s in stats:
+        rows.append(
+            (
+                s.provider,
+                s.model,
+                s.operation,
+                str(s.calls),
+                f"{s.errors} ({s.error_rate:.0%})",
+                seconds(s.p50_ms),
+                seconds(s.p95_ms),
+                seconds(s.ttft_p50_ms),
+                seconds(s.ttft_p95_ms),
+                "-" if s.tokens_per_second is None else f"{s.tokens_per_second:.0f}",
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows
+    )
@@ -6,6 +6,7 @@ This tests the integration without requiring actual API calls.
 
 import os
 import sys
+import tempfile
 from unittest.mock import patch, MagicMock
 from datetime import datetime
 
@@ -45,6 +46,14 @@ def test_simple_workflow():
         "--year-tag",
         "2024",
     ]
+    # Checkpoints and queued uploads go to a scratch directory
+    workdir = tempfile.TemporaryDirectory()
+    test_args += [
+        "--checkpoint-dir",
+        os.path.join(workdir.name, "checkpoints"),
+        "--outbox-dir",
+        os.path.join(workdir.name, "outbox"),
+    ]
 
     # Mock note data
     mock_note = {
@@ -58,6 +67,7 @@ def test_simple_workflow():
     }
 
     with (
+        workdir,
         patch.dict(os.environ, test_env, clear=True),
         patch("sys.argv", ["main.py"] + test_args),
     ):
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+import config
+
+
+@pytest.fixture(autouse=True)
+def data_home(tmp_path, monkeypatch):
+    """Keep default checkpoints, outbox, profiles and telemetry out of the project root."""
+    home = tmp_path / "home"
+    # Tests replace os.environ wholesale, so the default is patched rather
+    # than REPORT_GENERATOR_HOME set
+    monkeypatch.setattr(config, "data_path", lambda name: os.path.join(home, name))
+    return home
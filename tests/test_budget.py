@@ -0,0 +1,88 @@
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+import budget
+from budget import abstract_note, relevance_score, select_notes_within_budget
+from models import Note
+
+
+def _notes(count: int) -> list:
+    return [
+        Note(
+            id=f"note{i}",
+            title=f"Week {i}",
+            content=(
+                f"## 完成事項\n- [x] 完成功能 {i}，效能提升 20%\n- 修正 #{100 + i}\n"
+                + "\n".join(f"- 例行工作項目 {j}" for j in range(20))
+                + "\n## 下週計畫\n"
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def test_selection_stays_within_budget():
+    """Test that the selected notes never exceed the token budget."""
+    notes = _notes(10)
+    counts = [200] * len(notes)
+
+    selected, allocations = select_notes_within_budget(notes, counts, max_tokens=900)
+
+    assert sum(allocation.tokens for allocation in allocations) <= 900
+    assert len(selected) == sum(1 for a in allocations if a.mode != "dropped")
+    assert [note.id for note in selected] == sorted(note.id for note in selected)
+
+
+def test_everything_fits_keeps_all_notes_whole():
+    """Test that notes are kept whole when the budget is large enough."""
+    notes = _notes(3)
+
+    _, allocations = select_notes_within_budget(notes, [100] * 3, max_tokens=10000)
+
+    assert [allocation.mode for allocation in allocations] == ["full"] * 3
+
+
+def test_empty_template_sections_are_dropped():
+    """Test that kept notes lose their empty template headings."""
+    selected, _ = select_notes_within_budget(_notes(1), [100], max_tokens=10000)
+
+    assert "## 下週計畫" not in selected[0].content
+
+
+def test_recent_notes_are_preferred():
+    """Test that with identical notes the most recent ones stay whole."""
+    notes = _notes(6)
+    for note in notes:
+        note.content = notes[0].content
+
+    _, allocations = select_notes_within_budget(notes, [200] * 6, max_tokens=600)
+
+    assert allocations[-1].mode == "full"
+    assert allocations[0].mode != "full"
+
+
+def test_greedy_solver_stays_within_budget():
+    """Test the greedy fallback used for very large corpora."""
+    notes = _notes(30)
+
+    with patch.object(budget, "_DP_CELL_LIMIT", 0):
+        _, allocations = select_notes_within_budget(notes, [150] * 30, max_tokens=1000)
+
+    assert sum(allocation.tokens for allocation in allocations) <= 1000
+    assert any(allocation.mode != "dropped" for allocation in allocations)
+
+
+def test_abstract_keeps_signal_lines():
+    """Test that abstracts keep headings and finished items only."""
+    content = "## 完成事項\n- [x] 上線新版服務\n- 例行會議\n## 其他\n- 閒聊"
+
+    assert abstract_note(content) == "## 完成事項\n- [x] 上線新版服務"
+
+
+def test_relevance_score_rewards_signals_and_recency():
+    """Test that signals and recency both raise the score."""
+    plain = relevance_score("- 例行會議", 0, 10)
+
+    assert relevance_score("- [x] 完成 #12 提升 30%", 0, 10) > plain
+    assert relevance_score("- 例行會議", 9, 10) > plain
@@ -0,0 +1,136 @@
+import argparse
+import os
+import pytest
+import sys
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from checkpoint import Checkpoint, atomic_write, run_id_for
+from main import main
+
+
+def _args(**overrides) -> argparse.Namespace:
+    values = {
+        "start_date": "2024-01-01",
+        "end_date": "2024-12-31",
+        "folder_name": "Test Folder",
+        "max_tokens": 1000,
+        "llm_provider": "openai",
+        "year_tag": "2024",
+        "fetch_workers": 4,
+    }
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+def test_run_id_ignores_operational_arguments():
+    """Test that only report-defining arguments change the run ID."""
+    assert run_id_for(_args(), "gpt-4") == run_id_for(_args(fetch_workers=8), "gpt-4")
+    assert run_id_for(_args(), "gpt-4") != run_id_for(_args(max_tokens=5), "gpt-4")
+    assert run_id_for(_args(), "gpt-4") != run_id_for(_args(), "gpt-4o")
+
+
+def test_run_id_depends_on_note_source():
+    """Test that runs reading notes from a store or a snapshot get their own run ID."""
+    run_ids = {
+        run_id_for(_args(), "gpt-4"),
+        run_id_for(_args(store="notes.db"), "gpt-4"),
+        run_id_for(_args(from_snapshot="notes.snap"), "gpt-4"),
+    }
+    assert len(run_ids) == 3
+
+
+def test_atomic_write_leaves_no_temporary_files(tmp_path):
+    """Test that atomic writes replace the file and clean up."""
+    path = str(tmp_path / "run" / "prompt.md")
+    atomic_write(path, b"old")
+    atomic_write(path, b"new")
+
+    with open(path, "rb") as f:
+        assert f.read() == b"new"
+    assert os.listdir(tmp_path / "run") == ["prompt.md"]
+
+
+def test_cached_fetch_and_count(tmp_path):
+    """Test that fetched notes and token counts are reused from disk."""
+    checkpoint = Checkpoint(str(tmp_path), "run")
+    fetch = MagicMock(return_value={"id": "n1", "content": "hello"})
+    count = MagicMock(return_value=7)
+
+    for _ in range(2):
+        note = checkpoint.cached_fetch(fetch)("n1")
+        tokens = checkpoint.cached_count(count)(note["content"])
+
+    assert note == {"id": "n1", "content": "hello"}
+    assert tokens == 7
+    fetch.assert_called_once_with("n1")
+    count.assert_called_once_with("hello")
+
+
+def test_cache_entries_are_not_fsynced_and_tolerate_truncation(tmp_path):
+    """Test that note cache writes skip fsync and a truncated entry is fetched again."""
+    checkpoint = Checkpoint(str(tmp_path), "run")
+    fetch = MagicMock(return_value={"id": "n1", "content": "hello"})
+    with patch("checkpoint.os.fsync") as fsync:
+        checkpoint.cached_fetch(fetch)("n1")
+    fsync.assert_not_called()
+
+    with open(tmp_path / "run" / "notes" / "n1.json", "w") as f:
+        f.write("")
+    assert checkpoint.cached_fetch(fetch)("n1") == {"id": "n1", "content": "hello"}
+    assert fetch.call_count == 2
+
+
+def test_resume_skips_completed_stages(tmp_path):
+    """Test that a run interrupted during generation resumes without refetching."""
+    test_env = {
+        "HACKMD_API_TOKEN": "test_token",
+        "OPENAI_API_KEY": "test_openai_key",
+        "OPENAI_MODEL": "gpt-4",
+    }
+    test_args = [
+        "--start-date", "2024-01-01",
+        "--end-date", "2024-01-31",
+        "--folder-name", "Test Folder",
+        "--max-tokens", "10000",
+        "--llm-provider", "openai",
+        "--year-tag", "2024",
+        "--checkpoint-dir", str(tmp_path / "checkpoints"),
+        "--outbox-dir", str(tmp_path / "outbox"),
+    ]
+    mock_note = {
+        "id": "test_note_id",
+        "title": "Test Note",
+        "createdAt": 1704067200000,
+        "folderPaths": [{"name": "Test Folder"}],
+        "content": "Test content",
+    }
+
+    with (
+        patch.dict(os.environ, test_env, clear=True),
+        patch("main.HackMDClient") as mock_hackmd,
+        patch("main.create_llm_client") as mock_llm_factory,
+        patch("main.save_local_report", return_value="report.md"),
+        patch("builtins.print"),
+    ):
+        hackmd = mock_hackmd.return_value
+        hackmd.get_notes.return_value = [mock_note]
+        hackmd.filter_notes_by_folder_and_date.return_value = [mock_note]
+        hackmd.get_note_content.return_value = mock_note
+        llm = mock_llm_factory.return_value
+        llm.count_tokens.return_value = 10
+        llm.generate.side_effect = [Exception("timeout"), "# Report"]
+
+        with patch("sys.argv", ["main.py"] + test_args), pytest.raises(SystemExit):
+            main()
+
+        with patch("sys.argv", ["main.py"] + test_args + ["--resume"]):
+            main()
+
+        hackmd.get_notes.assert_called_once()
+        hackmd.get_note_content.assert_called_once()
+        llm.count_tokens.assert_called_once()
+        assert llm.generate.call_count == 2
+        assert llm.generate.call_args_list[0] == llm.generate.call_args_list[1]
+        hackmd.upload_note.assert_called_once()
+        assert os.listdir(tmp_path / "checkpoints") == []
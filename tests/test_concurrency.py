@@ -0,0 +1,102 @@
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from clients.hackmd_client import HackMDAPIError, HackMDClient
+from concurrency import AIMDLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_limit_grows_additively_only_while_saturated():
+    """Test that the limit grows by one per ``limit`` healthy calls with every slot in use."""
+    clock = FakeClock()
+    limiter = AIMDLimiter(initial=2, max_limit=3, clock=clock)
+
+    # One call at a time never uses both slots
+    for _ in range(4):
+        limiter.release(limiter.acquire(), latency=0.1)
+    assert limiter.limit == 2
+
+    for _ in range(4):
+        tokens = [limiter.acquire(), limiter.acquire()]
+        for token in tokens:
+            limiter.release(token, latency=0.1)
+    assert limiter.limit == 3
+    assert [step[1:] for step in limiter.trajectory] == [(2, "start"), (3, "increase")]
+
+
+def test_burst_of_throttled_calls_halves_limit_once():
+    """Test that 429s from calls started before a decrease lower the limit only once."""
+    limiter = AIMDLimiter(initial=8, clock=FakeClock())
+    throttled = HackMDAPIError("slow down", status_code=429, retry_after=1.0)
+
+    tokens = [limiter.acquire() for _ in range(8)]
+    for token in tokens:
+        limiter.release(token, error=throttled)
+    assert limiter.limit == 4
+    assert limiter.backoffs == 1
+
+    limiter.release(limiter.acquire(), error=throttled)
+    assert limiter.limit == 2
+    assert limiter.trajectory[-1][1:] == (2, "HTTP 429")
+
+    # Errors that are not overload leave the limit alone
+    limiter.release(limiter.acquire(), error=HackMDAPIError("gone", status_code=404))
+    assert limiter.limit == 2
+
+
+def test_latency_spike_counts_as_overload():
+    """Test that a latency far above the smoothed latency lowers the limit."""
+    limiter = AIMDLimiter(initial=4, latency_factor=3.0, clock=FakeClock())
+    for _ in range(5):
+        limiter.release(limiter.acquire(), latency=0.1)
+    limiter.release(limiter.acquire(), latency=0.25)
+    assert limiter.limit == 4
+
+    limiter.release(limiter.acquire(), latency=1.0)
+    assert limiter.limit == 2
+    assert limiter.trajectory[-1][2] == "latency 1000 ms"
+
+
+def test_wrap_retries_throttled_calls_after_retry_after():
+    """Test that wrapped calls are retried on 429 and other errors are raised."""
+    sleep = MagicMock()
+    limiter = AIMDLimiter(initial=4, clock=FakeClock(), sleep=sleep)
+    fetch = MagicMock(
+        side_effect=[HackMDAPIError("slow down", status_code=429, retry_after=2.0), {"id": "a"}]
+    )
+
+    assert limiter.wrap(fetch)("a") == {"id": "a"}
+    sleep.assert_called_once_with(2.0)
+    assert limiter.limit == 2
+
+    failing = limiter.wrap(MagicMock(side_effect=HackMDAPIError("gone", status_code=404)))
+    with pytest.raises(HackMDAPIError):
+        failing("b")
+    assert sleep.call_count == 1
+
+
+def test_get_note_content_reports_throttling():
+    """Test that a 429 from HackMD raises an overloaded error with Retry-After."""
+    client = HackMDClient("token")
+    response = requests.Response()
+    response.status_code = 429
+    response.headers["Retry-After"] = "3"
+    response.url = "https://api.hackmd.io/v1/notes/a"
+    response._content = b""
+    with patch.object(client.session, "request", return_value=response):
+        with pytest.raises(HackMDAPIError) as error:
+            client.get_note_content("a")
+    assert error.value.overloaded
+    assert error.value.retry_after == 3.0
+    assert "Note ID: a" in str(error.value)
@@ -0,0 +1,191 @@
+import argparse
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import anthropic
+import httpx
+import openai
+import pytest
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from checkpoint import Checkpoint
+from clients.llm.claude_client import ClaudeClient
+from clients.llm.openai_client import OpenAIClient
+from deadline import Deadline, DeadlineExceeded, configure_deadline
+from main import PARTIAL_NOTICE, generate_report_sections, main, plan_generation
+from models import Note
+from telemetry import configure_telemetry
+from utils import REPORT_SECTIONS, build_prompt, estimate_tokens
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_stage_budgets_share_the_remaining_time():
+    """Test that stages get their share and unused time carries over."""
+    clock = FakeClock()
+    deadline = Deadline(100, shares=(("fetch", 0.25), ("generate", 0.5), ("upload", 0.25)), clock=clock)
+
+    with deadline.stage("fetch"):
+        assert deadline.timeout(60) == 25
+        clock.now = 10
+        assert deadline.timeout() == 15
+        clock.now = 25
+        with pytest.raises(DeadlineExceeded, match="fetch"):
+            deadline.timeout(30)
+
+    # Fetch used all of its 25s: generate gets 2/3 of the 75s left
+    with deadline.stage("generate"):
+        assert deadline.stage_remaining() == 50
+        clock.now = 35
+    # Generate finished early, so upload gets everything that is left
+    with deadline.stage("upload"):
+        assert deadline.stage_remaining() == 65
+
+    unlimited = Deadline(None)
+    with unlimited.stage("fetch"):
+        assert unlimited.timeout(30) == 30
+        assert unlimited.timeout() is None
+        unlimited.check()
+
+
+@pytest.mark.parametrize(
+    "client_class, api_error",
+    [(ClaudeClient, anthropic.APITimeoutError), (OpenAIClient, openai.APITimeoutError)],
+)
+def test_count_tokens_fallback_respects_the_deadline(client_class, api_error):
+    """Test that a failed count is estimated locally, unless the stage budget ran out."""
+    client = client_class(api_key="test", model="test-model")
+    api = MagicMock()
+    api.messages.count_tokens.side_effect = api_error(request=httpx.Request("POST", "http://test"))
+    api.responses.input_tokens.count.side_effect = api.messages.count_tokens.side_effect
+    client._api = MagicMock(return_value=api)
+    clock = FakeClock()
+    deadline = Deadline(10, clock=clock)
+    text = "本週完成部署 and the rollout"
+
+    with patch(f"{client_class.__module__}.get_deadline", return_value=deadline), patch("builtins.print"):
+        assert client.count_tokens(text) == estimate_tokens(text)
+        clock.now = 20
+        with pytest.raises(DeadlineExceeded):
+            client.count_tokens(text)
+
+
+def test_plan_generation_falls_back_when_time_is_short(tmp_path):
+    """Test the fast model and section-parallel fallbacks."""
+    store = configure_telemetry(":memory:")
+    deadline = configure_deadline(100)
+    try:
+        for _ in range(3):
+            store.record("claude", "claude-big", "generate", latency_ms=300000, input_tokens=20)
+        llm = MagicMock()
+        llm.get_provider_name.return_value = "claude"
+        llm.get_model_name.return_value = "claude-big"
+        args = argparse.Namespace(parallel_sections=False)
+        prompt = "x" * 80
+
+        with deadline.stage("generate"):
+            env = {"CLAUDE_API_KEY": "key", "CLAUDE_FAST_MODEL": "claude-small"}
+            with patch.dict(os.environ, env), patch("main.create_llm_client") as factory:
+                fast, parallel = plan_generation(args, llm, prompt)
+            factory.assert_called_once_with(provider="claude", api_key="key", model="claude-small")
+            assert (fast, parallel) == (factory.return_value, False)
+
+            with patch.dict(os.environ, {"CLAUDE_FAST_MODEL": ""}):
+                assert plan_generation(args, llm, prompt) == (llm, True)
+
+            # Telemetry says the call fits
+            llm.get_model_name.return_value = "claude-unmeasured"
+            assert plan_generation(args, llm, prompt) == (llm, False)
+    finally:
+        configure_telemetry(None)
+        configure_deadline(None)
+
+
+def test_sections_keep_finished_work_at_the_deadline(tmp_path):
+    """Test that sections out of time are replaced and the run is marked partial."""
+    deadline = configure_deadline(100)
+    try:
+        late = REPORT_SECTIONS[2][0]
+
+        def generate_with_context(context, instruction):
+            if late in instruction:
+                raise DeadlineExceeded("generate")
+            heading = next(h for h, _ in REPORT_SECTIONS if h in instruction)
+            return f"# {heading}\nbody"
+
+        llm = MagicMock()
+        llm.generate_with_context.side_effect = generate_with_context
+        prompt = build_prompt([Note(id="n1", title="Week 1", created_at=1704067200000, content="Did A")])
+
+        report = generate_report_sections(llm, prompt, Checkpoint(str(tmp_path), "run"))
+
+        assert report.count("body") == len(REPORT_SECTIONS) - 1
+        assert f"# {late}\n\n（因執行時限未產生" in report
+        assert deadline.partial == ["1 sections not generated"]
+    finally:
+        configure_deadline(None)
+
+
+def test_main_saves_partial_report_and_exits_with_status_2(tmp_path):
+    """Test that a generation cut off by --deadline is saved, marked and resumable."""
+    test_env = {"HACKMD_API_TOKEN": "test_token", "CLAUDE_API_KEY": "key", "CLAUDE_MODEL": "claude-x"}
+    test_args = [
+        "main.py",
+        "--start-date", "2024-01-01",
+        "--end-date", "2024-01-31",
+        "--folder-name", "Test Folder",
+        "--max-tokens", "10000",
+        "--llm-provider", "claude",
+        "--year-tag", "2024",
+        "--checkpoint-dir", str(tmp_path / "checkpoints"),
+        "--outbox-dir", str(tmp_path / "outbox"),
+        "--telemetry-db", "",
+        "--deadline", "600",
+    ]
+    mock_note = {
+        "id": "test_note_id",
+        "title": "Test Note",
+        "createdAt": 1704067200000,
+        "folderPaths": [{"name": "Test Folder"}],
+        "content": "Test content",
+    }
+
+    def stream(prompt):
+        yield "# 一、年度重點成就摘要\n"
+        raise DeadlineExceeded("generate")
+
+    with (
+        patch.dict(os.environ, test_env, clear=True),
+        patch("sys.argv", test_args),
+        patch("main.HackMDClient") as mock_hackmd,
+        patch("main.create_llm_client") as mock_llm_factory,
+        patch("main.save_local_report", return_value="report.md") as mock_save,
+        patch("builtins.print"),
+    ):
+        hackmd = mock_hackmd.return_value
+        hackmd.get_notes.return_value = [mock_note]
+        hackmd.filter_notes_by_folder_and_date.return_value = [mock_note]
+        hackmd.get_note_content.return_value = mock_note
+        hackmd.upload_note.return_value = "https://hackmd.io/report"
+        mock_llm_factory.return_value.count_tokens.return_value = 10
+        mock_llm_factory.return_value.stream.side_effect = stream
+
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+
+    assert exit_info.value.code == 2
+    content = mock_save.call_args.kwargs["content"]
+    assert content.startswith("# 一、年度重點成就摘要")
+    assert content.rstrip().endswith(PARTIAL_NOTICE)
+    # The checkpoint stays for --resume, without the partial report
+    run_dirs = list((tmp_path / "checkpoints").iterdir())
+    assert len(run_dirs) == 1
+    assert (run_dirs[0] / "prompt.md").exists()
+    assert not (run_dirs[0] / "report.md").exists()
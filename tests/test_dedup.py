@@ -0,0 +1,92 @@
+import sys
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from dedup import (
+    BoilerplateDeduplicator,
+    MinHasher,
+    OMITTED_NOTE_PLACEHOLDER,
+    dedupe_notes,
+    drop_empty_sections,
+)
+from models import Note
+
+
+def test_repeated_template_lines_are_removed():
+    """Test that carry-over items disappear after their first occurrence."""
+    first = "## 完成事項\n- [x] 完成 A\n\n## 進行中\n- [ ] 長期研究計畫 B"
+    second = "## 完成事項\n- [x] 完成 C\n\n## 進行中\n- [ ] 長期研究計畫 B"
+
+    (note1, note2), stats = dedupe_notes(
+        [Note(id="1", content=first), Note(id="2", content=second)]
+    )
+
+    assert note1.content == first
+    assert note2.content == "## 完成事項\n- [x] 完成 C"
+    assert stats.lines_removed == 1
+    assert stats.tokens_saved > 0
+
+
+def test_changed_checklist_state_is_kept():
+    """Test that an item that got checked off is not treated as a duplicate."""
+    deduplicator = BoilerplateDeduplicator()
+    deduplicator.dedupe("- [ ] Ship release 1.2")
+
+    assert deduplicator.dedupe("- [x] Ship release 1.2") == "- [x] Ship release 1.2"
+
+
+def test_near_duplicate_paragraph_is_removed():
+    """Test that a slightly edited paragraph is collapsed via MinHash."""
+    paragraph = (
+        "This week I kept working on the data pipeline refactoring, "
+        "moving the batch writers to the new storage layer and fixing tests"
+    )
+    deduplicator = BoilerplateDeduplicator(threshold=0.7)
+    deduplicator.dedupe(f"## Ongoing\n{paragraph}.")
+
+    result = deduplicator.dedupe(f"## Ongoing\n{paragraph}!\n\n## New\nStarted X")
+
+    assert result == "## New\nStarted X"
+    assert deduplicator.stats.paragraphs_removed == 1
+
+
+def test_window_limits_comparison():
+    """Test that lines older than the window are allowed to reappear."""
+    deduplicator = BoilerplateDeduplicator(window=1)
+    deduplicator.dedupe("- item A")
+    deduplicator.dedupe("- item B")
+
+    assert deduplicator.dedupe("- item A") == "- item A"
+
+
+def test_fully_duplicated_note_gets_placeholder():
+    """Test that a note with nothing new keeps a placeholder instead of vanishing."""
+    deduplicator = BoilerplateDeduplicator()
+    deduplicator.dedupe("## 進行中\n- 長期研究計畫 B")
+
+    assert deduplicator.dedupe("## 進行中\n- 長期研究計畫 B") == OMITTED_NOTE_PLACEHOLDER
+
+
+def test_code_blocks_are_not_mangled():
+    """Test that lines inside code fences are never dropped individually."""
+    deduplicator = BoilerplateDeduplicator()
+    deduplicator.dedupe("```python\n# setup\nx = 1\n```")
+
+    result = deduplicator.dedupe("```python\n# setup\nx = 2\n```")
+
+    assert result == "```python\n# setup\nx = 2\n```"
+
+
+def test_drop_empty_sections():
+    """Test that headings without content are removed but parents with content stay."""
+    content = "# Title\n## Empty\n\n## Full\n### Sub\n- item\n## Trailing"
+
+    assert drop_empty_sections(content) == "# Title\n\n## Full\n### Sub\n- item"
+
+
+def test_minhash_similarity():
+    """Test MinHash similarity on identical and unrelated texts."""
+    hasher = MinHasher()
+    text = "完成資料前處理流程的重構並與客戶確認需求"
+
+    assert hasher.similarity(hasher.signature(text), hasher.signature(text)) == 1.0
+    assert hasher.similarity(hasher.signature(text), hasher.signature("unrelated words")) == 0.0
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from clients.llm import DeferredLLMClient
+
+
+def test_deferred_client_is_created_and_prewarmed_in_background():
+    """Test that callers only wait for the client when they use it."""
+    release = threading.Event()
+    client = MagicMock()
+    client.count_tokens.return_value = 42
+
+    def factory():
+        release.wait(5)
+        return client
+
+    deferred = DeferredLLMClient(factory, provider="claude", model="claude-test")
+
+    # Names are known without waiting for the client
+    assert deferred.get_provider_name() == "claude"
+    assert deferred.get_model_name() == "claude-test"
+    assert not deferred._future.done()
+
+    release.set()
+    assert deferred.count_tokens("text") == 42
+    client.prewarm.assert_called_once_with()
+    client.count_tokens.assert_called_once_with("text")
+
+
+def test_deferred_client_raises_creation_errors_on_use():
+    """Test that a failed client construction surfaces at the first call."""
+    def factory():
+        raise ValueError("bad key")
+
+    deferred = DeferredLLMClient(factory, provider="openai", model="gpt")
+    with pytest.raises(ValueError, match="bad key"):
+        deferred.generate("prompt")
+
+
+def test_importing_main_does_not_import_provider_sdks():
+    """Test that provider SDKs are only imported when a client is created."""
+    code = (
+        "import sys; import main; from clients.llm import create_llm_client; "
+        "print(sorted(m for m in ('anthropic', 'openai', 'google.genai') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,129 @@
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from draft import DRAFT_NOTICE, LiveDraft
+from main import main
+
+
+def _wait_for(condition, timeout: float = 2.0) -> None:
+    end = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.005)
+
+
+def test_draft_updates_are_coalesced_and_rate_limited():
+    """Test that a fast stream is written in few updates, each with all text so far."""
+    hackmd = MagicMock()
+    sent = []
+    hackmd.update_note.side_effect = lambda note_id, content: sent.append(content)
+    draft = LiveDraft(hackmd, "report", interval=0.2)
+
+    draft.append("# 年度")
+    _wait_for(lambda: len(sent) == 1)
+    for i in range(100):
+        draft.append(f" {i}")
+    _wait_for(lambda: len(sent) == 2)
+    draft.close()
+
+    assert len(sent) == 2
+    assert sent[0] == f"# 年度\n\n{DRAFT_NOTICE}\n"
+    assert sent[1].startswith("# 年度 0 1 2") and " 99\n" in sent[1]
+    assert draft.updates == 2
+
+
+def test_failed_draft_update_is_retried_with_missed_text():
+    """Test that the text of a failed update is sent by the next one."""
+    hackmd = MagicMock()
+    hackmd.update_note.side_effect = [Exception("HTTP 429"), None]
+    with patch("builtins.print"):
+        draft = LiveDraft(hackmd, "report", interval=0.01)
+        draft.append("first section")
+        _wait_for(lambda: draft.updates == 1)
+        draft.close()
+
+    assert draft.failures == 1
+    assert hackmd.update_note.call_args.args == ("report", f"first section\n\n{DRAFT_NOTICE}\n")
+
+
+def test_close_waits_for_update_in_flight():
+    """Test that no draft update can finish after close returns."""
+    release = threading.Event()
+    hackmd = MagicMock()
+    hackmd.update_note.side_effect = lambda note_id, content: release.wait()
+    draft = LiveDraft(hackmd, "report", interval=0.01)
+    draft.append("text")
+    _wait_for(lambda: hackmd.update_note.called)
+
+    closer = threading.Thread(target=draft.close)
+    closer.start()
+    closer.join(0.05)
+    assert closer.is_alive()
+    release.set()
+    closer.join(1.0)
+    assert not closer.is_alive()
+
+
+def test_live_draft_run_creates_note_first_and_finalizes_it(tmp_path):
+    """Test that --live-draft creates the note before generating and updates it with the report."""
+    test_env = {
+        "HACKMD_API_TOKEN": "test_token",
+        "OPENAI_API_KEY": "test_openai_key",
+        "OPENAI_MODEL": "gpt-4",
+        "HACKMD_API_URL": "https://api.hackmd.io/v1",
+    }
+    test_args = [
+        "--start-date", "2024-01-01", "--end-date", "2024-01-31",
+        "--folder-name", "Test Folder", "--max-tokens", "10000",
+        "--llm-provider", "openai", "--year-tag", "2024",
+        "--checkpoint-dir", str(tmp_path / "runs"), "--outbox-dir", str(tmp_path / "outbox"),
+        "--live-draft", "--draft-interval", "0.01",
+    ]
+    mock_note = {
+        "id": "test_note_id",
+        "title": "Test Note",
+        "createdAt": 1704067200000,
+        "folderPaths": [{"name": "Test Folder"}],
+        "content": "Test content",
+    }
+
+    with (
+        patch.dict(os.environ, test_env, clear=True),
+        patch("sys.argv", ["main.py"] + test_args),
+        patch("main.HackMDClient") as mock_hackmd,
+        patch("main.create_llm_client") as mock_llm_factory,
+        patch("main.save_local_report", return_value="test_report.md"),
+        patch("builtins.print"),
+    ):
+        hackmd = mock_hackmd.return_value
+        hackmd.get_notes.return_value = [mock_note]
+        hackmd.filter_notes_by_folder_and_date.return_value = [mock_note]
+        hackmd.get_note_content.return_value = mock_note
+        hackmd.upload_note.return_value = "https://hackmd.io/draft123"
+        hackmd.update_note.return_value = "https://hackmd.io/draft123"
+
+        llm = mock_llm_factory.return_value
+        llm.get_provider_name.return_value = "openai"
+        llm.get_model_name.return_value = "gpt-4"
+        llm.count_tokens.return_value = 100
+
+        def stream(prompt):
+            # The note exists before the first piece is generated
+            assert hackmd.upload_note.called
+            yield "# Test "
+            yield "Report"
+
+        llm.stream.side_effect = stream
+
+        try:
+            main()
+        except SystemExit:
+            pass
+
+    hackmd.upload_note.assert_called_once()
+    assert hackmd.upload_note.call_args.kwargs["content"] == DRAFT_NOTICE
+    llm.generate.assert_not_called()
+    assert hackmd.update_note.call_args.kwargs == {"note_id": "draft123", "content": "# Test Report"}
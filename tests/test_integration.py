@@ -8,7 +8,7 @@ from main import main
 from config import parse_arguments
 
 
-def test_main_workflow_mock():
+def test_main_workflow_mock(tmp_path):
     """Test the main workflow with mocked components."""
 
     # Mock environment variables
@@ -33,6 +33,10 @@ def test_main_workflow_mock():
         "openai",
         "--year-tag",
         "2024",
+        "--checkpoint-dir",
+        str(tmp_path / "checkpoints"),
+        "--outbox-dir",
+        str(tmp_path / "outbox"),
     ]
 
     with (
@@ -109,7 +113,7 @@ def test_main_workflow_mock():
             ), f"Expected print message containing '{msg}'"
 
 
-def test_main_workflow_token_limit_exceeded():
+def test_main_workflow_token_limit_exceeded(tmp_path):
     """Test the main workflow when token limit is exceeded."""
 
     # Mock environment variables
@@ -134,6 +138,10 @@ def test_main_workflow_token_limit_exceeded():
         "openai",
         "--year-tag",
         "2024",
+        "--checkpoint-dir",
+        str(tmp_path / "checkpoints"),
+        "--outbox-dir",
+        str(tmp_path / "outbox"),
     ]
 
     with (
@@ -0,0 +1,111 @@
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from main import main
+from metrics import METRICS_HEADING, extract_metrics
+from models import Note
+
+WEEK_1 = """# 本週工作摘要
+## 完成事項
+- [x] 修正登入逾時 issue #12
+- [x] 發布 v1.2 (https://github.com/acme/app/pull/15)
+- [ ] 撰寫部署文件
+## Phoenix 遷移
+- [x] 完成資料表轉換
+```
+- [x] not an item #99
+```
+"""
+
+WEEK_2 = """# 本週工作摘要
+## 完成事項
+- [x] 完成資料表轉換
+- [X] 壓測報告 #20
+## Kafka 升級
+- [ ] 升級 broker，參考 #12
+"""
+
+
+def _notes():
+    return [
+        Note(id="n1", title="Week 1", created_at=1704067200000, content=WEEK_1),
+        Note(id="n2", title="Week 2", created_at=1707091200000, content=WEEK_2),
+        Note(id="n3", title="Week 3", created_at=1707696000000, content="## 完成事項\n"),
+    ]
+
+
+def test_extract_metrics_counts_items_references_and_projects():
+    """Test checklist, reference and project counting across notes."""
+    metrics = extract_metrics(_notes())
+
+    assert metrics.notes == 3
+    # Carried-over items count once; code blocks are ignored
+    assert metrics.done_items == 4
+    assert metrics.resolved_references == 3
+    assert metrics.references == 3
+    assert metrics.open_items == 0
+    assert metrics.projects == ["Phoenix 遷移", "Kafka 升級"]
+    assert metrics.monthly == {
+        "2024-01": {"notes": 1, "done": 3, "references": 2},
+        "2024-02": {"notes": 2, "done": 1, "references": 1},
+    }
+
+    section = metrics.to_markdown()
+    assert section.startswith(f"# {METRICS_HEADING}")
+    assert "| 完成項目數 | 4 |" in section
+    assert "| 2024-02 | 2 | 1 | 1 |" in section
+
+
+def test_local_metrics_replace_llm_section(tmp_path):
+    """Test that --local-metrics drops the section from the prompt and appends the table."""
+    test_env = {
+        "HACKMD_API_TOKEN": "test_token",
+        "OPENAI_API_KEY": "test_openai_key",
+        "OPENAI_MODEL": "gpt-4",
+    }
+    test_args = [
+        "main.py",
+        "--start-date", "2024-01-01",
+        "--end-date", "2024-12-31",
+        "--folder-name", "Test Folder",
+        "--max-tokens", "10000",
+        "--llm-provider", "openai",
+        "--year-tag", "2024",
+        "--checkpoint-dir", str(tmp_path / "checkpoints"),
+        "--outbox-dir", str(tmp_path / "outbox"),
+        "--local-metrics",
+    ]
+    mock_note = {
+        "id": "test_note_id",
+        "title": "Test Note",
+        "createdAt": 1704067200000,
+        "folderPaths": [{"name": "Test Folder"}],
+        "content": WEEK_1,
+    }
+
+    with (
+        patch.dict(os.environ, test_env, clear=True),
+        patch("sys.argv", test_args),
+        patch("main.HackMDClient") as mock_hackmd,
+        patch("main.create_llm_client") as mock_llm_factory,
+        patch("main.save_local_report", return_value="report.md") as mock_save,
+        patch("builtins.print"),
+    ):
+        hackmd = mock_hackmd.return_value
+        hackmd.get_notes.return_value = [mock_note]
+        hackmd.filter_notes_by_folder_and_date.return_value = [mock_note]
+        hackmd.get_note_content.return_value = mock_note
+        hackmd.upload_note.return_value = "https://hackmd.io/report"
+        llm = mock_llm_factory.return_value
+        llm.count_tokens.return_value = 10
+        llm.generate.return_value = "# 一、年度重點成就摘要\nDone"
+
+        main()
+
+        prompt = llm.generate.call_args.args[0]
+        assert METRICS_HEADING not in prompt
+        report = mock_save.call_args.kwargs["content"]
+        assert report.startswith("# 一、年度重點成就摘要\nDone\n\n# 五、量化指標")
+        assert "| 完成項目數 | 3 |" in report
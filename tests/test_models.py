@@ -0,0 +1,53 @@
+import sys
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from clients.hackmd_client import HackMDClient
+from models import Note
+
+
+def _api_note(note_id: str, folder: str, created_at: int) -> dict:
+    return {
+        "id": note_id,
+        "title": f"Title {note_id}",
+        "createdAt": created_at,
+        "folderPaths": [{"id": "f1", "name": folder}],
+        "publishType": "view",
+        "lastChangeUser": {"name": "someone"},
+    }
+
+
+def test_from_api_keeps_used_fields_and_interns_folders():
+    """Test that API dicts are reduced to the used fields with shared folder names."""
+    first = Note.from_api(_api_note("a", "".join(["Weekly", " Report"]), 1704067200000))
+    second = Note.from_api(_api_note("b", "".join(["Weekly", " Rep", "ort"]), 1704067200000))
+
+    assert first.folders == ("Weekly Report",)
+    assert first.folders[0] is second.folders[0]
+    assert first.content is None
+    assert not hasattr(first, "__dict__")
+    assert Note.from_api(first) is first
+
+
+def test_to_dict_round_trip():
+    """Test that checkpointed notes convert back to equal records."""
+    note = Note.from_api({**_api_note("a", "F", 1704067200000), "content": "text"})
+
+    assert Note.from_api(note.to_dict()) == note
+    note.release_content()
+    assert "content" not in note.to_dict()
+
+
+def test_filter_returns_sorted_note_records():
+    """Test that filtering API dicts yields Note records in chronological order."""
+    client = HackMDClient(api_token="token")
+    notes = [
+        _api_note("late", "F", 1706745600000),
+        _api_note("other", "G", 1704067200000),
+        _api_note("early", "F", 1704153600000),
+    ]
+
+    filtered = client.filter_notes_by_folder_and_date(notes, "F", "2024-01-01", "2024-12-31")
+
+    assert [note.id for note in filtered] == ["early", "late"]
+    assert all(isinstance(note, Note) for note in filtered)
+    assert client.filter_notes_by_folder_and_date(filtered, "F", "2024-01-15", "2024-12-31") == [filtered[1]]
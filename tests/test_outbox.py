@@ -0,0 +1,102 @@
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from main import main
+from outbox import Outbox, backoff_delay
+
+
+def test_failed_upload_is_kept_and_rescheduled(tmp_path):
+    """Test that a failed upload stays queued with a later retry time."""
+    outbox = Outbox(str(tmp_path))
+    hackmd = MagicMock()
+    hackmd.upload_note.side_effect = Exception("503 Service Unavailable")
+    entry_id = outbox.enqueue("Title", "Report", ["annual-report"])
+
+    with pytest.raises(Exception):
+        outbox.send(hackmd, entry_id)
+
+    (entry,) = outbox.pending()
+    assert entry["attempts"] == 1
+    assert "503" in entry["last_error"]
+    assert outbox.drain(hackmd) == {"sent": 0, "failed": 0, "deferred": 1}
+
+
+def test_drain_sends_due_entries_once(tmp_path):
+    """Test that draining uploads due entries and removes them."""
+    outbox = Outbox(str(tmp_path))
+    hackmd = MagicMock()
+    hackmd.upload_note.return_value = "https://hackmd.io/x"
+    outbox.enqueue("A", "Report A")
+    outbox.enqueue("B", "Report B", delay=3600)
+
+    assert outbox.drain(hackmd) == {"sent": 1, "failed": 0, "deferred": 1}
+    hackmd.upload_note.assert_called_once_with(title="A", content="Report A", tags=[])
+    assert [entry["title"] for entry in outbox.pending()] == ["B"]
+
+
+def test_backoff_delay_grows_and_is_capped():
+    """Test that retry delays grow exponentially up to the maximum."""
+    assert 15 <= backoff_delay(1) <= 30
+    assert 60 <= backoff_delay(3) <= 120
+    assert backoff_delay(50) <= 3600
+
+
+def test_failed_upload_is_retried_by_next_run(tmp_path):
+    """Test that a report whose upload failed is uploaded by the following run."""
+    test_env = {
+        "HACKMD_API_TOKEN": "test_token",
+        "OPENAI_API_KEY": "test_openai_key",
+        "OPENAI_MODEL": "gpt-4",
+    }
+    test_args = [
+        "main.py",
+        "--start-date", "2024-01-01",
+        "--end-date", "2024-01-31",
+        "--folder-name", "Test Folder",
+        "--max-tokens", "10000",
+        "--llm-provider", "openai",
+        "--year-tag", "2024",
+        "--checkpoint-dir", str(tmp_path / "checkpoints"),
+        "--outbox-dir", str(tmp_path / "outbox"),
+    ]
+    mock_note = {
+        "id": "test_note_id",
+        "title": "Test Note",
+        "createdAt": 1704067200000,
+        "folderPaths": [{"name": "Test Folder"}],
+        "content": "Test content",
+    }
+
+    with (
+        patch.dict(os.environ, test_env, clear=True),
+        patch("sys.argv", test_args),
+        patch("main.HackMDClient") as mock_hackmd,
+        patch("main.create_llm_client") as mock_llm_factory,
+        patch("main.save_local_report", return_value="report.md"),
+        patch("builtins.print"),
+    ):
+        hackmd = mock_hackmd.return_value
+        hackmd.get_notes.return_value = [mock_note]
+        hackmd.filter_notes_by_folder_and_date.return_value = [mock_note]
+        hackmd.get_note_content.return_value = mock_note
+        mock_llm_factory.return_value.count_tokens.return_value = 10
+        mock_llm_factory.return_value.generate.return_value = "# Report"
+        hackmd.upload_note.side_effect = [Exception("network down"), "https://hackmd.io/a", "https://hackmd.io/b"]
+
+        main()
+        (entry_file,) = os.listdir(tmp_path / "outbox")
+        with open(tmp_path / "outbox" / entry_file, encoding="utf-8") as f:
+            entry = json.load(f)
+        entry["next_attempt_at"] = 0
+        with open(tmp_path / "outbox" / entry_file, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+
+        main()
+
+        assert hackmd.upload_note.call_count == 3
+        assert os.listdir(tmp_path / "outbox") == []
@@ -0,0 +1,166 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from models import Note
+from pipeline import decode_texts, encode_texts, ordered_map, stream_notes
+from slim import MarkdownSlimmer
+from snapshot import text_digest
+from utils import estimate_tokens
+
+
+def test_ordered_map_keeps_input_order():
+    """Test that results come back in input order despite uneven latency."""
+
+    def slow_for_even(x):
+        time.sleep(0.01 if x % 2 == 0 else 0)
+        return x * 10
+
+    with ThreadPoolExecutor(4) as executor:
+        results = list(ordered_map(slow_for_even, range(8), executor, window=4))
+
+    assert [result for _, result, _ in results] == [x * 10 for x in range(8)]
+
+
+def test_ordered_map_bounds_in_flight_items():
+    """Test that no more than ``window`` items are pulled ahead of the consumer."""
+    pulled = []
+
+    def items():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    with ThreadPoolExecutor(2) as executor:
+        stream = ordered_map(lambda x: x, items(), executor, window=3)
+        next(stream)
+
+        assert len(pulled) == 3
+
+
+def test_stream_notes_reports_errors_and_continues():
+    """Test that a failing fetch is reported for that note only."""
+    notes = [Note(id="a"), Note(id="bad"), Note(id="c")]
+
+    def fetch(note_id):
+        if note_id == "bad":
+            raise Exception("Note content is empty")
+        return Note(id=note_id, content=note_id * 3)
+
+    results = list(stream_notes(notes, fetch=fetch, count=len, workers=2))
+
+    assert [result.meta.id for result in results] == ["a", "bad", "c"]
+    assert results[0].tokens == 3
+    assert results[1].note is None
+    assert "empty" in str(results[1].error)
+    assert results[2].note == Note(id="c", content="ccc")
+
+
+def test_stream_notes_transforms_in_order_before_counting():
+    """Test that the transform sees notes in order and counting uses its output."""
+    seen = []
+
+    def transform(content):
+        seen.append(content)
+        return content[:1]
+
+    notes = [Note(id=str(i)) for i in range(6)]
+    results = list(
+        stream_notes(
+            notes,
+            fetch=lambda note_id: Note(id=note_id, content=note_id * 5),
+            count=len,
+            transform=transform,
+            workers=3,
+        )
+    )
+
+    assert seen == [str(i) * 5 for i in range(6)]
+    assert [result.tokens for result in results] == [1] * 6
+
+
+def test_stream_notes_overlaps_stages():
+    """Test that fetch and count latency overlap instead of adding up."""
+    notes = [Note(id=str(i)) for i in range(8)]
+    active = {"fetch": 0, "count": 0, "overlap": False}
+    lock = threading.Lock()
+
+    def tracked(stage, result):
+        with lock:
+            active[stage] += 1
+            if active["fetch"] and active["count"]:
+                active["overlap"] = True
+        time.sleep(0.02)
+        with lock:
+            active[stage] -= 1
+        return result
+
+    list(
+        stream_notes(
+            notes,
+            fetch=lambda note_id: tracked("fetch", Note(id=note_id, content=note_id)),
+            count=lambda content: tracked("count", 1),
+            workers=2,
+            queue_size=4,
+        )
+    )
+
+    assert active["overlap"]
+
+
+def test_encode_texts_round_trip():
+    """Test that packed payloads decode to the original texts."""
+    texts = ["週報 A", "", "plain text", "emoji 🚀 and 中文"]
+    assert decode_texts(*encode_texts(texts)) == texts
+
+
+def test_process_pool_counts_match_serial():
+    """Test that counting in worker processes gives the serial results in order."""
+    notes = [Note(id=str(i)) for i in range(50)] + [Note(id="bad")]
+
+    def fetch(note_id):
+        if note_id == "bad":
+            raise Exception("Note content is empty")
+        return Note(id=note_id, content=f"第 {note_id} 週 progress " * (int(note_id) + 1))
+
+    serial = list(stream_notes(notes, fetch=fetch, count=estimate_tokens))
+    pooled = list(
+        stream_notes(notes, fetch=fetch, count=estimate_tokens, cpu_workers=2, chunksize=8)
+    )
+
+    assert [r.tokens for r in pooled] == [r.tokens for r in serial]
+    assert [r.meta.id for r in pooled] == [n.id for n in notes]
+    assert pooled[-1].note is None and "empty" in str(pooled[-1].error)
+
+
+def test_process_pool_rewrites_and_digests_like_threads():
+    """Test that slimming and digests in worker processes match the threaded stages."""
+    notes = [Note(id=str(i)) for i in range(30)]
+    slimmer = MarkdownSlimmer(code_lines=2)
+
+    def fetch(note_id):
+        code = "\n".join(f"line {n}" for n in range(int(note_id) + 3))
+        return Note(id=note_id, content=f"第 {note_id} 週\n```\n{code}\n```\n共同段落")
+
+    seen = []
+
+    def transform(content):
+        seen.append(content)
+        return content.replace("共同段落", "")
+
+    for kwargs in ({}, {"transform": transform}):
+        options = dict(fetch=fetch, count=estimate_tokens, rewrite=slimmer.slim, digest=text_digest, **kwargs)
+        threaded = list(stream_notes(notes, **options))
+        pooled = list(stream_notes(notes, cpu_workers=2, chunksize=8, **options))
+
+        assert [r.note.content for r in pooled] == [r.note.content for r in threaded]
+        assert [r.tokens for r in pooled] == [r.tokens for r in threaded]
+        assert [r.rewritten for r in pooled] == [r.rewritten for r in threaded]
+        assert all(r.digest == text_digest(r.note.content) for r in pooled)
+        assert pooled[-1].rewritten.bytes_removed > 0
+
+    # The transform sees slimmed notes, in order
+    assert len(seen) == 60
+    assert seen[-30:] == [r.note.content + "共同段落" for r in pooled]
@@ -0,0 +1,77 @@
+import json
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from profiler import Profiler
+from tracing import Tracer
+
+
+def _build_rows(n: int) -> list:
+    return [f"row {i} " * 8 for i in range(n)]
+
+
+def test_profile_attributes_samples_and_allocations_to_stages(tmp_path):
+    """Test that stacks and allocation sites are written per step span."""
+    tracer = Tracer(enabled=True)
+    profiler = Profiler(str(tmp_path / "profile"), interval=0.001, allocations=True)
+    tracer.observers.append(profiler)
+    profiler.start()
+
+    with tracer.span("report"):
+        with tracer.span("step.build_prompt"):
+            rows = _build_rows(20000)
+            end = time.monotonic() + 0.1
+            while time.monotonic() < end:
+                sum(len(row) for row in rows[:1000])
+    directory = profiler.stop()
+
+    with open(f"{directory}/profile.folded", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    stages = {line.split(";", 1)[0] for line in lines}
+    assert "step.build_prompt" in stages
+    assert any(
+        line.startswith("step.build_prompt;MainThread;") and "test_profile_attributes" in line
+        for line in lines
+    )
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+    with open(f"{directory}/allocations.json", encoding="utf-8") as f:
+        profile = json.load(f)
+    assert profile["samples"]["step.build_prompt"]["samples"] > 0
+    (stage,) = profile["stages"]
+    assert stage["stage"] == "step.build_prompt"
+    assert any(site["file"].endswith("test_profiler.py") for site in stage["allocations"])
+
+
+def test_allocations_are_only_traced_on_request(tmp_path):
+    """Test that the sampler alone leaves tracemalloc off and still records stage timings."""
+    tracer = Tracer(enabled=True)
+    profiler = Profiler(str(tmp_path / "profile"), interval=0.001)
+    tracer.observers.append(profiler)
+    profiler.start()
+
+    with tracer.span("step.build_prompt"):
+        assert not tracemalloc.is_tracing()
+        _build_rows(1000)
+    directory = profiler.stop()
+
+    with open(f"{directory}/allocations.json", encoding="utf-8") as f:
+        (stage,) = json.load(f)["stages"]
+    assert stage["stage"] == "step.build_prompt"
+    assert "allocations" not in stage
+
+
+def test_idle_executor_threads_are_not_sampled(tmp_path):
+    """Test that threads waiting for work add no samples."""
+    profiler = Profiler(str(tmp_path / "profile"), interval=0.001)
+    with ThreadPoolExecutor(2, thread_name_prefix="fetch") as executor:
+        executor.submit(lambda: None).result()
+        profiler.start()
+        time.sleep(0.05)
+        profiler.stop()
+
+    assert profiler.samples
+    assert not any(stack[1] == "fetch" for stack in profiler.samples)
@@ -0,0 +1,94 @@
+import sys
+import time
+from unittest.mock import MagicMock
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from checkpoint import Checkpoint
+from clients.llm.claude_client import ClaudeClient
+from clients.llm.base import LLMClient
+from main import generate_report_sections
+from models import Note
+from utils import REPORT_SECTIONS, SECTION_CONTEXT_HEADER, build_prompt, build_section_prompts
+
+
+class SlowSectionLLM(LLMClient):
+    """LLM stub that takes longer for later sections."""
+
+    def __init__(self):
+        self.calls = []
+        self.primed = []
+
+    def generate(self, prompt):
+        raise AssertionError("sections must use generate_with_context")
+
+    def generate_with_context(self, context, instruction):
+        index = next(i for i, (heading, _) in enumerate(REPORT_SECTIONS) if heading in instruction)
+        self.calls.append((context, index))
+        time.sleep(0.05 * (len(REPORT_SECTIONS) - index))
+        return f"# {REPORT_SECTIONS[index][0]}\nbody {index}"
+
+    def prime_context_cache(self, context):
+        self.primed.append(context)
+
+    def count_tokens(self, text):
+        return len(text)
+
+    def get_model_name(self):
+        return "stub"
+
+    def get_provider_name(self):
+        return "stub"
+
+
+def _prompt():
+    return build_prompt([Note(id="n1", title="Week 1", created_at=1704067200000, content="Did A")])
+
+
+def test_section_prompts_share_the_note_context():
+    """Test that every section prompt starts with the same note context."""
+    context, instructions = build_section_prompts(_prompt())
+
+    assert context.startswith(SECTION_CONTEXT_HEADER)
+    assert context.endswith("Did A\n")
+    assert len(instructions) == len(REPORT_SECTIONS)
+    assert all(f"# {heading}" in text for (heading, _), text in zip(REPORT_SECTIONS, instructions))
+
+
+def test_sections_run_concurrently_and_stitch_in_order(tmp_path):
+    """Test that sections overlap in time and are joined in report order."""
+    llm = SlowSectionLLM()
+    checkpoint = Checkpoint(str(tmp_path), "run")
+
+    start = time.perf_counter()
+    report = generate_report_sections(llm, _prompt(), checkpoint)
+    elapsed = time.perf_counter() - start
+
+    headings = [line for line in report.split("\n") if line.startswith("# ")]
+    assert headings == [f"# {heading}" for heading, _ in REPORT_SECTIONS]
+    assert elapsed < 0.05 * len(REPORT_SECTIONS) + 0.1
+    assert len(llm.primed) == 1
+    assert {context for context, _ in llm.calls} == set(llm.primed)
+
+    # A resumed run reuses the checkpointed sections
+    llm.calls.clear()
+    assert generate_report_sections(llm, _prompt(), checkpoint) == report
+    assert llm.calls == []
+
+
+def test_claude_marks_context_for_caching():
+    """Test that the shared context block carries cache_control."""
+    client = ClaudeClient(api_key="test", model="claude-test")
+    client.client = MagicMock()
+    client.client.messages.create.return_value.content = [MagicMock(text=" section ")]
+    client.client.messages.create.return_value.usage.cache_read_input_tokens = 10
+    client.client.messages.create.return_value.usage.cache_creation_input_tokens = 0
+
+    assert client.generate_with_context("context", "instruction") == "section"
+
+    (message,) = client.client.messages.create.call_args.kwargs["messages"]
+    assert message["content"][0] == {
+        "type": "text",
+        "text": "context",
+        "cache_control": {"type": "ephemeral"},
+    }
+    assert message["content"][1]["text"] == "instruction"
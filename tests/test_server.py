@@ -0,0 +1,148 @@
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from config import params_to_argv
+from server import QueueFullError, ReportService, make_handler
+
+TEST_ENV = {
+    "HACKMD_API_TOKEN": "test_token",
+    "OPENAI_API_KEY": "test_openai_key",
+    "OPENAI_MODEL": "gpt-4",
+}
+
+PARAMS = {
+    "start_date": "2024-01-01",
+    "end_date": "2024-12-31",
+    "folder_name": "Test Folder",
+    "max_tokens": 1000,
+    "llm_provider": "openai",
+    "year_tag": "2024",
+}
+
+
+def _wait(job, timeout=5.0):
+    deadline = time.time() + timeout
+    while job.status not in ("succeeded", "failed") and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_params_to_argv():
+    """Test that JSON parameters become command line arguments."""
+    argv = params_to_argv({"start-date": "2024-01-01", "fit_budget": True, "resume": False, "trace_file": None})
+    assert argv == ["--start-date", "2024-01-01", "--fit-budget"]
+
+    argv = params_to_argv({"tag": ["weekly", "infra"], "keyword": "部署"})
+    assert argv == ["--tag", "weekly", "--tag", "infra", "--keyword", "部署"]
+
+
+@patch.dict("os.environ", TEST_ENV)
+def test_submitted_tag_list_becomes_repeated_tags():
+    """Test that a JSON tag list is parsed into one tag filter per element."""
+    service = ReportService(workers=1)
+    job = service.submit({**PARAMS, "store": "notes.db", "tag": ["weekly", "infra"]})
+    assert job.args.tag == ["weekly", "infra"]
+
+
+@patch.dict("os.environ", TEST_ENV)
+def test_process_wide_params_are_rejected():
+    """Test that parameters a job cannot honour are rejected instead of ignored."""
+    service = ReportService(workers=1)
+    for params in ({"deadline": 600}, {"watch": True}, {"profile": True}, {"trace-file": "t.json"}, {"resume": True}):
+        with pytest.raises(ValueError, match="not supported by the report service"):
+            service.submit({**PARAMS, **params})
+    assert service.queue.qsize() == 0
+
+    # Defaults and false flags are fine
+    service.submit({**PARAMS, "resume": False, "trace_file": None})
+    assert service.queue.qsize() == 1
+
+
+@patch.dict("os.environ", TEST_ENV)
+@patch("server.create_llm_client")
+@patch("server.HackMDClient")
+@patch("server.run_report")
+def test_jobs_reuse_clients(mock_run_report, mock_hackmd, mock_create_llm):
+    """Test that jobs run with clients created once and shared."""
+    mock_run_report.return_value = {"local_filename": "r.md", "hackmd_url": None, "report": "ok"}
+    service = ReportService(workers=1)
+    service.start()
+    try:
+        first = _wait(service.submit(PARAMS))
+        second = _wait(service.submit({**PARAMS, "max_tokens": 2000}))
+    finally:
+        service.stop()
+
+    assert first.status == "succeeded" and second.status == "succeeded"
+    assert first.result["report"] == "ok"
+    mock_hackmd.assert_called_once()
+    mock_create_llm.assert_called_once_with(provider="openai", api_key="test_openai_key", model="gpt-4")
+    assert mock_run_report.call_args.kwargs["llm"] is mock_create_llm.return_value
+
+
+@patch.dict("os.environ", TEST_ENV)
+def test_identical_jobs_coalesce_and_queue_is_bounded():
+    """Test that an identical pending report is coalesced and a full queue rejects jobs."""
+    service = ReportService(workers=1, queue_size=1)
+
+    job = service.submit(PARAMS)
+    assert service.submit(dict(PARAMS)) is job
+
+    with pytest.raises(QueueFullError):
+        service.submit({**PARAMS, "max_tokens": 2000})
+    with pytest.raises(ValueError):
+        service.submit({"start_date": "2024-01-01"})
+
+
+@patch.dict("os.environ", TEST_ENV)
+@patch("server.create_llm_client", MagicMock())
+@patch("server.HackMDClient", MagicMock())
+@patch("server.run_report")
+def test_http_api(mock_run_report):
+    """Test submitting a job and reading its status and result over HTTP."""
+    mock_run_report.return_value = {"local_filename": "r.md", "hackmd_url": "https://hackmd.io/x", "report": "報告"}
+    service = ReportService(workers=1)
+    service.start()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(service))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    try:
+        request = urllib.request.Request(
+            f"{base}/jobs", data=json.dumps(PARAMS).encode("utf-8"), method="POST"
+        )
+        with urllib.request.urlopen(request) as response:
+            assert response.status == 202
+            job_id = json.load(response)["id"]
+
+        _wait(service.get(job_id))
+        with urllib.request.urlopen(f"{base}/jobs/{job_id}/result") as response:
+            result = json.load(response)
+        assert result["status"] == "succeeded"
+        assert result["report"] == "報告"
+        assert result["hackmd_url"] == "https://hackmd.io/x"
+
+        bad = urllib.request.Request(f"{base}/jobs", data=b"{}", method="POST")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(bad)
+        assert error.value.code == 400
+
+        body = json.dumps({**PARAMS, "watch": True}).encode()
+        per_process = urllib.request.Request(f"{base}/jobs", data=body, method="POST")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(per_process)
+        assert error.value.code == 400
+        assert "watch" in json.load(error.value)["error"]
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        service.stop()
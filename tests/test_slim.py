@@ -0,0 +1,59 @@
+import sys
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from slim import MarkdownSlimmer, SlimStats
+
+BASE64 = "iVBORw0KGgo" * 2000
+
+
+def test_slim_strips_heavy_elements():
+    """Test that front matter, images, data URIs and HTML are removed."""
+    content = (
+        "---\ntitle: Week 1\ntags: weekly\n---\n"
+        "# 本週工作摘要\n"
+        f"![架構圖](data:image/png;base64,{BASE64})\n"
+        "![](https://example.com/screenshot.png)\n"
+        '<div class="note"><span>完成 <b>API</b> 改版</span></div>\n'
+        "<!-- reviewer notes -->\n"
+        "<style>.x { color: red }</style>\n"
+        f'<a href="data:text/plain;base64,{BASE64}">附件</a>\n'
+    )
+
+    result, stats = MarkdownSlimmer().slim(content)
+
+    assert result == "# 本週工作摘要\n[圖片: 架構圖]\n\n完成 API 改版\n\n附件"
+    assert stats.front_matter == 1
+    assert stats.images == 2
+    assert stats.data_uris == 2
+    assert stats.bytes_removed > 2 * len(BASE64)
+    assert stats.tokens_removed > 0
+
+
+def test_slim_truncates_code_and_logs():
+    """Test that code blocks and log dumps keep only their first lines."""
+    code = "\n".join(f"line_{i} = {i}" for i in range(30))
+    log = "\n".join(f"2024-01-02 10:00:{i:02d} INFO request {i}" for i in range(12))
+    content = f"```python\n{code}\n```\n\n部署紀錄：\n{log}\n結論：正常\n\n```\n<div>kept</div>\n```"
+
+    result, stats = MarkdownSlimmer(code_lines=3, log_lines=2).slim(content)
+
+    assert result.split("\n")[:6] == [
+        "```python", "line_0 = 0", "line_1 = 1", "line_2 = 2", "…（省略 27 行）", "```",
+    ]
+    assert "2024-01-02 10:00:01 INFO request 1\n…（省略 10 行）\n結論：正常" in result
+    assert "request 2" not in result
+    assert result.endswith("```\n<div>kept</div>\n```")
+    assert stats.code_lines_removed == 27
+    assert stats.log_lines_removed == 10
+
+
+def test_slim_stats_add_up():
+    """Test that per-note summaries add up to a run summary."""
+    slimmer = MarkdownSlimmer()
+    total = SlimStats()
+    for content in ["![a](x.png)", "plain text"]:
+        total.add(slimmer.slim(content)[1])
+
+    assert total.notes == 2
+    assert total.images == 1
+    assert total.bytes_before == len("![a](x.png)") + len("plain text")
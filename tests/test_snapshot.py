@@ -0,0 +1,109 @@
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from checkpoint import Checkpoint
+from clients.hackmd_client import HackMDClient
+from config import parse_arguments
+from main import build_report_prompt
+from models import Note
+from snapshot import Snapshot, SnapshotWriter, text_digest
+
+
+def _note(i: int) -> dict:
+    return {
+        "id": f"note{i}",
+        "title": f"Week {i}",
+        "createdAt": 1704067200000 + i * 604800000,
+        "lastChangedAt": 1704067200000 + i * 604800000,
+        "folderPaths": [{"name": "Weekly"}],
+        "tags": ["weekly"],
+        "content": f"## 完成事項\n- [x] 完成功能 {i}\n" + "- 例行工作\n" * i,
+    }
+
+
+def test_snapshot_round_trips_notes_in_any_order(tmp_path):
+    """Test that notes, bodies and counts are read back by random access."""
+    path = str(tmp_path / "notes.snap")
+    with SnapshotWriter(path, manifest={"folder_name": "Weekly"}, token_model="gpt-test") as writer:
+        for i in range(5):
+            writer.add_note(Note.from_api(_note(i)))
+        writer.add_count(text_digest("counted text"), 7)
+
+    with Snapshot(path) as snapshot:
+        assert len(snapshot) == 5
+        assert snapshot.manifest == {"folder_name": "Weekly"}
+        assert [note.id for note in snapshot.notes()] == [f"note{i}" for i in range(5)]
+        assert all(note.content is None for note in snapshot.notes())
+        for i in (3, 0, 4):
+            assert snapshot.get_note(f"note{i}") == Note.from_api(_note(i))
+
+        count = MagicMock(return_value=99)
+        cached = snapshot.cached_count(count)
+        assert cached("counted text") == 7
+        assert cached("other text") == 99
+        count.assert_called_once_with("other text")
+
+
+def test_snapshot_is_only_written_on_success(tmp_path):
+    """Test that a failed export leaves no file behind and bad files are rejected."""
+    path = tmp_path / "notes.snap"
+    with pytest.raises(RuntimeError):
+        with SnapshotWriter(str(path), manifest={}, token_model="local") as writer:
+            writer.add_note(Note.from_api(_note(1)))
+            raise RuntimeError("fetch failed")
+    assert list(tmp_path.iterdir()) == []
+
+    path.write_bytes(b"not a snapshot at all")
+    with pytest.raises(ValueError, match="not a note snapshot"):
+        Snapshot(str(path))
+
+
+def test_report_prompt_from_snapshot_needs_no_network(tmp_path):
+    """Test that a run from a snapshot builds the same prompt without HackMD or counting calls."""
+    notes = [_note(i) for i in range(6)]
+    hackmd = MagicMock()
+    hackmd.get_notes.return_value = notes
+    hackmd.filter_notes_by_folder_and_date.side_effect = (
+        HackMDClient("token").filter_notes_by_folder_and_date
+    )
+    hackmd.get_note_content.side_effect = lambda note_id: next(
+        note for note in notes if note["id"] == note_id
+    )
+    llm = MagicMock()
+    llm.get_model_name.return_value = "gpt-test"
+    llm.count_tokens.side_effect = lambda text: len(text)
+
+    snapshot_path = str(tmp_path / "notes.snap")
+    argv = [
+        "--start-date", "2024-01-01", "--end-date", "2024-12-31", "--folder-name", "Weekly",
+        "--llm-provider", "openai", "--year-tag", "2024", "--max-tokens", "100000", "--slim",
+    ]
+    with patch("builtins.print"):
+        exported = build_report_prompt(
+            parse_arguments(argv + ["--export-snapshot", snapshot_path]),
+            hackmd,
+            llm,
+            Checkpoint(str(tmp_path / "runs"), "export"),
+        )
+
+        offline = MagicMock()
+        offline.get_notes.side_effect = AssertionError("HackMD was called")
+        offline.get_note_content.side_effect = AssertionError("HackMD was called")
+        offline.filter_notes_by_folder_and_date.side_effect = (
+            HackMDClient("token").filter_notes_by_folder_and_date
+        )
+        llm.count_tokens.reset_mock()
+        with Snapshot(snapshot_path) as snapshot:
+            replayed = build_report_prompt(
+                parse_arguments(argv + ["--from-snapshot", snapshot_path]),
+                offline,
+                llm,
+                Checkpoint(str(tmp_path / "runs"), "replay"),
+                snapshot=snapshot,
+            )
+
+    assert replayed == exported
+    llm.count_tokens.assert_not_called()
@@ -0,0 +1,84 @@
+import sys
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from budget import select_notes_within_budget
+from checkpoint import Checkpoint
+from config import parse_arguments
+from main import build_report_prompt
+from models import Note
+from spill import ContentStore, SpilledText
+
+
+def _note(i: int) -> dict:
+    return {
+        "id": f"note{i}",
+        "title": f"Week {i}",
+        "createdAt": 1704067200000 + i * 604800000,
+        "folderPaths": [{"name": "Weekly"}],
+        "content": (
+            f"## 完成事項\n- [x] 完成功能 {i}，效能提升 20%\n- 修正 #{100 + i}\n"
+            + "\n".join(f"- 例行工作項目 {j}" for j in range(20))
+            + "\n## 下週計畫\n"
+        ),
+    }
+
+
+def test_content_store_round_trips_text():
+    """Test that spilled texts read back unchanged, also after later appends."""
+    with ContentStore() as store:
+        first = store.put("週報 café ✓")
+        empty = store.put("")
+        assert str(first) == "週報 café ✓"
+
+        # Appending after the file was mapped needs a new mapping
+        second = store.put("x" * 10000)
+        assert str(second) == "x" * 10000
+        assert str(first) == "週報 café ✓"
+        assert str(empty) == "" and not empty
+
+        with first.view() as view:
+            assert bytes(view) == "週報 café ✓".encode("utf-8")
+        assert store.size == len("週報 café ✓".encode("utf-8")) + 10000
+
+
+def test_budget_keeps_spilled_notes_spilled():
+    """Test that fitting spilled notes selects the same texts, still spilled."""
+    notes = [Note.from_api(_note(i)) for i in range(10)]
+    counts = [200] * len(notes)
+    expected, expected_allocations = select_notes_within_budget(notes, counts, max_tokens=900)
+
+    with ContentStore() as store:
+        spilled = [note.with_content(store.put(note.content)) for note in notes]
+        selected, allocations = select_notes_within_budget(spilled, counts, max_tokens=900)
+
+        assert allocations == expected_allocations
+        assert all(isinstance(note.content, SpilledText) for note in selected)
+        assert [str(note.content) for note in selected] == [note.content for note in expected]
+
+
+def test_spilled_prompt_matches_in_memory_prompt(tmp_path):
+    """Test that --spill builds the same prompt and releases the note texts."""
+    notes = [_note(i) for i in range(12)]
+    hackmd = MagicMock()
+    hackmd.get_notes.return_value = notes
+    hackmd.filter_notes_by_folder_and_date.return_value = notes
+    hackmd.get_note_content.side_effect = lambda note_id: next(
+        note for note in notes if note["id"] == note_id
+    )
+
+    prompts = []
+    for extra in ([], ["--spill", "--spill-dir", str(tmp_path)]):
+        args = parse_arguments(
+            ["--start-date", "2024-01-01", "--end-date", "2024-12-31", "--folder-name", "Weekly",
+             "--llm-provider", "openai", "--year-tag", "2024", "--max-tokens", "1500",
+             "--local-tokens", "--fit-budget"] + extra
+        )
+        checkpoint = Checkpoint(str(tmp_path / "runs"), f"run{len(prompts)}")
+        with patch("builtins.print"):
+            prompts.append(build_report_prompt(args, hackmd, None, checkpoint))
+
+    assert prompts[0] == prompts[1]
+    assert "Week 11" in prompts[1]
+    # The spill file is unlinked, so nothing is left in the spill directory
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["runs"]
@@ -0,0 +1,110 @@
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from store import NoteStore
+
+NOTES = {
+    "n1": {
+        "id": "n1",
+        "title": "Week 1",
+        "createdAt": 1704153600000,
+        "lastChangedAt": 1,
+        "tags": ["weekly"],
+        "folderPaths": [{"name": "Weekly"}],
+        "content": "完成 Phoenix 專案的部署",
+    },
+    "n2": {
+        "id": "n2",
+        "title": "Week 2",
+        "createdAt": 1704758400000,
+        "lastChangedAt": 1,
+        "tags": ["weekly", "infra"],
+        "folderPaths": [{"name": "Weekly"}],
+        "content": "升級資料庫叢集",
+    },
+    "n3": {
+        "id": "n3",
+        "title": "Other",
+        "createdAt": 1704758400000,
+        "lastChangedAt": 1,
+        "tags": [],
+        "folderPaths": [{"name": "Elsewhere"}],
+        "content": "Phoenix retrospective",
+    },
+}
+
+
+def _hackmd(notes):
+    hackmd = MagicMock()
+    hackmd.get_notes.return_value = [
+        {k: v for k, v in note.items() if k != "content"} for note in notes.values()
+    ]
+    hackmd.get_note_content.side_effect = lambda note_id: {
+        "id": note_id,
+        "content": notes[note_id]["content"],
+    }
+    return hackmd
+
+
+def test_select_by_keyword_tag_and_folder():
+    """Test that keyword and tag selection use the local indexes."""
+    with NoteStore(":memory:") as store:
+        store.sync(_hackmd(NOTES))
+
+        by_keyword = store.select(folder_name="Weekly", keyword="phoenix")
+        by_chinese = store.select(keyword="資料庫")
+        by_tag = store.select(folder_name="Weekly", tags=["infra"])
+        by_date = store.select(folder_name="Weekly", start_date="2024-01-05", end_date="2024-12-31")
+
+        assert [note.id for note in by_keyword] == ["n1"]
+        assert [note.id for note in by_chinese] == ["n2"]
+        assert [note.id for note in by_tag] == ["n2"]
+        assert set(by_tag[0].tags) == {"weekly", "infra"}
+        assert [note.id for note in by_date] == ["n2"]
+        assert store.get_note("n1").content == NOTES["n1"]["content"]
+
+        with pytest.raises(ValueError):
+            store.select(keyword="nonexistent")
+
+
+def test_sync_is_incremental():
+    """Test that only new or changed notes are refetched and deleted notes removed."""
+    with NoteStore(":memory:") as store:
+        store.sync(_hackmd(NOTES))
+
+        changed = {key: dict(note) for key, note in NOTES.items() if key != "n3"}
+        changed["n2"].update(lastChangedAt=2, content="升級 Kafka 叢集")
+        hackmd = _hackmd(changed)
+        stats = store.sync(hackmd)
+
+        assert stats == {"listed": 2, "fetched": 1, "failed": 0, "deleted": 1}
+        hackmd.get_note_content.assert_called_once_with("n2")
+        assert [note.id for note in store.select(keyword="Kafka")] == ["n2"]
+        assert store.count() == 2
+
+
+def test_unchanged_resync_writes_nothing(tmp_path):
+    """Test that a resync with no changed notes leaves the notes and the FTS index alone."""
+    with NoteStore(str(tmp_path / "notes.db")) as store:
+        store.sync(_hackmd(NOTES))
+        before = store._conn.total_changes
+        index = store._conn.execute("SELECT count(*), max(rowid) FROM notes_fts_data").fetchone()
+
+        hackmd = _hackmd(NOTES)
+        stats = store.sync(hackmd)
+
+        assert stats["fetched"] == 0
+        hackmd.get_note_content.assert_not_called()
+        # Only the temporary list of listed IDs is rewritten (cleared and refilled)
+        assert store._conn.total_changes - before == 2 * len(NOTES)
+        assert store._conn.execute("SELECT count(*), max(rowid) FROM notes_fts_data").fetchone() == index
+
+        # A retitled note is re-indexed without fetching its body again
+        retitled = {key: dict(note) for key, note in NOTES.items()}
+        retitled["n3"]["title"] = "Kafka retro"
+        store.sync(_hackmd(retitled))
+        assert [note.id for note in store.select(keyword="Kafka")] == ["n3"]
+        assert store.get_note("n3").content == NOTES["n3"]["content"]
@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from clients.llm.claude_client import ClaudeClient
+from deadline import DeadlineExceeded
+from main import main
+from telemetry import TelemetryStore, choose_provider, configure_telemetry
+
+
+def _record(store, provider, model, latencies, input_tokens=10000, error=None):
+    for latency in latencies:
+        store.record(
+            provider=provider,
+            model=model,
+            operation="generate",
+            latency_ms=latency,
+            ttft_ms=latency / 10,
+            input_tokens=None if error else input_tokens,
+            output_tokens=None if error else 1000,
+            error=error,
+        )
+
+
+def test_stats_summarize_recent_calls():
+    """Test percentiles, error counts and the prompt size filter."""
+    store = TelemetryStore(":memory:")
+    _record(store, "openai", "gpt", [1000, 2000, 3000, 4000, 10000])
+    _record(store, "openai", "gpt", [500], error="timeout")
+    _record(store, "openai", "gpt", [100], input_tokens=100)
+    store.record("openai", "gpt", "generate", latency_ms=99, ts=0)
+
+    stats = store.stats()[("openai", "gpt")]
+    assert (stats.calls, stats.errors) == (7, 1)
+    assert (stats.p50_ms, stats.p95_ms) == (2000, 10000)
+    assert stats.ttft_p50_ms == 200
+
+    sized = store.stats(input_tokens=(5000, 20000))[("openai", "gpt")]
+    assert sized.calls == 5
+
+
+def test_choose_provider_by_latency_errors_and_cost():
+    """Test that routing prefers low latency within error and cost limits."""
+    store = TelemetryStore(":memory:")
+    candidates = {"openai": "gpt", "gemini": "gem", "claude": "cl"}
+    _record(store, "openai", "gpt", [9000, 10000, 11000])
+    _record(store, "gemini", "gem", [3000, 3000, 3000])
+    _record(store, "claude", "cl", [5000, 6000, 7000])
+
+    assert choose_provider(candidates, 10000, store)[0] == "gemini"
+
+    _record(store, "gemini", "gem", [100] * 4, error="overloaded")
+    provider, reason = choose_provider(candidates, 10000, store)
+    assert provider == "claude"
+    assert "gemini" in reason
+
+    prices = {"claude": (15.0, 75.0), "openai": (1.0, 4.0)}
+    assert choose_provider(candidates, 10000, store, prices, max_cost=0.05)[0] == "openai"
+    with pytest.raises(ValueError):
+        choose_provider({"claude": "cl"}, 10000, store, prices, max_cost=0.05)
+
+    # Providers without telemetry follow measured ones
+    assert choose_provider({"openai": "new-model", "claude": "cl"}, 10000, store)[0] == "claude"
+
+
+def test_streamed_generation_records_time_to_first_token():
+    """Test that a streamed Claude call is recorded with TTFT and usage."""
+    store = configure_telemetry(":memory:")
+    try:
+        client = ClaudeClient(api_key="test", model="claude-test")
+        client.client = MagicMock()
+        stream = client.client.messages.stream.return_value.__enter__.return_value
+        stream.text_stream = iter([" Hello", ", world "])
+        stream.get_final_message.return_value.usage.input_tokens = 12
+        stream.get_final_message.return_value.usage.output_tokens = 3
+
+        assert client.generate("prompt") == "Hello, world"
+
+        stats = store.stats()[("claude", "claude-test")]
+        assert stats.calls == 1
+        assert stats.ttft_p50_ms is not None
+        assert stats.ttft_p50_ms <= stats.p50_ms
+    finally:
+        configure_telemetry(None)
+
+
+def test_cancelled_streams_are_not_successes_or_errors():
+    """Test that a stream closed early or stopped by the deadline is recorded as cancelled."""
+    store = configure_telemetry(":memory:")
+    try:
+        client = ClaudeClient(api_key="test", model="claude-test")
+        client.client = MagicMock()
+        stream = client.client.messages.stream.return_value.__enter__.return_value
+
+        # The caller stops reading after the first piece
+        stream.text_stream = iter([" Hello", ", world "])
+        pieces = client.stream("prompt")
+        assert next(pieces) == " Hello"
+        pieces.close()
+
+        # The stage budget runs out mid-stream
+        stream.text_stream = iter([" Hello", ", world "])
+        client._api = MagicMock(return_value=client.client)
+        with patch("clients.llm.claude_client.get_deadline") as get_deadline:
+            get_deadline.return_value.check.side_effect = [None, DeadlineExceeded("generate")]
+            with pytest.raises(DeadlineExceeded):
+                client.generate("prompt")
+
+        stats = store.stats()[("claude", "claude-test")]
+        assert (stats.calls, stats.errors, stats.cancelled) == (0, 0, 2)
+        assert stats.p50_ms is None
+        stream.get_final_message.assert_not_called()
+    finally:
+        configure_telemetry(None)
+
+
+def test_store_without_cancelled_column_is_migrated(tmp_path):
+    """Test that a telemetry file from before cancelled calls keeps working."""
+    path = str(tmp_path / "telemetry.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE llm_calls (ts REAL NOT NULL, provider TEXT NOT NULL, model TEXT NOT NULL, "
+        "operation TEXT NOT NULL, latency_ms REAL NOT NULL, ttft_ms REAL, input_tokens INTEGER, "
+        "output_tokens INTEGER, error TEXT)"
+    )
+    conn.commit()
+    conn.close()
+
+    store = TelemetryStore(path)
+    store.record("openai", "gpt", "generate", latency_ms=1000)
+    store.record("openai", "gpt", "generate", latency_ms=50, error="GeneratorExit", cancelled=True)
+    stats = store.stats()[("openai", "gpt")]
+    assert (stats.calls, stats.errors, stats.cancelled) == (1, 0, 1)
+    store.close()
+
+
+def test_auto_provider_uses_fastest_and_stats_command(tmp_path):
+    """Test that --llm-provider auto picks from telemetry and stats shows it."""
+    db = str(tmp_path / "telemetry.db")
+    store = TelemetryStore(db)
+    _record(store, "openai", "gpt-4", [9000, 9500, 9900], input_tokens=10)
+    _record(store, "claude", "claude-x", [2000, 2100, 2200], input_tokens=10)
+    store.close()
+
+    test_env = {
+        "HACKMD_API_TOKEN": "test_token",
+        "OPENAI_API_KEY": "key",
+        "OPENAI_MODEL": "gpt-4",
+        "CLAUDE_API_KEY": "key",
+        "CLAUDE_MODEL": "claude-x",
+    }
+    test_args = [
+        "main.py",
+        "--start-date", "2024-01-01",
+        "--end-date", "2024-01-31",
+        "--folder-name", "Test Folder",
+        "--max-tokens", "10000",
+        "--llm-provider", "auto",
+        "--year-tag", "2024",
+        "--checkpoint-dir", str(tmp_path / "checkpoints"),
+        "--outbox-dir", str(tmp_path / "outbox"),
+        "--telemetry-db", db,
+    ]
+    mock_note = {
+        "id": "test_note_id",
+        "title": "Test Note",
+        "createdAt": 1704067200000,
+        "folderPaths": [{"name": "Test Folder"}],
+        "content": "Test content",
+    }
+
+    with (
+        patch.dict(os.environ, test_env, clear=True),
+        patch("sys.argv", test_args),
+        patch("main.HackMDClient") as mock_hackmd,
+        patch("main.create_llm_client") as mock_llm_factory,
+        patch("main.save_local_report", return_value="report.md"),
+        patch("builtins.print") as mock_print,
+    ):
+        hackmd = mock_hackmd.return_value
+        hackmd.get_notes.return_value = [mock_note]
+        hackmd.filter_notes_by_folder_and_date.return_value = [mock_note]
+        hackmd.get_note_content.return_value = mock_note
+        hackmd.upload_note.return_value = "https://hackmd.io/report"
+        mock_llm_factory.return_value.generate.return_value = "# Report"
+
+        main()
+
+        mock_llm_factory.assert_called_once_with(provider="claude", api_key="key", model="claude-x")
+        mock_llm_factory.return_value.count_tokens.assert_not_called()
+
+        mock_print.reset_mock()
+        with patch("sys.argv", ["main.py", "stats", "--telemetry-db", db]):
+            main()
+        output = "\n".join(str(call.args[0]) for call in mock_print.call_args_list)
+        assert "claude-x" in output and "gpt-4" in output
+        assert "2.10s" in output
@@ -0,0 +1,88 @@
+import json
+import pytest
+import sys
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from tracing import Tracer, NOOP_SPAN
+
+
+def test_disabled_tracer_records_nothing():
+    """Test that a disabled tracer hands out the no-op span and keeps no data."""
+    tracer = Tracer(enabled=False)
+
+    with tracer.span("step", note_id="abc") as span:
+        span.set_attribute("tokens", 10)
+        tracer.add("notes.fetched")
+        tracer.record("note.tokens", 10)
+
+    assert span is NOOP_SPAN
+    assert tracer.spans == []
+    assert tracer.counters == {}
+    assert tracer.histograms == {}
+
+
+def test_spans_are_nested():
+    """Test that spans opened inside another span get it as parent."""
+    tracer = Tracer(enabled=True)
+
+    with tracer.span("report") as root:
+        with tracer.span("step.fetch") as child:
+            child.set_attribute("bytes", 42)
+
+    assert child.parent_id == root.span_id
+    assert root.parent_id is None
+    assert child.attributes == {"bytes": 42}
+
+
+def test_span_records_error():
+    """Test that exceptions mark the span as failed and propagate."""
+    tracer = Tracer(enabled=True)
+
+    with pytest.raises(ValueError):
+        with tracer.span("step.check_tokens"):
+            raise ValueError("too many tokens")
+
+    assert tracer.spans[0].status == "error"
+    assert tracer.spans[0].error == "too many tokens"
+
+
+def test_counters_and_histograms():
+    """Test counter accumulation and histogram bucketing."""
+    tracer = Tracer(enabled=True)
+
+    tracer.add("notes.fetched")
+    tracer.add("notes.fetched", 2)
+    for value in (3, 30, 3000):
+        tracer.record("note.tokens", value)
+
+    record = tracer.to_run_record()
+    histogram = record["histograms"]["note.tokens"]
+
+    assert record["counters"]["notes.fetched"] == 3
+    assert histogram["count"] == 3
+    assert histogram["sum"] == 3033
+    assert sum(histogram["bucket_counts"]) == 3
+
+
+def test_export_otlp(tmp_path):
+    """Test the OTLP/JSON export layout."""
+    tracer = Tracer(enabled=True)
+    with tracer.span("report", provider="openai", tokens=5):
+        tracer.add("hackmd.requests")
+
+    path = tracer.export(str(tmp_path / "trace.json"), "otlp")
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+
+    span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    metric = payload["resourceMetrics"][0]["scopeMetrics"][0]["metrics"][0]
+
+    assert span["name"] == "report"
+    assert {"key": "tokens", "value": {"intValue": "5"}} in span["attributes"]
+    assert metric["name"] == "hackmd.requests"
+
+
+def test_export_unknown_format(tmp_path):
+    """Test that unknown export formats are rejected."""
+    with pytest.raises(ValueError, match="Unsupported trace format"):
+        Tracer(enabled=True).export(str(tmp_path / "trace.json"), "xml")
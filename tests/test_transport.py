@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from clients.llm.claude_client import ClaudeClient
+from clients.llm.gemini_client import GeminiClient
+from transport import TransportConfig, configure_transport, connection_stats, get_http_client
+
+
+class _CountTokensHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"input_tokens": 7}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_transport_config_from_env():
+    """Test that LLM_HTTP_* variables override the defaults."""
+    env = {"LLM_HTTP_POOL_SIZE": "64", "LLM_HTTP_READ_TIMEOUT": "90", "LLM_HTTP2": "true"}
+    with patch.dict(os.environ, env, clear=True):
+        config = TransportConfig.from_env()
+    assert (config.pool_size, config.read_timeout, config.http2) == (64, 90.0, True)
+    assert config.max_retries == TransportConfig().max_retries
+    assert config.timeout.connect == config.connect_timeout
+
+    with patch.dict(os.environ, {"LLM_HTTP_MAX_RETRIES": "many"}, clear=True):
+        with pytest.raises(ValueError):
+            TransportConfig.from_env()
+
+
+def test_sdk_clients_share_pooled_connections():
+    """Test that the SDK clients use one pool and reuse its connections."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CountTokensHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    configure_transport(TransportConfig(max_retries=0))
+    try:
+        with patch.dict(os.environ, {"ANTHROPIC_BASE_URL": base_url}):
+            claude = ClaudeClient(api_key="test", model="claude-test")
+            other = ClaudeClient(api_key="test", model="claude-other")
+        gemini = GeminiClient(api_key="test", model="gemini-test")
+
+        assert claude.client._client is get_http_client()
+        assert other.client._client is get_http_client()
+        assert gemini.client._api_client._httpx_client is get_http_client()
+        assert claude.client.max_retries == 0
+
+        assert [claude.count_tokens("a"), other.count_tokens("b"), claude.count_tokens("c")] == [7, 7, 7]
+        stats = connection_stats()
+        assert (stats.requests, stats.connections, stats.reused) == (3, 1, 2)
+    finally:
+        configure_transport(None)
+        server.shutdown()
+        server.server_close()
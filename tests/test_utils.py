@@ -0,0 +1,51 @@
+import sys
+from datetime import datetime
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from models import Note
+from utils import PROMPT_HEADER, build_prompt, iter_prompt_segments
+
+
+def _note(day: str, title: str, content: str) -> Note:
+    created_at = int(datetime.strptime(day, "%Y-%m-%d").timestamp() * 1000)
+    return Note(id=title, title=title, created_at=created_at, content=content)
+
+
+def test_build_prompt_format():
+    """Test that notes are numbered and dated in order after the header."""
+    notes = [
+        _note("2024-01-05", "Week 1", "Did A"),
+        _note("2024-01-12", "Week 2", "Did B"),
+    ]
+
+    prompt = build_prompt(notes)
+
+    assert prompt.startswith(PROMPT_HEADER)
+    assert prompt[len(PROMPT_HEADER):] == (
+        "\n## 週報 1 (創建日期: 2024-01-05)\nWeek 1\n\n## 內容\nDid A\n"
+        "\n## 週報 2 (創建日期: 2024-01-12)\nWeek 2\n\n## 內容\nDid B\n"
+    )
+
+
+def test_iter_prompt_segments_is_lazy():
+    """Test that notes are pulled from the iterable only as segments are consumed."""
+    consumed = []
+
+    def notes():
+        for i in range(3):
+            consumed.append(i)
+            yield _note("2024-01-05", f"Week {i}", "content")
+
+    segments = iter_prompt_segments(notes())
+
+    assert next(segments) == PROMPT_HEADER
+    assert consumed == []
+    next(segments)
+    assert consumed == [0]
+
+
+def test_build_prompt_matches_segments():
+    """Test that the joined segments equal the built prompt."""
+    notes = [_note("2024-02-01", "Week", "内容 content")]
+
+    assert "".join(iter_prompt_segments(notes)) == build_prompt(notes)
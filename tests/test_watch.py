@@ -0,0 +1,114 @@
+import argparse
+import sys
+from unittest.mock import MagicMock
+
+sys.path.insert(0, "/home/os-chewei.chang/Projects/report_generator")
+from clients.hackmd_client import HackMDClient
+from outbox import Outbox
+from watch import ReportWatcher
+
+
+def _note(note_id, changed_at, content):
+    return {
+        "id": note_id,
+        "title": f"Week {note_id}",
+        "createdAt": 1704067200000,
+        "lastChangedAt": changed_at,
+        "folderPaths": [{"name": "Weekly"}],
+        "content": content,
+    }
+
+
+def _hackmd(notes):
+    hackmd = HackMDClient(api_token="test")
+    hackmd.get_notes = MagicMock(
+        side_effect=lambda: [{k: v for k, v in n.items() if k != "content"} for n in notes.values()]
+    )
+    hackmd.get_note_content = MagicMock(side_effect=lambda note_id: dict(notes[note_id]))
+    hackmd.upload_note = MagicMock(return_value="https://hackmd.io/report1")
+    return hackmd
+
+
+def test_watch_debounces_and_regenerates_on_large_changes(tmp_path):
+    """Test that only changed notes are fetched and small edits do not regenerate."""
+    notes = {"n1": _note("n1", 1, "完成 A"), "n2": _note("n2", 1, "完成 B")}
+    hackmd = _hackmd(notes)
+    generate = MagicMock(return_value={"hackmd_url": "https://hackmd.io/report1"})
+    args = argparse.Namespace(
+        folder_name="Weekly", start_date="2024-01-01", end_date="2024-12-31", year_tag="2024"
+    )
+    watcher = ReportWatcher(
+        args, hackmd, MagicMock(), generate, str(tmp_path / "watch.json"),
+        interval=10, max_interval=40, debounce=60, min_delta=50,
+    )
+
+    # The first poll builds the report
+    assert watcher.check(now=0)
+    assert watcher.state["report_note_id"] == "report1"
+
+    # Nothing changed: the interval backs off
+    assert not watcher.check(now=10)
+    assert not watcher.check(now=30)
+    assert watcher.interval == 40
+
+    # A small edit is debounced, then fetched alone and stays below the threshold
+    hackmd.get_note_content.reset_mock()
+    notes["n1"] = _note("n1", 2, "完成 A 與 C")
+    assert not watcher.check(now=100)
+    assert watcher.interval == 10
+    assert not watcher.check(now=130)
+    assert not watcher.check(now=170)
+    hackmd.get_note_content.assert_called_once_with("n1")
+    assert 0 < watcher.state["pending_delta"] < 50
+
+    # A large edit crosses it and updates the existing report note
+    notes["n2"] = _note("n2", 2, "完成 B\n" + "新增的長段落內容 " * 20)
+    assert not watcher.check(now=200)
+    assert watcher.check(now=260)
+    assert generate.call_count == 2
+    kwargs = generate.call_args.kwargs
+    assert kwargs["report_note_id"] == "report1"
+    assert kwargs["hackmd"].get_note_content("n1")["content"] == "完成 A 與 C"
+    assert watcher.state["pending_delta"] == 0
+
+    # A restarted watcher continues from the saved state
+    restarted = ReportWatcher(args, hackmd, MagicMock(), generate, str(tmp_path / "watch.json"))
+    assert not restarted.check(now=0)
+    assert generate.call_count == 2
+
+
+def test_report_note_is_reused_when_upload_finishes_late(tmp_path):
+    """Test that a report whose upload is still queued does not lead to a second note."""
+    notes = {"n1": _note("n1", 1, "完成 A")}
+    hackmd = _hackmd(notes)
+    # The upload did not finish within --upload-wait
+    generate = MagicMock(return_value={"hackmd_url": None})
+    args = argparse.Namespace(
+        folder_name="Weekly", start_date="2024-01-01", end_date="2024-12-31", year_tag="2024"
+    )
+    state_path = str(tmp_path / "watch.json")
+    watcher = ReportWatcher(args, hackmd, MagicMock(), generate, state_path, debounce=0, min_delta=1)
+
+    assert watcher.check(now=0)
+    notes["n1"] = _note("n1", 2, "完成 A 與 B，以及更多內容")
+    assert not watcher.check(now=10)
+    assert watcher.check(now=20)
+
+    hackmd.upload_note.assert_called_once()
+    assert hackmd.upload_note.call_args.kwargs["tags"] == ["annual-report", "2024"]
+    assert [call.kwargs["report_note_id"] for call in generate.call_args_list] == ["report1", "report1"]
+    restarted = ReportWatcher(args, hackmd, MagicMock(), generate, state_path)
+    assert restarted.state["report_note_id"] == "report1"
+
+
+def test_outbox_update_supersedes_older_updates(tmp_path):
+    """Test that queued updates of a note replace each other and use PATCH."""
+    outbox = Outbox(str(tmp_path))
+    hackmd = MagicMock()
+    hackmd.update_note.return_value = "https://hackmd.io/report1"
+    outbox.enqueue("Report", "old", note_id="report1")
+    outbox.enqueue("Report", "new", note_id="report1")
+
+    assert outbox.drain(hackmd) == {"sent": 1, "failed": 0, "deferred": 0}
+    hackmd.update_note.assert_called_once_with(note_id="report1", content="new")
+    hackmd.upload_note.assert_not_called()
@@ -0,0 +1,443 @@
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+# Default histogram bucket boundaries, chosen to cover both milliseconds
+# (latencies) and token/byte counts reasonably well.
+DEFAULT_BUCKETS = (
+    1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000,
+)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    A timed unit of work with attributes and an optional parent.
+
+    Args:
+        name (str): Span name
+        trace_id (str): ID shared by every span of a run
+        parent_id (Optional[str]): ID of the enclosing span
+        attributes (Dict[str, Any]): Initial attributes
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "status",
+        "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Set a single attribute on the span.
+
+        Args:
+            key (str): Attribute name
+            value (Any): Attribute value (str, int, float or bool)
+        """
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        """
+        Set several attributes on the span at once.
+        """
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1_000_000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the span into the JSON run record format.
+
+        Returns:
+            Dict[str, Any]: Span as a plain dictionary
+        """
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """
+    Span returned while tracing is disabled; every method does nothing.
+    """
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Histogram:
+    """
+    Explicit-bucket histogram compatible with the OTLP data model.
+
+    Args:
+        bounds (Tuple[float, ...]): Upper bucket boundaries in ascending order
+    """
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.bucket_counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value: float) -> None:
+        """
+        Record one observation.
+
+        Args:
+            value (float): Observed value
+        """
+        self.bucket_counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "bounds": list(self.bounds),
+            "bucket_counts": self.bucket_counts,
+        }
+
+
+class Tracer:
+    """
+    Collects spans, counters and histograms for a single report run.
+
+    When disabled, ``span`` returns a shared no-op object and the metric
+    methods return immediately, so instrumentation can stay in hot paths.
+
+    Objects in ``observers`` are told about every span with their
+    ``span_started(span)`` and ``span_ended(span)`` methods, on the thread
+    that opens or closes it.
+
+    Args:
+        enabled (bool, optional): Whether to record anything. Defaults to False.
+        service_name (str, optional): Service name used in exports.
+    """
+
+    def __init__(self, enabled: bool = False, service_name: str = "report-generator"):
+        self.enabled = enabled
+        self.service_name = service_name
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.observers: List[Any] = []
+        self._lock = threading.Lock()
+
+    def span(self, name: str, parent: Optional[Span] = None, **attributes: Any):
+        """
+        Open a span as a context manager.
+
+        The span is nested under the current span of this context unless
+        ``parent`` is given (useful for work handed to other threads).
+
+        Args:
+            name (str): Span name
+            parent (Optional[Span]): Explicit parent span
+            **attributes: Initial span attributes
+
+        Returns:
+            Context manager yielding the span (or a no-op span when disabled)
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return self._span(name, parent, attributes)
+
+    @contextmanager
+    def _span(
+        self, name: str, parent: Optional[Span], attributes: Dict[str, Any]
+    ) -> Iterator[Span]:
+        parent = parent or _current_span.get()
+        span = Span(name, self.trace_id, parent.span_id if parent else None, attributes)
+        token = _current_span.set(span)
+        for observer in self.observers:
+            observer.span_started(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = str(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(span)
+            for observer in self.observers:
+                observer.span_ended(span)
+
+    def current_span(self) -> Optional[Span]:
+        """
+        Get the innermost open span of the calling context.
+
+        Returns:
+            Optional[Span]: Current span, or None
+        """
+        return _current_span.get() if self.enabled else None
+
+    def add(self, name: str, value: float = 1) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name (str): Counter name
+            value (float, optional): Increment. Defaults to 1.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, name: str, value: float) -> None:
+        """
+        Record a value into a histogram.
+
+        Args:
+            name (str): Histogram name
+            value (float): Observed value
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(value)
+
+    def to_run_record(self) -> Dict[str, Any]:
+        """
+        Build the JSON run record with all spans and metrics.
+
+        Returns:
+            Dict[str, Any]: Run record
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+            return {
+                "service": self.service_name,
+                "trace_id": self.trace_id,
+                "spans": [span.to_dict() for span in spans],
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: histogram.to_dict()
+                    for name, histogram in self.histograms.items()
+                },
+            }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """
+        Build an OTLP/JSON export containing spans and metrics.
+
+        Returns:
+            Dict[str, Any]: Payload in the OTLP/JSON encoding
+        """
+        resource = {
+            "attributes": [_otlp_attribute("service.name", self.service_name)]
+        }
+        scope = {"name": "report-generator.tracing"}
+        now_ns = str(time.time_ns())
+
+        with self._lock:
+            spans = [
+                {
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_id or "",
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                    "attributes": [
+                        _otlp_attribute(key, value)
+                        for key, value in span.attributes.items()
+                    ],
+                    "status": (
+                        {"code": 2, "message": span.error}
+                        if span.status == "error"
+                        else {"code": 1}
+                    ),
+                }
+                for span in self.spans
+            ]
+            metrics = [
+                {
+                    "name": name,
+                    "sum": {
+                        "dataPoints": [{"asDouble": value, "timeUnixNano": now_ns}],
+                        "aggregationTemporality": 2,
+                        "isMonotonic": True,
+                    },
+                }
+                for name, value in self.counters.items()
+            ] + [
+                {
+                    "name": name,
+                    "histogram": {
+                        "dataPoints": [
+                            {
+                                "timeUnixNano": now_ns,
+                                "count": str(histogram.count),
+                                "sum": histogram.sum,
+                                "min": histogram.min,
+                                "max": histogram.max,
+                                "bucketCounts": [str(c) for c in histogram.bucket_counts],
+                                "explicitBounds": list(histogram.bounds),
+                            }
+                        ],
+                        "aggregationTemporality": 2,
+                    },
+                }
+                for name, histogram in self.histograms.items()
+            ]
+
+        return {
+            "resourceSpans": [
+                {"resource": resource, "scopeSpans": [{"scope": scope, "spans": spans}]}
+            ],
+            "resourceMetrics": [
+                {
+                    "resource": resource,
+                    "scopeMetrics": [{"scope": scope, "metrics": metrics}],
+                }
+            ],
+        }
+
+    def export(self, path: str, fmt: str = "json") -> str:
+        """
+        Write the collected data to a local file.
+
+        Args:
+            path (str): Output file path
+            fmt (str, optional): "json" for the run record, "otlp" for OTLP/JSON
+
+        Returns:
+            str: Path of the written file
+
+        Raises:
+            ValueError: If the format is unknown
+        """
+        if fmt == "json":
+            payload = self.to_run_record()
+        elif fmt == "otlp":
+            payload = self.to_otlp()
+        else:
+            raise ValueError(f"Unsupported trace format: {fmt}")
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2, default=str)
+        return path
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    """
+    Encode an attribute as an OTLP/JSON key-value pair.
+
+    Args:
+        key (str): Attribute name
+        value (Any): Attribute value
+
+    Returns:
+        Dict[str, Any]: Encoded attribute
+    """
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+_tracer = Tracer(enabled=False)
+
+
+def get_tracer() -> Tracer:
+    """
+    Get the process-wide tracer.
+
+    Returns:
+        Tracer: Current tracer (disabled unless configured)
+    """
+    return _tracer
+
+
+def configure_tracing(enabled: bool) -> Tracer:
+    """
+    Replace the process-wide tracer with a fresh one.
+
+    Args:
+        enabled (bool): Whether the new tracer records data
+
+    Returns:
+        Tracer: The new tracer
+    """
+    global _tracer
+    _tracer = Tracer(enabled=enabled)
+    return _tracer
@@ -0,0 +1,228 @@
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    # Recent OpenAI and Anthropic SDKs are built on the httpx2 fork and
+    # reject plain httpx clients; older ones (and Gemini) take httpx
+    import httpx2 as httpx
+except ImportError:
+    import httpx
+
+from tracing import get_tracer
+
+_http_client: Optional[httpx.Client] = None
+_stats: Optional["ConnectionStats"] = None
+_config: Optional["TransportConfig"] = None
+_lock = threading.Lock()
+
+
+@dataclass
+class TransportConfig:
+    """
+    Connection pool, timeout and retry settings shared by the LLM SDK clients.
+
+    Args:
+        pool_size (int): Maximum open connections. Defaults to 20.
+        keepalive (int): Maximum idle keep-alive connections. Defaults to 20.
+        keepalive_expiry (float): Seconds an idle connection is kept. Defaults to 60.
+        connect_timeout (float): Seconds to establish a connection. Defaults to 10.
+        read_timeout (float): Seconds to wait for response data. Defaults to 600.
+        max_retries (int): Retries of failed requests, with exponential backoff. Defaults to 2.
+        http2 (bool): Negotiate HTTP/2 (needs the ``h2`` package). Defaults to False.
+    """
+
+    pool_size: int = 20
+    keepalive: int = 20
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 600.0
+    max_retries: int = 2
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        """
+        Read the settings from ``LLM_HTTP_*`` environment variables.
+
+        Returns:
+            TransportConfig: Settings, with defaults for unset variables
+
+        Raises:
+            ValueError: If a variable is not a valid number
+        """
+        config = cls()
+        for name, field, cast in [
+            ("LLM_HTTP_POOL_SIZE", "pool_size", int),
+            ("LLM_HTTP_KEEPALIVE", "keepalive", int),
+            ("LLM_HTTP_KEEPALIVE_EXPIRY", "keepalive_expiry", float),
+            ("LLM_HTTP_CONNECT_TIMEOUT", "connect_timeout", float),
+            ("LLM_HTTP_READ_TIMEOUT", "read_timeout", float),
+            ("LLM_HTTP_MAX_RETRIES", "max_retries", int),
+        ]:
+            value = os.getenv(name)
+            if value:
+                try:
+                    setattr(config, field, cast(value))
+                except ValueError:
+                    raise ValueError(f"Invalid {name}: {value}")
+        config.http2 = os.getenv("LLM_HTTP2", "").lower() in ("1", "true", "yes")
+        return config
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+
+class ConnectionStats:
+    """
+    Count requests and how many of them reused a pooled connection.
+
+    A response is matched to its connection through the network stream that
+    carried it; a stream seen before means the connection was reused.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.http2_requests = 0
+        self._streams: "weakref.WeakSet[Any]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    @property
+    def reused(self) -> int:
+        return self.requests - self.connections
+
+    @property
+    def reuse_rate(self) -> float:
+        return self.reused / self.requests if self.requests else 0.0
+
+    def on_response(self, response: httpx.Response) -> None:
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            self.requests += 1
+            new = stream is None or stream not in self._streams
+            if new:
+                self.connections += 1
+                if stream is not None:
+                    self._streams.add(stream)
+            if response.http_version == "HTTP/2":
+                self.http2_requests += 1
+        tracer = get_tracer()
+        tracer.add("llm_http.requests")
+        tracer.add("llm_http.connections_opened" if new else "llm_http.connections_reused")
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "reused": self.reused,
+                "reuse_rate": round(self.reuse_rate, 3),
+                "http2_requests": self.http2_requests,
+            }
+
+
+def configure_transport(config: Optional[TransportConfig]) -> Optional[httpx.Client]:
+    """
+    Replace the shared HTTP client of the LLM SDK clients.
+
+    The previous client is closed. Clients created afterwards use the new
+    one; None defers creating it until the next ``get_http_client()`` call.
+
+    Args:
+        config (Optional[TransportConfig]): Settings of the new client
+
+    Returns:
+        Optional[httpx.Client]: The new client, or None
+    """
+    global _http_client, _stats, _config
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = _stats = _config = None
+        if config is not None:
+            _http_client, _stats = _build_client(config)
+            _config = config
+        return _http_client
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Get the HTTP client shared by the LLM SDK clients.
+
+    Created on first use from ``TransportConfig.from_env()``.
+
+    Returns:
+        httpx.Client: Pooled client
+    """
+    global _http_client, _stats, _config
+    with _lock:
+        if _http_client is None:
+            _config = TransportConfig.from_env()
+            _http_client, _stats = _build_client(_config)
+        return _http_client
+
+
+def get_transport_config() -> TransportConfig:
+    """
+    Get the settings of the shared HTTP client.
+
+    Returns:
+        TransportConfig: Settings used by ``get_http_client()``
+    """
+    get_http_client()
+    return _config
+
+
+def connection_stats() -> Optional[ConnectionStats]:
+    """
+    Get the connection reuse counters of the shared HTTP client.
+
+    Returns:
+        Optional[ConnectionStats]: Counters, or None before the client is created
+    """
+    return _stats
+
+
+def _build_client(config: TransportConfig) -> Tuple[httpx.Client, ConnectionStats]:
+    stats = ConnectionStats()
+    limits = httpx.Limits(
+        max_connections=config.pool_size,
+        max_keepalive_connections=min(config.keepalive, config.pool_size),
+        keepalive_expiry=config.keepalive_expiry,
+    )
+    kwargs = dict(
+        limits=limits,
+        timeout=config.timeout,
+        follow_redirects=True,
+        event_hooks={"response": [stats.on_response]},
+    )
+    try:
+        client = httpx.Client(http2=config.http2, **kwargs)
+    except ImportError:
+        print(f"Warning: HTTP/2 needs the h2 package, using HTTP/1.1")
+        config.http2 = False
+        client = httpx.Client(**kwargs)
+    return client, stats
+
+
+def prewarm(url: str) -> None:
+    """
+    Open a pooled connection to a host before its first API call.
+
+    Any response, including an error status, leaves the connection in the
+    pool for the next request to the host. Failures are only recorded in the
+    tracer; the first real call then connects as usual.
+
+    Args:
+        url (str): Base URL of the API
+    """
+    with get_tracer().span("llm.prewarm", url=url) as span:
+        try:
+            response = get_http_client().head(url, timeout=get_transport_config().connect_timeout)
+            span.set_attribute("status_code", response.status_code)
+        except httpx.HTTPError as e:
+            span.set_attribute("error", str(e))
@@ -1,70 +1,196 @@
-from typing import List, Dict, Any
-from datetime import datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import os
 
+from models import Note, format_note_date
 
-def build_prompt(filtered_notes: List[Dict[str, Any]]) -> str:
+# tiktoken encoding used for local estimates; False once loading has failed
+_encoding: Optional[Any] = None
+
+
+# Sections of the report: (heading, guidance for the model)
+REPORT_SECTIONS = [
+    ("一、年度重點成就摘要", "[簡述本年度最重要的工作成果]"),
+    (
+        "二、技術運用",
+        "說明：開發之技術或系統，實際應用於 BG/BU/外部客戶\n"
+        "評估原則：開發何種技術/系統/功能用於哪一專案\n"
+        "[請列舉具體的技術應用案例]",
+    ),
+    (
+        "三、技術研發",
+        "說明：研發新技術\n"
+        "評估原則：研發何種技術/功能於院長會議中報告討論，或申請專利論文\n"
+        "[請列舉研發性質的工作內容]",
+    ),
+    ("四、遇到的挑戰和解決方案", "[描述主要挑戰及對應的解決方法]"),
+    (
+        "五、量化指標",
+        "- 完成專案數：[X] 個\n- 解決問題數：[Y] 個\n- 其他相關數據",
+    ),
+]
+
+NOTES_INTRO = "以下是按時間順序排列的週報內容：\n"
+
+
+def build_prompt_header(sections: List[Tuple[str, str]] = REPORT_SECTIONS) -> str:
     """
-    Build the prompt for LLM report generation.
+    Build the instructions that precede the notes in the report prompt.
 
     Args:
-        filtered_notes (List[Dict[str, Any]]): List of filtered notes
+        sections (List[Tuple[str, str]], optional): Sections the model should
+            write. Defaults to REPORT_SECTIONS.
 
     Returns:
-        str: Formatted prompt for LLM
+        str: Prompt header
     """
-    prompt = """你是一位專業的績效報告撰寫助理。請根據以下週報內容，生成一份完整的年度工作績效報告。
-
-報告必須包含以下章節（使用 Markdown 格式）：
-
-# 一、年度重點成就摘要
-[簡述本年度最重要的工作成果]
-
-# 二、技術運用
-說明：開發之技術或系統，實際應用於 BG/BU/外部客戶
-評估原則：開發何種技術/系統/功能用於哪一專案
-[請列舉具體的技術應用案例]
+    return (
+        "你是一位專業的績效報告撰寫助理。請根據以下週報內容，生成一份完整的年度工作績效報告。\n\n"
+        "報告必須包含以下章節（使用 Markdown 格式）：\n\n"
+        + "".join(f"# {heading}\n{guidance}\n\n" for heading, guidance in sections)
+        + "---\n\n"
+        + NOTES_INTRO
+    )
 
-# 三、技術研發
-說明：研發新技術
-評估原則：研發何種技術/功能於院長會議中報告討論，或申請專利論文
-[請列舉研發性質的工作內容]
 
-# 四、遇到的挑戰和解決方案
-[描述主要挑戰及對應的解決方法]
+PROMPT_HEADER = build_prompt_header()
 
-# 五、量化指標
-- 完成專案數：[X] 個
-- 解決問題數：[Y] 個
-- 其他相關數據
+# Shared context of the per-section prompts; the notes follow it
+SECTION_CONTEXT_HEADER = "你是一位專業的績效報告撰寫助理。\n\n" + NOTES_INTRO
 
+SECTION_INSTRUCTION_TEMPLATE = """
 ---
 
-以下是按時間順序排列的週報內容：
+請根據以上週報內容，只撰寫年度工作績效報告中的以下章節（使用 Markdown 格式），以「# {heading}」作為開頭，不要輸出其他章節：
+
+# {heading}
+{guidance}
 """
 
-    for i, note in enumerate(filtered_notes, 1):
-        created_at = note.get("createdAt", 0)
-        date_str = datetime.fromtimestamp(created_at / 1000).strftime("%Y-%m-%d")
-        title = note.get("title", "Untitled")
 
-        prompt += f"""
-## 週報 {i} (創建日期: {date_str})
+NOTE_HEADING_TEMPLATE = """
+## 週報 {index} (創建日期: {date})
 {title}
 
 ## 內容
-{note.get("content")}
 """
 
-    return prompt
+
+def iter_prompt_segments(
+    filtered_notes: Iterable[Note], sections: List[Tuple[str, str]] = REPORT_SECTIONS
+) -> Iterator[str]:
+    """
+    Yield the prompt for LLM report generation piece by piece.
+
+    Notes are consumed lazily, so the prompt can be streamed into a request
+    body or a file without holding every note in memory at once.
+
+    Args:
+        filtered_notes (Iterable[Note]): Filtered notes in chronological order
+        sections (List[Tuple[str, str]], optional): Sections the model should
+            write. Defaults to REPORT_SECTIONS.
+
+    Yields:
+        str: Consecutive prompt segments
+    """
+    yield build_prompt_header(sections)
+
+    for i, note in enumerate(filtered_notes, 1):
+        yield NOTE_HEADING_TEMPLATE.format(index=i, date=note.date, title=note.title)
+        content = note.content
+        yield content if isinstance(content, str) else str(content)
+        yield "\n"
+
+
+def build_prompt(
+    filtered_notes: Iterable[Note], sections: List[Tuple[str, str]] = REPORT_SECTIONS
+) -> str:
+    """
+    Build the prompt for LLM report generation.
+
+    Args:
+        filtered_notes (Iterable[Note]): List of filtered notes
+        sections (List[Tuple[str, str]], optional): Sections the model should
+            write. Defaults to REPORT_SECTIONS.
+
+    Returns:
+        str: Formatted prompt for LLM
+    """
+    return "".join(iter_prompt_segments(filtered_notes, sections))
+
+
+def build_section_prompts(
+    prompt: str, sections: List[Tuple[str, str]] = REPORT_SECTIONS
+) -> Tuple[str, List[str]]:
+    """
+    Split a report prompt into a shared note context and one instruction per section.
+
+    The context comes first in every section request, so providers with
+    prompt caching can reuse it across sections.
+
+    Args:
+        prompt (str): Full prompt built by ``build_prompt``
+        sections (List[Tuple[str, str]], optional): Sections the prompt was
+            built for. Defaults to REPORT_SECTIONS.
+
+    Returns:
+        Tuple[str, List[str]]: Shared context and the instruction of each
+        section in ``sections`` order
+
+    Raises:
+        ValueError: If the prompt was not built by ``build_prompt``
+    """
+    header = build_prompt_header(sections)
+    if not prompt.startswith(header):
+        raise ValueError("Prompt does not start with the report prompt header")
+
+    context = SECTION_CONTEXT_HEADER + prompt[len(header):]
+    instructions = [
+        SECTION_INSTRUCTION_TEMPLATE.format(heading=heading, guidance=guidance)
+        for heading, guidance in sections
+    ]
+    return context, instructions
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text locally, without any API call.
+
+    Uses tiktoken's ``o200k_base`` encoding when it is available. If the
+    encoding cannot be loaded (e.g. no network to fetch it), falls back to a
+    heuristic of one token per CJK character and one token per four other
+    characters.
+
+    Args:
+        text (str): Text to estimate tokens for
+
+    Returns:
+        int: Estimated number of tokens
+    """
+    global _encoding
+
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+
+    # CJK characters take three bytes in UTF-8, so the byte surplus over the
+    # character count approximates their number without scanning in Python
+    cjk = (len(text.encode("utf-8")) - len(text)) // 2
+    return cjk + (len(text) - cjk + 3) // 4
 
 
-def calculate_total_tokens(filtered_notes: List[Dict[str, Any]], llm_client) -> int:
+def calculate_total_tokens(filtered_notes: List[Note], llm_client) -> int:
     """
     Calculate total tokens for all notes.
 
     Args:
-        filtered_notes (List[Dict[str, Any]]): List of filtered notes
+        filtered_notes (List[Note]): List of filtered notes
         llm_client: LLM client for token counting
 
     Returns:
@@ -74,13 +200,40 @@ def calculate_total_tokens(filtered_notes: List[Dict[str, Any]], llm_client) ->
 
     for note in filtered_notes:
         # Get note content (we need to fetch full content for token counting)
-        note_content = note.get("content", "")
+        note_content = note.content
         if note_content:
             total_tokens += llm_client.count_tokens(note_content)
 
     return total_tokens
 
 
+def report_title(start_date: str, end_date: str) -> str:
+    """
+    Title of the report note on HackMD.
+
+    Args:
+        start_date (str): Start date
+        end_date (str): End date
+
+    Returns:
+        str: Report title
+    """
+    return f"年度績效報告_{start_date}_to_{end_date}"
+
+
+def report_tags(year_tag: str) -> List[str]:
+    """
+    Tags of the report note on HackMD.
+
+    Args:
+        year_tag (str): Year tag of the report
+
+    Returns:
+        List[str]: Report tags
+    """
+    return ["annual-report", year_tag]
+
+
 def save_local_report(content: str, start_date: str, end_date: str) -> str:
     """
     Save the generated report to a local file.
@@ -104,7 +257,7 @@ def save_local_report(content: str, start_date: str, end_date: str) -> str:
     os.makedirs(reports_dir, exist_ok=True)
 
     # Build filename with reports directory
-    filename = f"年度績效報告_{start_date}_to_{end_date}.md"
+    filename = f"{report_title(start_date, end_date)}.md"
     filepath = os.path.join(reports_dir, filename)
 
     try:
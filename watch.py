@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from checkpoint import atomic_write
+from clients.hackmd_client import HackMDClient
+from clients.llm import LLMClient
+from draft import DRAFT_NOTICE
+from utils import estimate_tokens, report_tags, report_title
+
+
+def line_tokens(content: str) -> Dict[str, int]:
+    """
+    Estimate the tokens of each distinct line of a note.
+
+    Lines are keyed by their CRC32, so the state of a note stays small and
+    can be compared against a later version without keeping its text.
+
+    Args:
+        content (str): Note content
+
+    Returns:
+        Dict[str, int]: Estimated tokens per line hash
+    """
+    lines = {}
+    for line in content.split("\n"):
+        line = line.strip()
+        if line:
+            lines[format(zlib.crc32(line.encode("utf-8")), "08x")] = estimate_tokens(line)
+    return lines
+
+
+def content_delta(old: Dict[str, int], new: Dict[str, int]) -> int:
+    """
+    Estimate the tokens that changed between two versions of a note.
+
+    Args:
+        old (Dict[str, int]): Line tokens of the previous version
+        new (Dict[str, int]): Line tokens of the new version
+
+    Returns:
+        int: Tokens of the added plus the removed lines
+    """
+    added = sum(tokens for key, tokens in new.items() if key not in old)
+    removed = sum(tokens for key, tokens in old.items() if key not in new)
+    return added + removed
+
+
+class WatchedHackMD:
+    """
+    HackMD client view that serves the watcher's listing and note bodies.
+
+    A regeneration reads the listing and every note through this view, so
+    only notes the watcher has not fetched yet are requested from HackMD.
+    Everything else (uploads, updates) goes to the wrapped client.
+
+    Args:
+        hackmd (HackMDClient): HackMD client
+        listing (List[Dict[str, Any]]): Note listing of the last poll
+        bodies (Dict[str, Dict[str, Any]]): Fetched notes by ID
+    """
+
+    def __init__(
+        self,
+        hackmd: HackMDClient,
+        listing: List[Dict[str, Any]],
+        bodies: Dict[str, Dict[str, Any]],
+    ):
+        self.hackmd = hackmd
+        self.listing = listing
+        self.bodies = bodies
+
+    def get_notes(self) -> List[Dict[str, Any]]:
+        return self.listing
+
+    def get_note_content(self, note_id: str) -> Dict[str, Any]:
+        body = self.bodies.get(note_id)
+        if body is None:
+            body = self.bodies[note_id] = self.hackmd.get_note_content(note_id)
+        return body
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.hackmd, name)
+
+
+class ReportWatcher:
+    """
+    Keep a report up to date by polling HackMD for changed notes.
+
+    Every poll lists the notes once and compares the ``lastChangedAt`` of the
+    notes in the report's folder and date range with the last seen state.
+    The poll interval doubles while nothing changes, up to ``max_interval``,
+    and drops back to ``interval`` on a change. Edits are debounced: changed
+    notes are only fetched once the listing has been stable for ``debounce``
+    seconds. The changed lines of the fetched notes are estimated in tokens,
+    and the report is regenerated once ``min_delta`` tokens have changed in
+    total. The report note is created on HackMD before the first report is
+    generated, and every report updates it, so a slow upload never leads to
+    a second note.
+
+    The seen state, the pending delta and the report note ID are kept in
+    ``state_path``, so a restarted watcher continues where it stopped.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments of the report
+        hackmd (HackMDClient): HackMD client
+        llm (Optional[LLMClient]): LLM client; None lets each run pick one
+        generate (Callable[..., Dict[str, Any]]): Runs the report, called as
+            ``generate(args, hackmd=..., llm=..., report_note_id=...)``
+        state_path (str): File of the watch state
+        interval (float, optional): Shortest poll interval in seconds. Defaults to 60.
+        max_interval (float, optional): Longest poll interval in seconds. Defaults to 900.
+        debounce (float, optional): Seconds the listing must be stable. Defaults to 120.
+        min_delta (int, optional): Changed tokens that trigger a regeneration. Defaults to 200.
+    """
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        hackmd: HackMDClient,
+        llm: Optional[LLMClient],
+        generate: Callable[..., Dict[str, Any]],
+        state_path: str,
+        interval: float = 60,
+        max_interval: float = 900,
+        debounce: float = 120,
+        min_delta: int = 200,
+    ):
+        self.args = args
+        self.hackmd = hackmd
+        self.llm = llm
+        self.generate = generate
+        self.state_path = state_path
+        self.min_interval = interval
+        self.max_interval = max(interval, max_interval)
+        self.debounce = debounce
+        self.min_delta = min_delta
+
+        self.interval = interval
+        self.bodies: Dict[str, Dict[str, Any]] = {}
+        self._observed: Optional[Dict[str, int]] = None
+        self._stable_since = 0.0
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"notes": {}, "pending_delta": 0, "generated": False, "report_note_id": None}
+
+    def _save_state(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        atomic_write(self.state_path, json.dumps(self.state).encode("utf-8"))
+
+    def _needs_report(self) -> bool:
+        return self.state["pending_delta"] >= self.min_delta or not self.state["generated"]
+
+    def check(self, now: Optional[float] = None) -> bool:
+        """
+        Poll HackMD once and regenerate the report if enough has changed.
+
+        Args:
+            now (Optional[float]): Current monotonic time. Defaults to ``time.monotonic()``.
+
+        Returns:
+            bool: True if the report was regenerated
+        """
+        now = time.monotonic() if now is None else now
+        listing = self.hackmd.get_notes()
+        try:
+            matching = self.hackmd.filter_notes_by_folder_and_date(
+                notes=listing,
+                folder_name=self.args.folder_name,
+                start_date=self.args.start_date,
+                end_date=self.args.end_date,
+            )
+        except ValueError:
+            matching = []
+        current = {note.id: note.last_changed_at for note in matching}
+        seen = {note_id: note["changed_at"] for note_id, note in self.state["notes"].items()}
+
+        if self._observed is not None and current != self._observed:
+            # Still being edited; wait for the listing to settle
+            self._observed = current
+            self._stable_since = now
+            self.interval = self.min_interval
+            return False
+        if self._observed is None:
+            # Changes made while the watcher was not running need no debounce
+            self._stable_since = now - self.debounce
+        self._observed = current
+
+        if current == seen and not (current and self._needs_report()):
+            self.interval = min(self.max_interval, self.interval * 2)
+            return False
+        if now - self._stable_since < self.debounce:
+            self.interval = self.min_interval
+            return False
+
+        changed = [note_id for note_id, changed_at in current.items() if seen.get(note_id) != changed_at]
+        removed = [note_id for note_id in seen if note_id not in current]
+        delta = 0
+
+        for note_id in changed:
+            try:
+                body = self.hackmd.get_note_content(note_id)
+            except Exception as e:
+                print(f"Warning: Failed to fetch changed note {note_id}: {str(e)}")
+                continue
+            self.bodies[note_id] = body
+            lines = line_tokens(body.get("content") or "")
+            old = self.state["notes"].get(note_id, {}).get("lines", {})
+            delta += content_delta(old, lines)
+            self.state["notes"][note_id] = {"changed_at": current[note_id], "lines": lines}
+
+        for note_id in removed:
+            delta += sum(self.state["notes"].pop(note_id)["lines"].values())
+            self.bodies.pop(note_id, None)
+
+        self.state["pending_delta"] += delta
+        if changed or removed:
+            print(
+                f"{len(changed)} notes changed and {len(removed)} removed, ~{delta} tokens "
+                f"({self.state['pending_delta']} since the last report)"
+            )
+        # Saved before regenerating, so a failed regeneration is retried
+        self._save_state()
+        self.interval = self.min_interval
+
+        if not current or not self._needs_report():
+            return False
+        self._regenerate(listing)
+        self._save_state()
+        return True
+
+    def _create_report_note(self) -> str:
+        # The upload of a report may still be queued when the next poll
+        # comes, so the note and its ID must exist before the first one
+        url = self.hackmd.upload_note(
+            title=report_title(self.args.start_date, self.args.end_date),
+            content=DRAFT_NOTICE,
+            tags=report_tags(self.args.year_tag),
+        )
+        self.state["report_note_id"] = url.rstrip("/").rsplit("/", 1)[-1]
+        self._save_state()
+        print(f"Created report note {url}")
+        return self.state["report_note_id"]
+
+    def _regenerate(self, listing: List[Dict[str, Any]]) -> None:
+        print(f"Regenerating report ({self.state['pending_delta']} tokens changed)...")
+        report_note_id = self.state["report_note_id"] or self._create_report_note()
+        self.generate(
+            self.args,
+            hackmd=WatchedHackMD(self.hackmd, listing, self.bodies),
+            llm=self.llm,
+            report_note_id=report_note_id,
+        )
+        self.state["generated"] = True
+        self.state["pending_delta"] = 0
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        """
+        Poll until interrupted (or for ``max_polls`` polls).
+
+        A failed poll or regeneration is reported and retried at the next poll.
+
+        Args:
+            max_polls (Optional[int]): Number of polls to run. Defaults to unlimited.
+        """
+        polls = 0
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Warning: Watch poll failed, retrying: {str(e)}")
+                self.interval = self.min_interval
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                return
+            time.sleep(self.interval)